@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of the shared cleaning engine against the per-strategy pandas chains it replaced.
+
+Usage:
+    python benchmarks/bench_cleaning.py [--rows N] [--repeat N]
+"""
+
+import argparse
+import random
+import sys
+import timeit
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.utils.cleaning import CLEANING_PROFILES, clean_jobs_df
+
+LOCATIONS = [
+    "Remote",
+    "remote",
+    "Worldwide",
+    "USA Only",
+    "Remote Job",
+    "Remote - Europe",
+    "Remote Remote",
+    "New York/London",
+    "<span>Berlin, Germany</span>",
+    "RemoteEurope",
+    "['Canada', 'US']",
+    "Anywhere 2024-05-01",
+    "UK USD100-150/yr",
+    "Remote with frequent travel",
+    "LATAM | North America",
+]
+
+
+def legacy_clean_api(df: pd.DataFrame) -> pd.DataFrame:
+    """Reference copy of the pre-engine ``clean_postgre_api`` chain."""
+    for col in df.columns:
+        if col == "description":
+            if not df[col].empty:
+                df[col] = df[col].astype(str)
+                df[col] = df[col].str.replace(r'<.*?>|[{}[\]\'",]', "", regex=True)
+        elif col == "location":  # noqa: SIM102 - kept as written in the original chain
+            if not df[col].empty:
+                df[col] = df[col].astype(str)
+                df[col] = df[col].str.replace(r'<.*?>|[{}[\]\'",]', "", regex=True)
+                df[col] = df[col].str.replace(r"\b(\w+)\s+\1\b", r"\1", regex=True)
+                df[col] = df[col].str.replace(r"\d{4}-\d{2}-\d{2}", "", regex=True)
+                df[col] = df[col].str.replace(r"(USD|GBP)\d+-\d+/yr", "", regex=True)
+                df[col] = df[col].str.replace("[-/]", " ", regex=True)
+                df[col] = df[col].str.replace(r"(?<=[a-z])(?=[A-Z])", " ", regex=True)
+                pattern = (
+                    r"(?i)\bRemote Job\b|\bRemote Work\b|\bRemote Office\b|\bRemote Global\b"
+                    r"|\bRemote with frequent travel\b"
+                )
+                df[col] = df[col].str.replace(pattern, "Worldwide", regex=True)
+                df[col] = df[col].replace("(?i)^remote$", "Worldwide", regex=True)
+                df[col] = df[col].str.strip()
+    return df
+
+
+def make_jobs_df(rows: int, seed: int = 42) -> pd.DataFrame:
+    rng = random.Random(seed)
+    return pd.DataFrame(
+        {
+            "title": [f"Senior Backend Engineer {i}" for i in range(rows)],
+            "link": [f"https://example.com/jobs/{i}" for i in range(rows)],
+            "description": [
+                f"<p>We are hiring a <b>Python</b> developer #{i}, {{remote}} [full-time]</p>" for i in range(rows)
+            ],
+            "location": [rng.choice(LOCATIONS) for _ in range(rows)],
+        }
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the shared cleaning engine")
+    parser.add_argument("--rows", type=int, default=20_000, help="Rows in the synthetic DataFrame")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per implementation (best is kept)")
+    args = parser.parse_args()
+
+    df = make_jobs_df(args.rows)
+
+    expected = legacy_clean_api(df.copy())
+    actual = clean_jobs_df(df, CLEANING_PROFILES["api"])
+    pd.testing.assert_frame_equal(expected, actual)
+
+    legacy = min(timeit.repeat(lambda: legacy_clean_api(df.copy()), number=1, repeat=args.repeat))
+    engine = min(timeit.repeat(lambda: clean_jobs_df(df, CLEANING_PROFILES["api"]), number=1, repeat=args.repeat))
+
+    print(f"rows: {args.rows}")
+    print(f"legacy chain : {legacy * 1e6 / args.rows:8.2f} µs/row ({legacy:.3f}s)")
+    print(f"clean engine : {engine * 1e6 / args.rows:8.2f} µs/row ({engine:.3f}s)")
+    print(f"speedup      : {legacy / engine:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the crawler engines against a local replay of recorded sites.
+
+The RSS, API and BS4 engines run the way ``run_crawlers`` runs them, sharing a
+scheduler, a parse pool and the database, with their configs pointed at a
+``ReplayServer`` running in a separate process. Every run starts from an empty
+database, with the HTTP and detail caches disabled and without saving the
+listings to ``debug_html/``, so runs are comparable.
+
+Reported:
+- throughput: requests, MB downloaded and jobs stored per second of wall time
+- per-site fetch latency (p50/p99), from the engines' run metrics
+- peak RSS of the crawler process (the parse workers and the server excluded)
+- DB insert rate: jobs stored per second spent in the insert stage
+
+Without a recording a synthetic one is generated, see ``record_pages.py``.
+
+Usage:
+    python benchmarks/bench_crawl.py [RECORDING_DIR] [--latency S] [--jitter S] [--strategy bs4|api|rss ...]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+# Replayed listings would pile up in debug_html/, and the writes would be timed
+os.environ.setdefault("SAVE_DEBUG_HTML", "0")
+from benchmarks.record_pages import record_synthetic  # noqa: E402
+from benchmarks.replay import STRATEGIES, Recording, local_configs, loopback_origins, serve  # noqa: E402
+from src.crawler import AsyncCrawlerEngine  # noqa: E402
+from src.db import AsyncJobsDatabase  # noqa: E402
+from src.models import ApiArgs, Bs4Args, RssArgs  # noqa: E402
+from src.utils.parsing import ParseExecutor  # noqa: E402
+from src.utils.scheduler import DEFAULT_MAX_CONCURRENCY, FetchScheduler  # noqa: E402
+
+STRATEGY_ARGS = {"rss": RssArgs, "api": ApiArgs, "bs4": Bs4Args}
+SERVER_START_TIMEOUT = 30
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+async def run_engines(
+    configs: dict[str, list[dict]],
+    work_dir: Path,
+    strategies: list[str],
+    overrides: dict[str, Any],
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> tuple[float, list[dict[str, Any]]]:
+    """Crawl ``configs`` into a fresh database, returning the wall time and the run report of every engine."""
+    db_path = str(work_dir / "jobs.db")
+    scheduler = FetchScheduler(max_concurrency)
+    parse_executor = ParseExecutor()
+    database = AsyncJobsDatabase(db_path)
+
+    engines = []
+    for strategy in strategies:
+        config_path = work_dir / f"{strategy}.json"
+        config_path.write_text(json.dumps(configs[strategy]))
+        args = STRATEGY_ARGS[strategy](
+            test=True,
+            db_path=db_path,
+            json_test_path=str(config_path),
+            scheduler=scheduler,
+            parse_executor=parse_executor,
+            database=database,
+            use_http_cache=False,
+            use_detail_cache=False,
+            metrics_dir=str(work_dir / "metrics"),
+            **overrides,
+        )
+        engines.append(AsyncCrawlerEngine(args))
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(engine.run() for engine in engines))
+    finally:
+        elapsed = time.perf_counter() - started
+        parse_executor.shutdown()
+        await database.close()
+    return elapsed, [engine.metrics.report() for engine in engines]
+
+
+def summarize(elapsed: float, reports: list[dict[str, Any]], origins: dict[str, str]) -> dict[str, Any]:
+    # Sources are named after the local URLs; show the recorded ones
+    local_to_host = {origin: host for host, origin in origins.items()}
+
+    def recorded_name(source: str) -> str:
+        for origin, host in local_to_host.items():
+            source = source.replace(origin, host)
+        return source
+
+    totals = {"requests": 0, "bytes": 0, "rows_yielded": 0, "rows_inserted": 0, "insert_seconds": 0.0}
+    sites = {}
+    for report in reports:
+        totals["rows_inserted"] += report["totals"].get("rows_inserted", 0)
+        totals["rows_yielded"] += report["totals"].get("rows_yielded", 0)
+        totals["bytes"] += report["totals"].get("bytes_downloaded", 0)
+        totals["requests"] += sum(report["totals"]["status_codes"].values())
+        totals["insert_seconds"] += report["totals"]["stages"].get("insert", {}).get("seconds", 0.0)
+        for source, section in report["sources"].items():
+            fetch = section["stages"].get("fetch", {})
+            sites[recorded_name(source)] = {
+                "strategy": report["strategy"],
+                "requests": fetch.get("count", 0),
+                "p50_ms": round(fetch.get("p50", 0.0) * 1000, 1),
+                "p99_ms": round(fetch.get("p99", 0.0) * 1000, 1),
+                "rows_yielded": section.get("rows_yielded", 0),
+            }
+
+    return {
+        "wall_seconds": round(elapsed, 3),
+        "requests_per_second": round(totals["requests"] / elapsed, 1),
+        "mb_per_second": round(totals["bytes"] / elapsed / 1e6, 2),
+        "jobs_per_second": round(totals["rows_inserted"] / elapsed, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "insert_rows_per_second": round(totals["rows_inserted"] / totals["insert_seconds"], 1)
+        if totals["insert_seconds"]
+        else None,
+        **{key: value for key, value in totals.items() if key != "insert_seconds"},
+        "sites": dict(sorted(sites.items())),
+    }
+
+
+def print_summary(result: dict[str, Any]) -> None:
+    print(f"wall time    : {result['wall_seconds']:8.2f} s")
+    print(
+        f"requests     : {result['requests']:8d} "
+        f"({result['requests_per_second']:.1f}/s, {result['mb_per_second']:.2f} MB/s)"
+    )
+    print(
+        f"jobs stored  : {result['rows_inserted']:8d} "
+        f"({result['jobs_per_second']:.1f}/s, {result['rows_yielded']} yielded)"
+    )
+    print(f"insert rate  : {result['insert_rows_per_second'] or 0:8.1f} rows/s of insert stage")
+    print(f"peak RSS     : {result['peak_rss_mb']:8.1f} MB")
+    print()
+    width = max([len(site) for site in result["sites"]] + [4])
+    print(f"{'site':<{width}}  strategy  requests   p50 ms   p99 ms  jobs")
+    for site, stats in result["sites"].items():
+        print(
+            f"{site:<{width}}  {stats['strategy']:<8}  {stats['requests']:8d} {stats['p50_ms']:8.1f} "
+            f"{stats['p99_ms']:8.1f}  {stats['rows_yielded']:4d}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the crawler engines against a local replay of recorded sites",
+        epilog="""
+Examples:
+  python benchmarks/bench_crawl.py
+  python benchmarks/bench_crawl.py --sites 30 --latency 0.05 --jitter 0.03
+  python benchmarks/bench_crawl.py benchmarks/recordings/live --strategy bs4 --json before.json
+        """,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("recording", nargs="?", type=Path, help="Recording directory. Defaults to a synthetic one")
+    parser.add_argument("--sites", type=int, default=10, help="Sites per strategy of the synthetic recording")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds every response is delayed by")
+    parser.add_argument("--jitter", type=float, default=0.01, help="Maximum deviation from --latency, in seconds")
+    parser.add_argument("--strategy", action="append", choices=STRATEGIES, help="Strategies to run (repeatable)")
+    parser.add_argument("--port", type=int, default=8900, help="Port of the replay server")
+    parser.add_argument("--batch-size", type=int, default=None, help="Ingest micro-batch size")
+    parser.add_argument(
+        "--max-concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY, help="Global cap on requests in flight"
+    )
+    parser.add_argument("--keep-throttle", action="store_true", help="Keep the rate limits of the recorded configs")
+    parser.add_argument("--single-host", action="store_true", help="Serve every site from 127.0.0.1")
+    parser.add_argument("--json", type=Path, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-crawl-") as tmp:
+        work_dir = Path(tmp)
+        if args.recording:
+            recording = Recording.load(args.recording)
+        else:
+            recording = record_synthetic(work_dir / "recording", sites=args.sites)
+        origins = loopback_origins(recording.hosts(), args.port, args.single_host)
+        configs = local_configs(recording, origins, args.keep_throttle)
+
+        ctx = multiprocessing.get_context("spawn")
+        ready, stop = ctx.Queue(), ctx.Event()
+        server = ctx.Process(
+            target=serve,
+            args=(str(recording.path), args.port, args.latency, args.jitter, args.single_host, ready, stop),
+            name="replay-server",
+        )
+        server.start()
+        try:
+            error = ready.get(timeout=SERVER_START_TIMEOUT)
+            if error:
+                sys.exit(f"The replay server could not start: {error}. Try --single-host or another --port.")
+
+            overrides = {"batch_size": args.batch_size} if args.batch_size else {}
+            strategies = args.strategy or list(STRATEGIES)
+            elapsed, reports = asyncio.run(
+                run_engines(configs, work_dir, strategies, overrides, args.max_concurrency)
+            )
+        finally:
+            stop.set()
+            server.join()
+
+    result = summarize(elapsed, reports, origins)
+    result["settings"] = {
+        "recording": str(args.recording or f"synthetic, {args.sites} sites per strategy"),
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "strategies": strategies,
+    }
+    print_summary(result)
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
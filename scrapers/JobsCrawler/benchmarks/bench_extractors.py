@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the detail-page extraction backends over the pages saved in ``debug_html/``.
+
+For every page the selectors of the matching bs4 config (by site name) are
+extracted with each backend in ``EXTRACTION_BACKENDS``. Results are compared
+with the full ``html.parser`` DOM (the ``bs4`` backend) after collapsing
+whitespace.
+
+Usage:
+    python benchmarks/bench_extractors.py [--repeat N] [--selector CSS ...] [--pages DIR]
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from functools import partial
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from src.utils.parsing import EXTRACTION_BACKENDS, select_texts  # noqa: E402
+
+BS4_CONFIGS = ROOT / "src" / "resources" / "bs4_resources" / "bs4_main.json"
+FALLBACK_SELECTORS = ("title",)
+
+
+def site_key(name: str) -> str:
+    """File-name prefix ``_save_debug_html`` uses for a config name."""
+    return name.replace("https://", "").replace("/", "_").replace(":", "")
+
+
+def selectors_by_site() -> dict[str, tuple[str, ...]]:
+    with open(BS4_CONFIGS) as f:
+        configs = json.load(f)
+
+    selectors = {}
+    for config in configs:
+        paths = config.get("elements_path", {})
+        selectors[site_key(config["name"])] = tuple(
+            paths[key] for key in ("jobs_path", "title_path", "location_path") if paths.get(key)
+        )
+    return selectors
+
+
+def normalize(texts: list[str | None]) -> list[str | None]:
+    return [" ".join(text.split()) if text is not None else None for text in texts]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the detail-page extraction backends")
+    parser.add_argument("--pages", default=str(ROOT / "debug_html"), help="Directory of saved HTML pages")
+    parser.add_argument("--selector", action="append", help="CSS selector to extract (repeatable)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per page and backend (best is kept)")
+    args = parser.parse_args()
+
+    pages = sorted(Path(args.pages).glob("*.html"))
+    if not pages:
+        sys.exit(f"No .html pages found in {args.pages}")
+
+    site_selectors = selectors_by_site()
+    totals = {backend: 0.0 for backend in EXTRACTION_BACKENDS}
+    mismatches = {backend: 0 for backend in EXTRACTION_BACKENDS}
+
+    for page in pages:
+        html = page.read_text(encoding="utf-8", errors="replace")
+        site = page.stem.rsplit("_page", 1)[0]
+        selectors = tuple(args.selector or site_selectors.get(site) or FALLBACK_SELECTORS)
+
+        expected = normalize(select_texts(html, selectors, backend="bs4"))
+        print(f"{page.name} ({len(html) / 1024:.0f} KB, {len(selectors)} selectors)")
+
+        for backend in EXTRACTION_BACKENDS:
+            elapsed = min(
+                timeit.repeat(
+                    partial(select_texts, html, selectors, backend=backend),
+                    number=1,
+                    repeat=args.repeat,
+                )
+            )
+            same = normalize(select_texts(html, selectors, backend=backend)) == expected
+            totals[backend] += elapsed
+            mismatches[backend] += not same
+            print(f"  {backend:<11}: {elapsed * 1e3:8.2f} ms  {'ok' if same else 'DIFFERS'}")
+
+    print(f"\npages: {len(pages)}")
+    for backend, total in totals.items():
+        print(
+            f"{backend:<11}: {total * 1e3 / len(pages):8.2f} ms/page  "
+            f"speedup {totals['bs4'] / total:5.2f}x  mismatches {mismatches[backend]}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Record the pages a crawl fetches, for ``bench_crawl.py`` to replay offline.
+
+``live`` fetches the listings, feeds and API payloads of the enabled configs
+(or of the configs named with --name), extracts their jobs the way the
+crawlers do and fetches the detail pages they would follow. With
+--from-debug-html, BS4 listings are taken from the pages ``async_bs4_crawl``
+saved in ``debug_html/`` instead of being fetched.
+
+``synthetic`` generates sites shaped like the real ones, so the benchmark runs
+without any network access.
+
+Usage:
+    python benchmarks/record_pages.py live OUT_DIR [--name NAME ...] [--max-details N] [--from-debug-html]
+    python benchmarks/record_pages.py synthetic OUT_DIR [--sites N] [--pages N] [--jobs N]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+from pathlib import Path
+from typing import Any
+
+import aiohttp
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from benchmarks.replay import STRATEGIES, Recording  # noqa: E402
+from src.constants import USER_AGENTS  # noqa: E402
+from src.utils.parsing import extract_container_listing, extract_feed_entries, extract_main_listing  # noqa: E402
+
+RESOURCES = ROOT / "src" / "resources"
+CONFIG_FILES = {
+    "bs4": RESOURCES / "bs4_resources" / "bs4_main.json",
+    "api": RESOURCES / "api_resources" / "api_main.json",
+    "rss": RESOURCES / "rss_resources" / "rss_main.json",
+}
+LISTING_EXTRACTORS = {"main": extract_main_listing, "container": extract_container_listing}
+
+WORDS = [
+    "python", "backend", "platform", "team", "remote", "data", "services", "scale", "api", "distributed", "cloud",
+    "product", "customers", "engineering", "build", "ship", "reliable", "systems", "async", "postgres", "kubernetes",
+    "observability", "growth", "mission",
+]
+TITLES = ("Backend Engineer", "Python Developer", "Data Engineer", "Platform Engineer", "Site Reliability Engineer")
+LOCATIONS = ("Remote", "Remote (Europe)", "Worldwide", "USA Only", "Berlin, Germany", "Remote - UK", "LATAM")
+
+
+def site_key(name: str) -> str:
+    """File-name prefix ``_save_debug_html`` uses for a config name."""
+    return name.replace("https://", "").replace("/", "_").replace(":", "")
+
+
+############################# LIVE RECORDING #############################
+
+
+class Recorder:
+    def __init__(self, recording: Recording, session: aiohttp.ClientSession, concurrency: int) -> None:
+        self.recording = recording
+        self.session = session
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(self, url: str) -> bytes | None:
+        """Record the response of ``url`` and return its body, or None if it failed."""
+        if url in self.recording.responses:
+            return (self.recording.path / self.recording.responses[url]["file"]).read_bytes()
+        async with self.semaphore:
+            try:
+                async with self.session.get(url, headers={"User-Agent": random.choice(USER_AGENTS)}) as response:
+                    body = await response.read()
+                    content_type = response.headers.get("Content-Type", "application/octet-stream")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:  # noqa: UP041
+                print(f"  failed {url}: {type(e).__name__}: {e}", file=sys.stderr)
+                return None
+        self.recording.add(url, body, response.status, content_type)
+        return body if response.status == 200 else None
+
+    async def follow(self, links: list[str], max_details: int) -> None:
+        await asyncio.gather(*(self.fetch(link) for link in links[:max_details]))
+
+
+async def record_bs4(recorder: Recorder, config: dict[str, Any], max_details: int, debug_html: Path | None) -> None:
+    extract = LISTING_EXTRACTORS[config["strategy"]]
+    for page in range(config["start_point"], config["pages_to_crawl"] + 1):
+        url = config["url"] + str(page)
+        saved = debug_html / f"{site_key(config['name'])}_page{page}.html" if debug_html else None
+        if saved and saved.exists():
+            body = saved.read_bytes()
+            recorder.recording.add(url, body, content_type="text/html; charset=utf-8")
+        else:
+            body = await recorder.fetch(url)
+        if body is None:
+            return
+        try:
+            jobs = extract(body, config["elements_path"])
+        except ValueError:
+            # The crawler stops at a page without jobs too
+            return
+        if config["follow_link"] == "yes":
+            await recorder.follow([config["name"] + href for _, href, _, _ in jobs], max_details)
+
+
+async def record_api(recorder: Recorder, config: dict[str, Any], max_details: int) -> None:
+    body = await recorder.fetch(config["url"])
+    if body is None or config["follow_link"] != "yes":
+        return
+    paths = config["elements_path"]
+    data = json.loads(body)
+    jobs = data[paths["dict_tag"]] if config["class_json"] == "dict" else data
+    await recorder.follow([job[paths["link_tag"]] for job in jobs if job.get(paths["link_tag"])], max_details)
+
+
+async def record_rss(recorder: Recorder, config: dict[str, Any], max_details: int) -> None:
+    body = await recorder.fetch(config["url"])
+    if body is None or config["follow_link"] != "yes":
+        return
+    entries = extract_feed_entries(
+        body, config["title_tag"], config["link_tag"], config["description_tag"], config["location_tag"]
+    )
+    await recorder.follow([link for _, link, _, _ in entries if link and link != "NaN"], max_details)
+
+
+async def record_live(
+    out_dir: Path, names: list[str] | None, max_details: int, debug_html: Path | None, concurrency: int
+) -> Recording:
+    recording = Recording(out_dir)
+    for strategy in STRATEGIES:
+        configs = json.loads(CONFIG_FILES[strategy].read_text())
+        if names:
+            recording.configs[strategy] = [c for c in configs if c.get("name", c["url"]) in names]
+        else:
+            recording.configs[strategy] = [c for c in configs if c.get("enabled")]
+
+    recorders = {"bs4": record_bs4, "api": record_api, "rss": record_rss}
+    timeout = aiohttp.ClientTimeout(total=60)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        recorder = Recorder(recording, session, concurrency)
+        for strategy, configs in recording.configs.items():
+            for config in configs:
+                print(f"Recording {strategy} {config.get('name', config['url'])}")
+                if strategy == "bs4":
+                    await record_bs4(recorder, config, max_details, debug_html)
+                else:
+                    await recorders[strategy](recorder, config, max_details)
+
+    recording.save()
+    return recording
+
+
+############################# SYNTHETIC RECORDING #############################
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _padding(rng: random.Random, kilobytes: int) -> str:
+    """Navigation, scripts and footers the selectors have to skip, like on real pages."""
+    blocks = []
+    while sum(map(len, blocks)) < kilobytes * 1024:
+        blocks.append(f"<div class='nav-item'><a href='/x/{rng.randrange(10**6)}'>{_text(rng, 8)}</a></div>")
+    return "".join(blocks)
+
+
+def record_synthetic(out_dir: Path, sites: int = 10, pages: int = 5, jobs: int = 25, seed: int = 0) -> Recording:
+    """
+    Generate ``sites`` sites per strategy.
+
+    BS4 sites get ``pages`` listing pages of ``jobs`` jobs, and each API payload and feed
+    as many jobs. Half of the API and RSS sites follow links.
+    """
+    rng = random.Random(seed)
+    recording = Recording(out_dir)
+
+    def detail(origin: str, job: str) -> str:
+        url = f"{origin}/job/{job}"
+        body = f"<html><body>{_padding(rng, 10)}<div class='desc'><p>{_text(rng, 300)}</p></div></body></html>"
+        recording.add(url, body.encode(), content_type="text/html; charset=utf-8")
+        return url
+
+    for site in range(sites):
+        origin = f"https://bs4-{site}.example"
+        recording.configs["bs4"].append({
+            "enabled": True, "name": origin, "url": f"{origin}/jobs?page=", "pages_to_crawl": pages + 1,
+            "start_point": 1, "strategy": "main", "follow_link": "yes", "inner_link_tag": ".desc",
+            "elements_path": {
+                "jobs_path": ".job", "title_path": ".title", "link_path": "a.apply",
+                "location_path": ".location", "description_path": ".summary",
+            },
+        })
+        for page in range(1, pages + 2):
+            listed = []
+            # The page after the last one lists no job, which ends the crawl
+            for number in range(jobs if page <= pages else 0):
+                job = f"{page}-{number}"
+                detail(origin, job)
+                listed.append(
+                    f"<div class='job'><h2 class='title'>{rng.choice(TITLES)} {job}</h2>"
+                    f"<a class='apply' href='/job/{job}'>Apply</a><span class='location'>{rng.choice(LOCATIONS)}</span>"
+                    f"<p class='summary'>{_text(rng, 30)}</p></div>"
+                )
+            body = f"<html><body>{_padding(rng, 40)}<main>{''.join(listed)}</main>{_padding(rng, 10)}</body></html>"
+            recording.add(f"{origin}/jobs?page={page}", body.encode(), content_type="text/html; charset=utf-8")
+
+    for site in range(sites):
+        origin = f"https://api-{site}.example"
+        follow = site % 2 == 0
+        payload = {"jobs": [
+            {
+                "id": number, "title": f"{rng.choice(TITLES)} {number}", "description": _text(rng, 120),
+                "url": detail(origin, f"api-{number}") if follow else f"{origin}/job/api-{number}",
+                "location": rng.choice(LOCATIONS), "created_at": f"2025-01-{number % 28 + 1:02d}",
+            }
+            for number in range(pages * jobs)
+        ]}
+        recording.add(f"{origin}/api/jobs", json.dumps(payload).encode(), content_type="application/json")
+        recording.configs["api"].append({
+            "enabled": True, "name": origin, "url": f"{origin}/api/jobs", "class_json": "dict",
+            "follow_link": "yes" if follow else "no", "inner_link_tag": ".desc",
+            "elements_path": {
+                "dict_tag": "jobs", "title_tag": "title", "link_tag": "url", "description_tag": "description",
+                "pubdate_tag": "created_at", "location_tag": "location", "location_default": "NaN",
+            },
+        })
+
+    for site in range(sites):
+        origin = f"https://rss-{site}.example"
+        follow = site % 2 == 0
+        items = "".join(
+            f"<item><title>{rng.choice(TITLES)} {number}</title>"
+            f"<link>{detail(origin, f'rss-{number}') if follow else f'{origin}/job/rss-{number}'}</link>"
+            f"<description>{_text(rng, 80)}</description><location>{rng.choice(LOCATIONS)}</location></item>"
+            for number in range(jobs)
+        )
+        feed = f"<?xml version='1.0'?><rss version='2.0'><channel><title>{origin}</title>{items}</channel></rss>"
+        recording.add(f"{origin}/feed", feed.encode(), content_type="application/rss+xml")
+        recording.configs["rss"].append({
+            "enabled": True, "url": f"{origin}/feed", "title_tag": "title", "link_tag": "link",
+            "description_tag": "description", "location_tag": "location",
+            "follow_link": "yes" if follow else "no", "inner_link_tag": ".desc",
+        })
+
+    recording.save()
+    return recording
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Record crawled pages for the replay benchmark",
+        epilog="""
+Examples:
+  python benchmarks/record_pages.py live benchmarks/recordings/live
+  python benchmarks/record_pages.py live benchmarks/recordings/remotive --name https://remotive.com --max-details 20
+  python benchmarks/record_pages.py synthetic benchmarks/recordings/synthetic --sites 20
+        """,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    live = commands.add_parser("live", help="Record the enabled configs from the live sites")
+    live.add_argument("out_dir", type=Path)
+    live.add_argument("--name", action="append", help="Record this config, by name or RSS url (repeatable)")
+    live.add_argument("--max-details", type=int, default=50, help="Detail pages recorded per listing, feed or payload")
+    live.add_argument("--concurrency", type=int, default=4, help="Requests in flight")
+    live.add_argument(
+        "--from-debug-html", action="store_true", help="Take BS4 listings from debug_html/ when they were saved there"
+    )
+
+    synthetic = commands.add_parser("synthetic", help="Generate synthetic sites")
+    synthetic.add_argument("out_dir", type=Path)
+    synthetic.add_argument("--sites", type=int, default=10, help="Sites per strategy")
+    synthetic.add_argument("--pages", type=int, default=5, help="Listing pages per BS4 site")
+    synthetic.add_argument("--jobs", type=int, default=25, help="Jobs per listing page and per feed")
+    synthetic.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+    if args.command == "live":
+        debug_html = ROOT / "debug_html" if args.from_debug_html else None
+        recording = asyncio.run(record_live(args.out_dir, args.name, args.max_details, debug_html, args.concurrency))
+    else:
+        recording = record_synthetic(args.out_dir, args.sites, args.pages, args.jobs, args.seed)
+
+    configs = sum(len(configs) for configs in recording.configs.values())
+    print(f"Recorded {len(recording.responses)} responses of {configs} configs in {recording.path}")
+
+
+if __name__ == "__main__":
+    main()
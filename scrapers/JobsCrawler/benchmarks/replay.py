@@ -0,0 +1,230 @@
+"""
+Recordings of crawled sites and a local HTTP server replaying them.
+
+A recording is a directory holding the crawl configs of the recorded sites and
+every response a crawl of them needs (listings, feeds, API payloads and
+followed detail pages)::
+
+    manifest.json   {"configs": {"bs4": [...], "api": [...], "rss": [...]},
+                     "responses": {"<url>": {"status": 200, "content_type": ..., "file": ...}}}
+    responses/      one file per response body
+
+``record_pages.py`` records live sites, or generates a synthetic recording.
+
+``ReplayServer`` serves a recording from the loopback interface. Every recorded
+host gets its own address (127.0.0.2, 127.0.0.3, ...), so the per-host limits
+of the fetch scheduler apply as they would against the real sites. URLs of the
+recorded hosts are rewritten to the local addresses, in the configs and in the
+bodies served, so followed links stay local too. Every response is delayed by
+``latency`` seconds, plus or minus up to ``jitter``.
+"""
+
+import asyncio
+import json
+import random
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlparse
+
+from aiohttp import web
+from yarl import URL
+
+MANIFEST = "manifest.json"
+STRATEGIES = ("bs4", "api", "rss")
+
+
+def host_of(url: str) -> str:
+    """Host of a URL, with its port when it has one, lowercase."""
+    return urlparse(url).netloc.lower()
+
+
+@dataclass
+class Recording:
+    """
+    Crawl configs and responses of a set of sites.
+
+    Methods
+    -------
+        load(): Read a recording directory.
+        add(): Store a response body.
+        save(): Write the manifest.
+        hosts(): Every host a response was recorded for, in a stable order.
+    """
+
+    path: Path
+    configs: dict[str, list[dict[str, Any]]] = field(default_factory=lambda: {s: [] for s in STRATEGIES})
+    responses: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "Recording":
+        path = Path(path)
+        with open(path / MANIFEST, encoding="utf-8") as f:
+            manifest = json.load(f)
+        configs = {strategy: manifest["configs"].get(strategy, []) for strategy in STRATEGIES}
+        return cls(path, configs, manifest["responses"])
+
+    def add(self, url: str, body: bytes, status: int = 200, content_type: str = "text/html") -> None:
+        responses_dir = self.path / "responses"
+        responses_dir.mkdir(parents=True, exist_ok=True)
+        entry = self.responses.get(url)
+        name = entry["file"] if entry else f"responses/{len(self.responses):06d}.body"
+        (self.path / name).write_bytes(body)
+        self.responses[url] = {"status": status, "content_type": content_type, "file": name}
+
+    def save(self) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        manifest = {"configs": self.configs, "responses": self.responses}
+        with open(self.path / MANIFEST, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+    def hosts(self) -> list[str]:
+        return sorted({host_of(url) for url in self.responses})
+
+
+def loopback_origins(hosts: list[str], port: int, single_host: bool = False) -> dict[str, str]:
+    """
+    Map every recorded host to the local origin replaying it.
+
+    Addresses start at 127.0.0.2 and run through 127.255.255.254, which Linux
+    routes to the loopback interface. ``single_host`` serves every host from
+    127.0.0.1 instead, under a path named after the host, for systems that only
+    configure that address.
+    """
+    origins = {}
+    for index, host in enumerate(hosts):
+        if single_host:
+            origins[host] = f"http://127.0.0.1:{port}/{host}"
+        else:
+            number = index + 2
+            origins[host] = f"http://127.{number >> 16 & 255}.{number >> 8 & 255}.{number & 255}:{port}"
+    return origins
+
+
+def rewrite(text: str, origins: dict[str, str]) -> str:
+    """Point the URLs of the recorded hosts in ``text`` at their local origin."""
+    # Longest first, so a host is never rewritten inside a longer one
+    for host in sorted(origins, key=len, reverse=True):
+        for scheme in ("https://", "http://"):
+            text = text.replace(scheme + host, origins[host])
+    return text
+
+
+class ReplayServer:
+    """
+    aiohttp server replaying a ``Recording`` on the loopback interface.
+
+    Args:
+        recording: Recording to serve.
+        port: Port every local address listens on.
+        latency: Seconds every response is delayed by.
+        jitter: Maximum deviation from ``latency``, drawn uniformly per response.
+        single_host: Serve every host from 127.0.0.1, see ``loopback_origins``.
+        seed: Seed of the jitter draws, for repeatable runs.
+
+    Methods
+    -------
+        start(): Load the bodies and start listening.
+        stop(): Stop listening.
+    """
+
+    def __init__(
+        self,
+        recording: Recording,
+        port: int = 8900,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        single_host: bool = False,
+        seed: int = 0,
+    ) -> None:
+        self.recording = recording
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.origins = loopback_origins(recording.hosts(), port, single_host)
+        self.requests = 0
+        self.misses = 0
+        self._random = random.Random(seed)
+        self._responses: dict[tuple[str, str], tuple[int, str, bytes]] = {}
+        self._runner: web.AppRunner | None = None
+
+    def _load(self) -> None:
+        for url, entry in self.recording.responses.items():
+            body = (self.recording.path / entry["file"]).read_bytes()
+            if entry["content_type"].startswith(("text/", "application/")):
+                body = rewrite(body.decode("utf-8", errors="surrogateescape"), self.origins).encode(
+                    "utf-8", errors="surrogateescape"
+                )
+            local = URL(self.origins[host_of(url)] + URL(url).raw_path_qs)
+            self._responses[(host_of(str(local)), local.raw_path_qs)] = (entry["status"], entry["content_type"], body)
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        response = self._responses.get((request.host, request.raw_path))
+        if response is None:
+            self.misses += 1
+            return web.Response(status=404)
+        status, content_type, body = response
+        return web.Response(status=status, body=body, content_type=content_type.split(";")[0])
+
+    async def start(self) -> None:
+        self._load()
+        app = web.Application()
+        app.router.add_route("GET", "/{tail:.*}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        for address in sorted({URL(origin).host for origin in self.origins.values()}):
+            await web.TCPSite(self._runner, address, self.port).start()
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def local_configs(recording: Recording, origins: dict[str, str], keep_throttle: bool = False) -> dict[str, list[dict]]:
+    """
+    The recording's configs pointed at the replay server, all enabled.
+
+    Unless ``keep_throttle``, the configs' rate limits are lifted, so a run
+    measures the crawler rather than the politeness delays.
+    """
+    configs = json.loads(rewrite(json.dumps(recording.configs), origins))
+    for strategy_configs in configs.values():
+        for config in strategy_configs:
+            config["enabled"] = True
+            if not keep_throttle:
+                config["throttle"] = {**(config.get("throttle") or {}), "rate": 0}
+    return configs
+
+
+def serve(
+    recording_path: str, port: int, latency: float, jitter: float, single_host: bool, ready: Any, stop: Any
+) -> None:
+    """
+    Replay a recording until ``stop`` is set.
+
+    Target of the server process, so the crawler's CPU time and memory are
+    measured without the server's. ``ready`` receives None once listening, or
+    the error that prevented it.
+    """
+
+    async def run() -> None:
+        server = ReplayServer(Recording.load(recording_path), port, latency, jitter, single_host)
+        try:
+            await server.start()
+        except OSError as e:
+            ready.put(f"{type(e).__name__}: {e}")
+            return
+        ready.put(None)
+        try:
+            while not stop.is_set():
+                await asyncio.sleep(0.1)
+        finally:
+            await server.stop()
+
+    asyncio.run(run())
@@ -19,6 +19,6 @@ source "$SCRIPT_DIR/.env"
 set +a
 
 # Run the Python script and redirect its output to a log file
-poetry run python "$SCRIPT_DIR/src/main.py" >> "$SCRIPT_DIR/logs/script_output.log" 2>&1
+poetry run python "$SCRIPT_DIR/src/main.py" "$@" >> "$SCRIPT_DIR/logs/script_output.log" 2>&1
 
 echo "Finished script at $(date)" >> "$SCRIPT_DIR/logs/main_logger.log"
\ No newline at end of file
@@ -16,12 +16,13 @@ from pathlib import Path
 import aiohttp
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.utils.scheduler import CrawlSession, FetchScheduler
 from src.utils.scrape_job_page import scrape_job_metadata
 
 
 async def check_location(job_url: str) -> dict:
     async with aiohttp.ClientSession() as session:
-        metadata = await scrape_job_metadata(session, job_url)
+        metadata = await scrape_job_metadata(CrawlSession(session, FetchScheduler()), job_url)
         return {
             "status": "success",
             "url": job_url,
@@ -12,6 +12,11 @@ import sqlite3
 import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.db import JobsDatabase, job_source
+from src.db.search import FTS_TABLE, RANK, has_search_index, keywords_expression
+from src.utils.filters import JobFilter
+
 SCRIPT_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT = SCRIPT_DIR.parent
 DB_PATH = PROJECT_ROOT / "data" / "jobs.db"
@@ -24,57 +29,83 @@ def get_next_job(
     include_title_keywords: list[str] | None = None,
     include_description_keywords: list[str] | None = None,
     limit: int = 1,
+    order: str = "newest",
+    location_tag: str | None = None,
 ) -> list[dict]:
-    exclude_title_keywords = exclude_title_keywords or []
-    include_title_keywords = include_title_keywords or []
-    include_description_keywords = include_description_keywords or []
-
-    conn = sqlite3.connect(db_path)
+    # Migrates the schema first, so the source column and its index exist
+    conn = JobsDatabase(str(db_path)).connect()
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
 
     query = """
         SELECT
-            id,
-            title,
-            link,
-            description,
-            location,
-            location_tags,
-            pubdate,
-            timestamp,
-            status,
-            notes
-        FROM main_jobs
-        WHERE link LIKE ?
-          AND (status IS NULL OR status = 'new')
+            j.id,
+            j.title,
+            j.link,
+            j.description,
+            j.location,
+            j.location_tags,
+            j.pubdate,
+            j.timestamp,
+            j.status,
+            j.notes
+        FROM main_jobs j
     """
-    params = [f"%{source}%"]
-
-    for keyword in exclude_title_keywords:
-        query += " AND LOWER(title) NOT LIKE ?"
-        params.append(f"%{keyword.lower()}%")
-
-    if include_title_keywords:
-        title_conditions = " OR ".join(["LOWER(title) LIKE ?" for _ in include_title_keywords])
-        query += f" AND ({title_conditions})"
-        for keyword in include_title_keywords:
-            params.append(f"%{keyword.lower()}%")
-
-    if include_description_keywords:
-        desc_conditions = " OR ".join(["LOWER(description) LIKE ?" for _ in include_description_keywords])
-        query += f" AND ({desc_conditions})"
-        for keyword in include_description_keywords:
-            params.append(f"%{keyword.lower()}%")
-
-    query += " ORDER BY timestamp DESC LIMIT ?"
-    params.append(limit)
-
-    cursor.execute(query, params)
-    results = cursor.fetchall()
+    where = ["j.status = 'new'"]
+    params = []
+    order_by = "j.timestamp DESC"
+
+    if location_tag:
+        where.append("j.id IN (SELECT job_id FROM main_jobs_location_tags WHERE tag = ?)")
+        params.append(location_tag.upper())
+
+    if has_search_index(conn):
+        include = [
+            expression
+            for expression in (
+                keywords_expression(include_title_keywords, ["title"]),
+                keywords_expression(include_description_keywords, ["description"]),
+            )
+            if expression
+        ]
+        if include:
+            query += f" JOIN {FTS_TABLE} ON {FTS_TABLE}.rowid = j.id"
+            where.append(f"{FTS_TABLE} MATCH ?")
+            params.append(" AND ".join(f"({expression})" for expression in include))
+            if order == "relevance":
+                order_by = RANK
+
+        exclude = keywords_expression(exclude_title_keywords, ["title"])
+        if exclude:
+            where.append(f"j.id NOT IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?)")
+            params.append(exclude)
+    else:
+        # Same keyword matching as the crawlers, one row at a time
+        JobFilter(
+            exclude_title=exclude_title_keywords,
+            include_title=include_title_keywords,
+            include_description=include_description_keywords,
+        ).register(conn)
+        where.append("job_filter_accepts(j.title, j.description)")
+
+    # One seek on the (source, status, timestamp) index, already in timestamp order. A partial
+    # source like "remotive" has no exact match, and falls back to scanning the links for it
+    results = []
+    for source_clause, source_param in (("j.source = ?", job_source(source)), ("j.link LIKE ?", f"%{source}%")):
+        cursor.execute(
+            query + " WHERE " + " AND ".join([source_clause, *where]) + f" ORDER BY {order_by} LIMIT ?",
+            [source_param, *params, limit],
+        )
+        results = cursor.fetchall()
+        if results:
+            break
     conn.close()
 
-    return [dict(row) for row in results]
+    jobs = [dict(row) for row in results]
+    for job in jobs:
+        if (job["location_tags"] or "").startswith("["):
+            job["location_tags"] = json.loads(job["location_tags"])
+    return jobs
 
 
 def create_argument_parser() -> argparse.ArgumentParser:
@@ -87,14 +118,30 @@ Examples:
   python scripts/get_next_job.py --exclude-title manager --include-title senior --include-title engineer
   python scripts/get_next_job.py --include-title senior --include-desc python
   python scripts/get_next_job.py --exclude-title manager --limit 10
+  python scripts/get_next_job.py --location-tag EUROPE
         """
     )
     parser.add_argument("--limit", type=int, default=1, help="Number of jobs to retrieve")
-    parser.add_argument("--source", type=str, default="4dayweek.io", help="Filter by job source")
-    parser.add_argument("--exclude-title", type=str, action="append", default=[], help="Keywords to exclude from titles")
-    parser.add_argument("--include-title", type=str, action="append", default=[], help="Keywords in title (ANY match)")
-    parser.add_argument("--include-desc", type=str, action="append", default=[], help="Keywords in description (ANY match)")
+    parser.add_argument(
+        "--source", type=str, default="4dayweek.io",
+        help="Filter by job source: the host of the job links, or any part of the links if no host matches",
+    )
+    parser.add_argument(
+        "--exclude-title", type=str, action="append", default=[], help="Keywords to exclude from titles (at word start)"
+    )
+    parser.add_argument(
+        "--include-title", type=str, action="append", default=[], help="Keywords in title (ANY match, at word start)"
+    )
+    parser.add_argument(
+        "--include-desc", type=str, action="append", default=[],
+        help="Keywords in description (ANY match, at word start)",
+    )
+    parser.add_argument("--location-tag", type=str, default=None, help="Only jobs with this location tag (e.g. EUROPE)")
     parser.add_argument("--show-all", action="store_true", help="Show all matching jobs")
+    parser.add_argument(
+        "--order", choices=["newest", "relevance"], default="newest",
+        help="Newest first, or best keyword match first (needs --include-title or --include-desc)",
+    )
     return parser
 
 
@@ -114,7 +161,9 @@ def main():
         exclude_title_keywords=args.exclude_title,
         include_title_keywords=args.include_title,
         include_description_keywords=args.include_desc,
-        limit=limit
+        limit=limit,
+        order=args.order,
+        location_tag=args.location_tag,
     )
 
     result = {
@@ -124,7 +173,9 @@ def main():
             "source": args.source,
             "exclude_title": args.exclude_title,
             "include_title": args.include_title,
-            "include_desc": args.include_desc
+            "include_desc": args.include_desc,
+            "order": args.order,
+            "location_tag": args.location_tag
         },
         "jobs": jobs
     }
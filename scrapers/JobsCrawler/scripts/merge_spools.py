@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Merge the job spools written by sharded crawl nodes into the jobs database.
+
+Every node runs ``python src/main.py --node INDEX/COUNT --spool-dir DIR`` and
+the spools are copied to the machine holding the database. Jobs already stored
+are skipped thanks to the unique link, so merging is idempotent: a spool merged
+twice, or jobs found by two nodes, are stored once. Each spool is inserted in one
+transaction, then moved to a ``merged/`` directory next to it unless --keep is given.
+
+Usage:
+    python scripts/merge_spools.py SPOOL_OR_DIR [SPOOL_OR_DIR ...] [--db PATH] [--keep]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.crawler import INSERT_COLUMNS, insert_job_rows
+from src.db import JobsDatabase
+from src.db.spool import find_spools, read_spool, spool_table
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+DB_PATH = PROJECT_ROOT / "data" / "jobs.db"
+
+TABLES = ("main_jobs", "test")
+
+
+def merge_spools(db_path: Path, paths: list[str], keep: bool = False) -> dict:
+    spools = find_spools(paths)
+    results = []
+
+    with JobsDatabase(str(db_path)) as db:
+        cur = db.get_cursor()
+        for spool in spools:
+            table = spool_table(spool)
+            if table not in TABLES:
+                results.append({"spool": str(spool), "status": "error", "message": f"Unknown table '{table}'"})
+                continue
+
+            try:
+                rows = list(read_spool(spool, INSERT_COLUMNS))
+                inserted = insert_job_rows(rows, cur, test=table == "test")
+            except Exception as e:
+                results.append({"spool": str(spool), "status": "error", "message": str(e)})
+                continue
+
+            if not keep:
+                merged_dir = spool.parent / "merged"
+                merged_dir.mkdir(exist_ok=True)
+                spool.rename(merged_dir / spool.name)
+
+            results.append({
+                "spool": str(spool),
+                "status": "success",
+                "table": table,
+                "rows": len(rows),
+                "inserted": inserted,
+                "duplicates": len(rows) - inserted,
+            })
+
+    errors = sum(result["status"] == "error" for result in results)
+    return {
+        "status": "success" if not errors else "partial",
+        "spools": len(spools),
+        "errors": errors,
+        "inserted": sum(result.get("inserted", 0) for result in results),
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Merge crawl node spools into the jobs database",
+        epilog="""
+Examples:
+  python scripts/merge_spools.py spools/
+  python scripts/merge_spools.py node1/ node2/ node3/
+  python scripts/merge_spools.py spools/main_jobs-node2-20250102030405-1a2b3c4d-00001.jsonl --keep
+        """
+    )
+    parser.add_argument("paths", nargs="+", help="Spool files, or directories holding them")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="Database to merge into")
+    parser.add_argument("--keep", action="store_true", help="Leave merged spools in place")
+    args = parser.parse_args()
+
+    result = merge_spools(args.db, args.paths, args.keep)
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if result["status"] == "success" else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Search the whole job history by keywords, best match first.
+
+The query uses FTS5 syntax over the title, description and location columns:
+words must all be present unless joined with OR, "quoted phrases" match as a
+whole, NOT excludes, and ``title:word`` restricts a word to one column.
+
+Usage:
+    python scripts/search_jobs.py QUERY [--limit N] [--source SOURCE] [--status STATUS ...]
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.db import JobsDatabase
+from src.db.search import has_search_index, search_jobs
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+DB_PATH = PROJECT_ROOT / "data" / "jobs.db"
+
+
+def create_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Search all jobs by keywords, best match first",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python scripts/search_jobs.py python
+  python scripts/search_jobs.py "python AND title:senior NOT php"
+  python scripts/search_jobs.py '"machine learning" OR pytorch' --status new --limit 5
+  python scripts/search_jobs.py django --source remotive.com --status reviewed --status applied
+        """
+    )
+    parser.add_argument("query", type=str, help="FTS5 query")
+    parser.add_argument("--limit", type=int, default=20, help="Number of jobs to retrieve")
+    parser.add_argument("--source", type=str, default=None, help="Only jobs from this source (host of the job links)")
+    parser.add_argument("--status", type=str, action="append", default=[], help="Only jobs in this status (repeatable)")
+    return parser
+
+
+def main():
+    parser = create_argument_parser()
+    args = parser.parse_args()
+
+    if not DB_PATH.exists():
+        result = {"status": "error", "message": f"Database not found at {DB_PATH}"}
+        print(json.dumps(result, indent=2))
+        sys.exit(1)
+
+    # Connecting through JobsDatabase builds the index if the database predates it
+    with JobsDatabase(str(DB_PATH)) as db:
+        if not has_search_index(db.conn):
+            result = {"status": "error", "message": "This SQLite build has no FTS5 support"}
+            print(json.dumps(result, indent=2))
+            sys.exit(1)
+
+        try:
+            jobs = search_jobs(db.conn, args.query, source=args.source, statuses=args.status, limit=args.limit)
+        except sqlite3.OperationalError as e:
+            result = {"status": "error", "message": f"Invalid search query: {e}"}
+            print(json.dumps(result, indent=2))
+            sys.exit(1)
+
+    result = {
+        "status": "success" if jobs else "no_results",
+        "count": len(jobs),
+        "query": args.query,
+        "jobs": jobs
+    }
+
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
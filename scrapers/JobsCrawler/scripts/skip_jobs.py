@@ -5,6 +5,7 @@ Skip multiple jobs by marking them as reviewed.
 Usage:
     python scripts/skip_jobs.py --ids 348 349 350
     python scripts/skip_jobs.py --ids 348 349 --reason "Location restriction"
+    python scripts/skip_jobs.py --source remotive.com --reason "Source not relevant"
 """
 
 import argparse
@@ -13,22 +14,13 @@ import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent))
-from update_job_status import update_status_by_id, DB_PATH
+from update_job_status import update_status_by_ids, update_status_by_source, DB_PATH
 
 
 def skip_multiple_jobs(job_ids: list[int], reason: str = "Auto-skipped") -> dict:
-    results = []
-    success_count = 0
-    error_count = 0
-
-    for job_id in job_ids:
-        result = update_status_by_id(DB_PATH, job_id, "reviewed", reason)
-        results.append(result)
-
-        if result["status"] == "success":
-            success_count += 1
-        else:
-            error_count += 1
+    results = update_status_by_ids(DB_PATH, job_ids, "reviewed", reason)
+    success_count = sum(result["status"] == "success" for result in results)
+    error_count = len(job_ids) - success_count
 
     return {
         "status": "success" if error_count == 0 else "partial",
@@ -46,9 +38,12 @@ def main():
 Examples:
   python scripts/skip_jobs.py --ids 444 443 441 440
   python scripts/skip_jobs.py --ids 444 443 --reason "Non-engineering role"
+  python scripts/skip_jobs.py --source remotive.com --reason "Source not relevant"
         """
     )
-    parser.add_argument("--ids", type=int, nargs="+", required=True, help="Job IDs to skip")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--ids", type=int, nargs="+", help="Job IDs to skip")
+    target.add_argument("--source", type=str, help="Skip every new job of this source")
     parser.add_argument("--reason", type=str, default="Auto-skipped", help="Reason for skipping")
 
     args = parser.parse_args()
@@ -58,7 +53,10 @@ Examples:
         print(json.dumps(result, indent=2))
         sys.exit(1)
 
-    result = skip_multiple_jobs(args.ids, args.reason)
+    if args.source:
+        result = update_status_by_source(DB_PATH, args.source, "reviewed", args.reason)
+    else:
+        result = skip_multiple_jobs(args.ids, args.reason)
     print(json.dumps(result, indent=2))
     sys.exit(0 if result["status"] == "success" else 1)
 
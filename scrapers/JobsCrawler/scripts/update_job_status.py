@@ -14,14 +14,22 @@ import sys
 from datetime import datetime
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.db import JobsDatabase, job_source
+
 SCRIPT_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT = SCRIPT_DIR.parent
 DB_PATH = PROJECT_ROOT / "data" / "jobs.db"
 
 
+def connect(db_path: Path) -> sqlite3.Connection:
+    """Open the jobs database, migrating its schema first (e.g. the source column)."""
+    return JobsDatabase(str(db_path)).connect()
+
+
 def update_status_by_id(db_path: Path, job_id: int, status: str, notes: str = "") -> dict:
     try:
-        conn = sqlite3.connect(db_path)
+        conn = connect(db_path)
         cursor = conn.cursor()
 
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -53,7 +61,7 @@ def update_status_by_id(db_path: Path, job_id: int, status: str, notes: str = ""
 
 def update_status_by_link(db_path: Path, job_link: str, status: str, notes: str = "") -> dict:
     try:
-        conn = sqlite3.connect(db_path)
+        conn = connect(db_path)
         cursor = conn.cursor()
 
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -83,24 +91,87 @@ def update_status_by_link(db_path: Path, job_link: str, status: str, notes: str
         return {"status": "error", "message": f"Error updating job: {str(e)}"}
 
 
+def update_status_by_ids(db_path: Path, job_ids: list[int], status: str, notes: str = "") -> list[dict]:
+    """Update several jobs in one transaction, returning one result per ID."""
+    try:
+        conn = connect(db_path)
+        cursor = conn.cursor()
+
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        full_notes = f"[{timestamp}] {notes}" if notes else f"[{timestamp}] Status updated"
+
+        results = []
+        for job_id in job_ids:
+            cursor.execute("""
+                UPDATE main_jobs
+                SET status = ?, notes = ?
+                WHERE id = ?
+            """, (status, full_notes, job_id))
+
+            if cursor.rowcount == 0:
+                results.append({"status": "error", "message": f"No job found with ID: {job_id}"})
+            else:
+                results.append({"status": "success", "job_id": job_id, "new_status": status, "notes": notes})
+
+        conn.commit()
+        conn.close()
+        return results
+
+    except Exception as e:
+        return [{"status": "error", "message": f"Error updating jobs {job_ids}: {e}"}]
+
+
+def update_status_by_source(
+    db_path: Path, source: str, status: str, notes: str = "", current_status: str = "new"
+) -> dict:
+    """Update every job of a source that is in ``current_status``, via the (source, status, timestamp) index."""
+    try:
+        conn = connect(db_path)
+        cursor = conn.cursor()
+
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        full_notes = f"[{timestamp}] {notes}" if notes else f"[{timestamp}] Status updated"
+
+        cursor.execute("""
+            UPDATE main_jobs
+            SET status = ?, notes = ?
+            WHERE source = ? AND status = ?
+        """, (status, full_notes, job_source(source), current_status))
+        updated = cursor.rowcount
+
+        conn.commit()
+        conn.close()
+
+        return {
+            "status": "success",
+            "source": job_source(source),
+            "updated": updated,
+            "new_status": status,
+            "notes": notes
+        }
+
+    except Exception as e:
+        return {"status": "error", "message": f"Error updating jobs of {source}: {e}"}
+
+
 def get_job_status(db_path: Path, job_id: int | None = None, job_link: str | None = None) -> dict:
     if not job_id and not job_link:
         return {"status": "error", "message": "Must provide either job_id or job_link"}
 
     try:
-        conn = sqlite3.connect(db_path)
+        conn = connect(db_path)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
 
         if job_id:
             cursor.execute("""
-                SELECT id, title, status, notes
+                SELECT id, title, source, status, notes
                 FROM main_jobs
                 WHERE id = ?
             """, (job_id,))
         else:
             cursor.execute("""
-                SELECT id, title, status, notes
+                SELECT id, title, source, status, notes
                 FROM main_jobs
                 WHERE link = ?
             """, (job_link,))
@@ -113,6 +184,7 @@ def get_job_status(db_path: Path, job_id: int | None = None, job_link: str | Non
                 "status": "success",
                 "job_id": result['id'],
                 "title": result['title'],
+                "source": result['source'],
                 "job_status": result['status'] or 'new',
                 "notes": result['notes']
             }
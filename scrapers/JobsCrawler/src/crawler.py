@@ -2,16 +2,26 @@ import asyncio
 import json
 import os
 import random
-import re
 import sqlite3
-from typing import Any, TypedDict
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack
+from functools import partial
+from typing import Any
 
 import aiohttp
-import numpy as np
 import pandas as pd
 
 from src.constants import USER_AGENTS
+from src.db import AsyncJobsDatabase, CrawlState, DetailCache, HttpCache, JobSpool, LinkIndex, job_source
+from src.db.sqlite_wrapper import epoch_seconds, iso_date, iso_timestamp, location_tags_json
+from src.pipeline import CrawlContext, IngestPipeline
+from src.utils.json_stream import DEFAULT_CHUNK_SIZE
+from src.utils.locations import get_location_index, tag_locations
 from src.utils.logger_helper import get_custom_logger
+from src.utils.metrics import ALL_SOURCES, RunMetrics, source_scope
+from src.utils.parsing import ParseExecutor
+from src.utils.scheduler import CrawlSession, FetchScheduler
+from src.utils.sharding import config_key, shard_of
 
 logger = get_custom_logger(__name__)
 
@@ -20,19 +30,6 @@ LOCATIONS_DATA = os.path.abspath(os.path.join(DATA_DIR, "WorldLocations.json"))
 
 ############################# ADD LOCATION TAGS #############################
 
-class Countries(TypedDict):
-    country_name: str
-    locations: list[str]
-
-class WorldLocations(TypedDict):
-    continent: str
-    areas: list[str]
-    countries: list[Countries]
-
-def clean_and_split(s):
-    tags = re.findall(r"'([^']*)'", s)
-    return tags
-
 def load_json_file(file_path: str):
     with open(file_path, 'r') as file:
         return json.load(file)
@@ -41,70 +38,17 @@ def save_json_file(data: dict, file_path: str) -> None:
     with open(file_path, 'w') as file:
         json.dump(data, file, indent=4)
 
-def find_tag_in_location_data(word: str, location_data: WorldLocations) -> str:
-    word_upper = word.upper()
-    for continent, countries in location_data.items():
-        
-        if word_upper == continent.upper():
-            return word_upper
-        for zone in countries['Zones']: # type: ignore
-            if word_upper == zone:
-                return word_upper
-        for country in countries['Countries']: # type: ignore
-            for country_name, locations in country.items():
-                if word_upper == country_name or word_upper in [loc for loc in locations]:
-                    return country_name
-    return ""
-
-def get_location_tags(df: pd.DataFrame, json_file_path: str) -> pd.DataFrame:
-    """
-    Add location tags to a DataFrame using location data from a JSON file.
-
-    Args:
-        df (pd.DataFrame): Input DataFrame with a 'location' column.
-        json_file_path (str): Path to JSON file with location data.
-
-    Returns
-    -------
-        pd.DataFrame: DataFrame with added 'location_tags' column.
-
-    Processes each location entry, checking against JSON data. Combines adjacent 
-    entries if needed to match locations in the JSON file.
-    """
-    location_data = load_json_file(json_file_path)
-    result = []
-    i = 0
-    while i < len(df):
-        current_word = str(df.iloc[i]["location"])
-        current_original_index = df.loc[i, "original_index"]
-        
-        tag = find_tag_in_location_data(current_word, location_data)
-        
-        if tag:
-            result.append(tag)
-            i += 1
-        else:
-            # If no match, try to concatenate with the next word if it has the same original_index
-            if i + 1 < len(df) and df.loc[i + 1, "original_index"] == current_original_index:
-                next_word = str(df.iloc[i + 1]['location'])
-
-                compound_word = f"{current_word} {next_word}"
-
-                tag = find_tag_in_location_data(compound_word, location_data)
-                
-                if tag:
-                    result.extend([tag, tag])
-                    i += 2
-                else:
-                    result.append(np.nan)
-                    i += 1
-            else:
-                result.append(np.nan)
-                i += 1
+def http_cache_path(db_path: str, test: bool = False) -> str:
+    """Path of the HTTP cache kept next to the jobs database."""
+    return os.path.join(os.path.dirname(db_path), "http_cache_test.db" if test else "http_cache.db")
 
-    df['location_tags'] = result
-    return df
+def detail_cache_path(db_path: str) -> str:
+    """Path of the followed-pages cache kept next to the jobs database."""
+    return os.path.join(os.path.dirname(db_path), "detail_cache.db")
 
+def metrics_dir_path(db_path: str) -> str:
+    """Directory of the run reports, next to the jobs database."""
+    return os.path.join(os.path.dirname(db_path), "metrics")
 
 def add_location_tags_to_df(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -116,144 +60,139 @@ def add_location_tags_to_df(df: pd.DataFrame) -> pd.DataFrame:
 
     Returns
     -------
-        pd.DataFrame: DataFrame with added 'location_tags' column.
+        pd.DataFrame: Copy of the DataFrame with a normalized 'location' column and
+        a 'location_tags' column holding the list of tags found in each location.
 
-    Processes each location entry, checking against JSON data and combining adjacent
-    entries as needed to match locations. Adds the identified location tags to the
-    resulting DataFrame.
+    Each distinct location is tokenized and matched against the precompiled location
+    index once (longest phrase first), then the results are mapped back onto the rows.
     """
-    original_df = df.copy()
+    location_index = get_location_index(LOCATIONS_DATA)
 
-    df['original_index'] = df.index
+    locations, location_tags = tag_locations(df["location"], location_index)
 
-    df['location'] = df['location'].astype(str)
+    return df.assign(location=locations, location_tags=location_tags)
 
-    df["location"] = df["location"].str.replace(",", "", regex=False).str.replace(")", "", regex=False).str.replace("(", "", regex=False).str.replace("|", " ", regex=False)
-
-    df["location"] = df["location"].str.strip().str.split()
-    
-    df = df.explode("location").reset_index(drop=True)
-    
-    result_df = get_location_tags(df, LOCATIONS_DATA)
-
-    result_df['location'] = result_df['location'].astype(str)
-
-    result_df['location_tags'] = result_df['location_tags'].fillna('NaN')
-
-    # Group by original_index and aggregate the locations and tags
-    grouped_df = result_df.groupby('original_index').agg({
-        'location': lambda x: ' '.join(x),
-        'location_tags': lambda x: ''.join(str(x.unique()))
-    })
-
-    # Reset the index to make original_index a column again
-    grouped_df = grouped_df.reset_index()
-
-    grouped_df['location'] = grouped_df['location'].apply(lambda x: re.sub(r"[\[\]']", "", x))
-    grouped_df['location_tags'] = grouped_df['location_tags'].apply(clean_and_split)
-
-    # Sort by original_index to maintain the original order
-    grouped_df = grouped_df.sort_values('original_index')
+############################# CLASS UTILS #############################
 
-    grouped_df = grouped_df.drop('original_index', axis=1)
 
-    grouped_df = grouped_df.reset_index(drop=True)
+INSERT_COLUMNS = (
+    "title", "link", "description", "pubdate", "location", "timestamp", "location_tags", "source",
+    "published_at", "crawled_at",
+)
+
+# Columns SQLite can't bind natively (dates, pandas Timestamps, lists), stored in a fixed text format
+FORMATTED_COLUMNS = {"pubdate": iso_date, "timestamp": iso_timestamp, "location_tags": location_tags_json}
+
+# Columns derived from another one
+DERIVED_COLUMNS = {
+    # The review queue is indexed by it
+    "source": ("link", job_source),
+    # Unix seconds, for index-driven time ranges
+    "published_at": ("pubdate", epoch_seconds),
+    "crawled_at": ("timestamp", epoch_seconds),
+}
+
+
+def _df_to_insert_rows(df: pd.DataFrame) -> list[tuple[Any, ...]]:
+    """Convert the insert columns of a DataFrame into a list of parameter tuples, column by column."""
+    columns = []
+    for col in INSERT_COLUMNS:
+        if col in DERIVED_COLUMNS:
+            origin, derive = DERIVED_COLUMNS[col]
+            columns.append([derive(value) for value in df[origin].tolist()])
+            continue
+        values = df[col].tolist()
+        if col in FORMATTED_COLUMNS:
+            values = [FORMATTED_COLUMNS[col](value) for value in values]
+        columns.append(values)
+    return list(zip(*columns))
+
+
+def crawled_df_to_db(
+    df: pd.DataFrame, cur: sqlite3.Cursor | None, test: bool = False, chunk_size: int = 500
+) -> int:
+    """
+    Insert a DataFrame of crawled job data into the SQLite database.
 
-    original_df = original_df.drop('location', axis=1)
-    
-    final_df = pd.concat([original_df, grouped_df], axis=1)
-    
-    return final_df
+    Args:
+        df (pd.DataFrame): DataFrame containing the crawled job data.
+        cur (sqlite3.Cursor | None): Database cursor object.
+        test (bool, optional): Flag to use 'test' table instead of 'main_jobs'. Defaults to False.
+        chunk_size (int, optional): Rows bound per executemany call. Defaults to 500.
 
-############################# CLASS UTILS #############################
+    Returns
+    -------
+        int: Number of jobs actually inserted (duplicates are ignored).
+    """
+    logger.info(f"🔍 DEBUG crawled_df_to_db: Starting with {len(df)} rows")
+    return insert_job_rows(_df_to_insert_rows(df), cur, test, chunk_size)
 
 
-def crawled_df_to_db(df: pd.DataFrame, cur: sqlite3.Cursor | None, test: bool = False) -> None:
+def insert_job_rows(
+    rows: list[tuple[Any, ...]], cur: sqlite3.Cursor | None, test: bool = False, chunk_size: int = 500
+) -> int:
     """
-    Insert a DataFrame of crawled job data into a PostgreSQL database.
+    Insert rows of ``INSERT_COLUMNS`` values into the SQLite database.
 
     Args:
-        df (pd.DataFrame): DataFrame containing the crawled job data.
+        rows (list[tuple]): Rows as returned by ``_df_to_insert_rows`` or read from a spool.
         cur (sqlite3.Cursor | None): Database cursor object.
         test (bool, optional): Flag to use 'test' table instead of 'main_jobs'. Defaults to False.
+        chunk_size (int, optional): Rows bound per executemany call. Defaults to 500.
+
+    Returns
+    -------
+        int: Number of jobs actually inserted (duplicates are ignored).
 
-    Inserts the job data into the specified SQLite table, handling duplicate entries.
-    Logs the total count of jobs before and after the insertion, as well as the number
-    of unique jobs added.
+    Rows are inserted with chunked executemany calls inside a single transaction,
+    relying on the UNIQUE link constraint (ON CONFLICT DO NOTHING) for deduplication.
+    The number of inserted rows comes from the cursor's rowcount, so no COUNT(*)
+    scan of the table is needed for the report.
     """
-    logger.info(f"🔍 DEBUG crawled_df_to_db: Starting with {len(df)} rows")
     table = "main_jobs"
 
     if test:
         table = "test"
 
-    logger.info(f"🔍 DEBUG crawled_df_to_db: Using table '{table}'")
+    logger.info(f"🔍 DEBUG insert_job_rows: Using table '{table}'")
 
-    initial_count_query = f"""
-        SELECT COUNT(*) FROM {table}
-    """
     if not cur:
         raise ValueError("Cursor cannot be None.")
 
-    cur.execute(initial_count_query)
-    initial_count_result = cur.fetchone()
-    logger.info(f"🔍 DEBUG crawled_df_to_db: Initial count = {initial_count_result}")
-
-    jobs_added = []
-    logger.info(f"🔍 DEBUG crawled_df_to_db: Starting to insert {len(df)} rows...")
-    for idx, row in df.iterrows():
-        if idx == 0:
-            logger.info(f"🔍 DEBUG crawled_df_to_db: First row data: {dict(row)}")
-        insert_query = f"""
-            INSERT INTO {table} (title, link, description, pubdate, location, timestamp, location_tags)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT (link) DO NOTHING
-        """
-        try:
-            values = (
-                row["title"],
-                row["link"],
-                row["description"],
-                str(row["pubdate"]),  # Convert to string for SQLite
-                row["location"],
-                str(row["timestamp"]),  # Convert pandas Timestamp to string for SQLite
-                str(row["location_tags"]),  # Convert list to string for SQLite
-            )
-            cur.execute(insert_query, values)
-            affected_rows = cur.rowcount
-            if affected_rows > 0:
-                # SQLite doesn't support RETURNING, so we track manually
-                jobs_added.append(values)
-        except Exception as e:
-            logger.error(f"❌ DEBUG crawled_df_to_db: Error inserting row {idx}: {str(e)}")
-            logger.error(f"❌ DEBUG crawled_df_to_db: Row data: {dict(row)}")
-            raise
-
-    final_count_query = f"""
-        SELECT COUNT(*) FROM {table}
+    columns = ", ".join(INSERT_COLUMNS)
+    placeholders = ", ".join("?" for _ in INSERT_COLUMNS)
+    insert_query = f"""
+        INSERT INTO {table} ({columns})
+        VALUES ({placeholders})
+        ON CONFLICT (link) DO NOTHING
     """
-    cur.execute(final_count_query)
-    final_count_result = cur.fetchone()
-
-    if initial_count_result is not None:
-        initial_count = initial_count_result[0]
-    else:
-        initial_count = 0
-    jobs_added_count = len(jobs_added)
-    if final_count_result is not None:
-        final_count = final_count_result[0]
-    else:
-        final_count = 0
+
+    if rows:
+        logger.info(f"🔍 DEBUG insert_job_rows: First row data: {dict(zip(INSERT_COLUMNS, rows[0]))}")
+
+    jobs_added_count = 0
+    try:
+        for start in range(0, len(rows), chunk_size):
+            cur.executemany(insert_query, rows[start:start + chunk_size])
+            # For executemany the rowcount is the sum of rows changed by each statement
+            jobs_added_count += max(cur.rowcount, 0)
+        cur.connection.commit()
+    except Exception as e:
+        cur.connection.rollback()
+        logger.error(f"❌ DEBUG insert_job_rows: Error inserting {len(rows)} rows into {table}: {e}")
+        raise
 
     postgre_report = {
         "Table": table,
-        "Total count of jobs before crawling": initial_count,
+        "Total count of jobs crawled": len(rows),
         "Total number of unique jobs": jobs_added_count,
-        "Current total count of jobs in PostgreSQL": final_count,
+        "Total number of duplicated jobs": len(rows) - jobs_added_count,
     }
 
     logger.info(json.dumps(postgre_report))
 
+    return jobs_added_count
+
 ############################# CRAWLER CLASS  #############################
 
 
@@ -276,8 +215,25 @@ class AsyncCrawlerEngine:
         custom_crawl_func: Custom function for crawling specific to the strategy.
         custom_clean_func: Custom function for cleaning and processing the crawled data.
         db_path (str): Database file path for storing the crawled data.
-        conn (sqlite3.Connection): Database connection object.
-        cur (sqlite3.Cursor): Database cursor object.
+        db (AsyncJobsDatabase): Database the batches are written to from a writer thread,
+            so inserts never block the event loop. Engines created from args carrying the
+            same database share its writer thread.
+        link_index (LinkIndex): Links already stored in the target table, loaded once per run
+            and updated after every insert. Crawlers use it instead of querying the db.
+        scheduler (FetchScheduler): Shared scheduler every request goes through. Engines
+            created from args carrying the same scheduler share its global concurrency cap.
+        batch_size (int): Maximum number of jobs cleaned, tagged and inserted together.
+        flush_interval (float): Seconds the ingest pipeline waits for a batch to fill up.
+        node_shard (int), node_count (int): Only the enabled configs assigned to this node
+            are crawled, when the configs are split between several machines.
+        shard (int), shard_count (int): Only the configs of this node assigned to this
+            shard are crawled, so several worker processes can split the crawl.
+            Both levels use rendezvous hashing on the config's host, see ``src/utils/sharding.py``.
+        spool_dir (str | None): If set, every stored batch is also published as a spool in
+            this directory, to be merged into the central database.
+        metrics (RunMetrics): Per-source and per-stage timings and counters of the current run,
+            see ``src/utils/metrics.py``. Written to ``<metrics_dir>/<run name>.json`` when the
+            run ends, and to ``<prometheus_dir>/<run name>.prom`` if ``prometheus_dir`` is set.
 
     Methods
     -------
@@ -306,8 +262,28 @@ class AsyncCrawlerEngine:
         self.custom_crawl_func = args.custom_crawl_func
         self.custom_clean_func = args.custom_clean_func
         self.db_path = args.db_path
-        self.conn: sqlite3.Connection | None = None
-        self.cur: sqlite3.Cursor | None = None
+        # A database passed in is shared with other engines and closed by its owner
+        self.db: AsyncJobsDatabase = args.database or AsyncJobsDatabase(self.db_path)
+        self.owns_db: bool = args.database is None
+        self.link_index: LinkIndex | None = None
+        self.crawl_state: CrawlState | None = None
+        self.batch_size: int = args.batch_size
+        self.flush_interval: float = args.flush_interval
+        self.scheduler: FetchScheduler = args.scheduler or FetchScheduler(args.max_concurrency)
+        # An executor passed in is shared with other engines and shut down by its owner
+        self.parse_executor: ParseExecutor = args.parse_executor or ParseExecutor()
+        self.owns_parse_executor: bool = args.parse_executor is None
+        self.use_http_cache: bool = args.use_http_cache
+        self.use_detail_cache: bool = args.use_detail_cache
+        self.node_shard: int = args.node_shard
+        self.node_count: int = args.node_count
+        self.shard: int = args.shard
+        self.shard_count: int = args.shard_count
+        self.spool_dir: str | None = args.spool_dir
+        self.spool: JobSpool | None = None
+        self.metrics_dir: str = args.metrics_dir or metrics_dir_path(self.db_path)
+        self.prometheus_dir: str | None = args.prometheus_dir
+        self.metrics: RunMetrics | None = None
 
     async def __load_configs(self) -> list[Any]:
         with open(self.json_data_path) as f:
@@ -315,92 +291,213 @@ class AsyncCrawlerEngine:
         # Filter out disabled scrapers
         enabled_data = [item for item in data if item.get('enabled')]
         logger.info(f"Loaded {len(enabled_data)} enabled configs out of {len(data)} total")
+        if self.node_count > 1 or self.shard_count > 1:
+            enabled_data = [item for item in enabled_data if self.__in_shard(config_key(item))]
+            logger.info(
+                f"Node {self.node_shard + 1}/{self.node_count}, shard {self.shard + 1}/{self.shard_count} "
+                f"crawls {len(enabled_data)} of them"
+            )
         return [self.config(**url) for url in enabled_data]
 
+    def __in_shard(self, key: str) -> bool:
+        return (
+            shard_of(key, self.node_count, salt="node") == self.node_shard
+            and shard_of(key, self.shard_count, salt="process") == self.shard
+        )
+
+    def __run_name(self) -> str:
+        """Name of the run's reports, distinct for every strategy, table and shard."""
+        name = self.config.__name__.removesuffix("Config").lower()
+        if self.test:
+            name += "_test"
+        if self.node_count > 1:
+            name += f"_node{self.node_shard + 1}of{self.node_count}"
+        if self.shard_count > 1:
+            name += f"_shard{self.shard + 1}of{self.shard_count}"
+        return name
+
+    def __new_metrics(self) -> RunMetrics:
+        labels = {
+            "strategy": self.config.__name__.removesuffix("Config").lower(),
+            "table": "test" if self.test else "main_jobs",
+        }
+        if self.node_count > 1:
+            labels["node"] = f"{self.node_shard + 1}/{self.node_count}"
+        if self.shard_count > 1:
+            labels["shard"] = f"{self.shard + 1}/{self.shard_count}"
+        return RunMetrics(self.__run_name(), labels)
+
+    def __write_metrics(self) -> None:
+        self.metrics.finish()
+        try:
+            report_path = os.path.join(self.metrics_dir, f"{self.metrics.name}.json")
+            self.metrics.write_json(report_path)
+            logger.info(f"Wrote the run report to {report_path}")
+            if self.prometheus_dir:
+                self.metrics.write_prometheus(os.path.join(self.prometheus_dir, f"{self.metrics.name}.prom"))
+        except OSError as e:
+            logger.error(f"❌ Could not write the run report: {e}")
+
     async def __fetch(
-        self, session: aiohttp.ClientSession, config_instance: Any
-    ) -> str:
+        self, session: CrawlSession, config_instance: Any, url: str | None = None, stream: bool = False
+    ) -> str | AsyncIterator[bytes] | None:
+        """
+        Return the body of ``url``, or None if it is unchanged since the last crawl.
+
+        With ``stream=True`` the body is returned as an async iterator of chunks
+        that keeps the request open until it is exhausted or closed.
+
+        The validators of a body are only saved once the crawler marked it in
+        ``CrawlContext.extracted`` and its jobs are stored, so a run that failed
+        to store them doesn't hide them from the next.
+
+        Raises
+        ------
+            aiohttp.ClientResponseError: The answer is not a 200, even after the session's retries.
+                The error body is never handed to the crawlers as a listing.
+        """
+        url = url or config_instance.url
         random_user_agent = {"User-Agent": random.choice(USER_AGENTS)}
-        async with session.get(
-            config_instance.url, headers=random_user_agent
-        ) as response:
+        async with AsyncExitStack() as stack:
+            response = await stack.enter_async_context(
+                session.get(url, headers=random_user_agent, stream=stream, cache=True)
+            )
+            if getattr(response, "not_modified", False):
+                logger.info(f"{url} is unchanged since the last crawl. Skipping extraction.")
+                return None
             if response.status != 200:
-                logger.warning(
-                    f"Received non-200 response ({response.status}) requesting: {config_instance.url}. Skipping..."
+                raise aiohttp.ClientResponseError(
+                    response.request_info,
+                    response.history,
+                    status=response.status,
+                    message=f"Received non-200 response ({response.status}) requesting: {url}",
+                    headers=response.headers,
                 )
-                pass
             logger.debug(f"random_header: {random_user_agent}")
+            if stream:
+                return self.__iter_chunks(stack.pop_all(), response)
             return await response.text()
-    async def __gather_json_loads(self, session: aiohttp.ClientSession) -> None:
-        configs = await self.__load_configs()
-        logger.info(f"🔍 DEBUG: Loaded {len(configs)} configs for crawling")
 
-        tasks = [
-            self.custom_crawl_func(
-                lambda session, config=config: self.__fetch(session, config),
+    @staticmethod
+    async def __iter_chunks(stack: AsyncExitStack, response: aiohttp.ClientResponse) -> AsyncIterator[bytes]:
+        async with stack:
+            async for chunk in response.content.iter_chunked(DEFAULT_CHUNK_SIZE):
+                yield chunk
+
+    async def __ingest_batch(self, df: pd.DataFrame) -> int:
+        """Clean, tag and store one micro-batch of crawled jobs, returning the number of rows inserted."""
+        logger.info(f"✅ DEBUG: Ingesting a batch of {len(df)} jobs")
+        # Cleaning and tagging are CPU bound, so they run in a thread while the loop keeps fetching
+        with self.metrics.timer("clean", ALL_SOURCES):
+            df = await asyncio.to_thread(self.custom_clean_func, df)
+        with self.metrics.timer("tag", ALL_SOURCES):
+            final_df = await asyncio.to_thread(add_location_tags_to_df, df)
+        with self.metrics.timer("insert", ALL_SOURCES):
+            rows = _df_to_insert_rows(final_df)
+            # Spooled first: a node killed before the insert recrawls the batch, one killed after it would not
+            if self.spool:
+                await asyncio.to_thread(self.spool.write, rows)
+            inserted = await self.db.write(partial(insert_job_rows, rows, test=self.test))
+        self.metrics.add("rows_inserted", inserted, ALL_SOURCES)
+        self.link_index.update(final_df["link"])
+        return inserted
+
+    async def __crawl_source(self, session: CrawlSession, config: Any, ctx: CrawlContext) -> int:
+        """Crawl one config, recording its measures under its name."""
+        source = getattr(config, "name", None) or config.url
+        with source_scope(source):
+            emitted = await self.custom_crawl_func(
+                lambda session, url=None, stream=False: self.__fetch(session, config, url, stream),
                 session,
                 config,
-                self.cur,
-                self.test,
+                ctx,
             )
-            for config in configs
-        ]
-        results = await asyncio.gather(*tasks)
-        logger.info(f"🔍 DEBUG: Received {len(results)} results from crawlers")
-
-        combined_data = {
-            key: []
-            for key in [
-                "title",
-                "link",
-                "description",
-                "pubdate",
-                "location",
-                "timestamp",
-            ]
-        }
+            self.metrics.add("rows_yielded", emitted or 0)
+        return emitted
 
-        for idx, result in enumerate(results):
-            logger.info(f"🔍 DEBUG: Result {idx} keys: {list(result.keys())}, values lengths: {[(k, len(v)) for k, v in result.items()]}")
-            for key in combined_data:
-                combined_data[key].extend(result.get(key, []))
-
-        lengths = {key: len(value) for key, value in combined_data.items()}
-        logger.info(f"🔍 DEBUG: Combined data lengths: {lengths}")
-
-        if len(set(lengths.values())) == 1:
-            total_jobs = lengths.get('title', 0)
-            logger.info(f"✅ DEBUG: Data is even! Creating DataFrame with {total_jobs} jobs")
-            df = self.custom_clean_func(pd.DataFrame(combined_data))
-            logger.info(f"✅ DEBUG: After cleaning, DataFrame has {len(df)} rows")
-            final_df = add_location_tags_to_df(df)
-            logger.info(f"✅ DEBUG: After location tagging, DataFrame has {len(final_df)} rows")
-            logger.info(f"💾 DEBUG: Calling crawled_df_to_db...")
-            crawled_df_to_db(final_df, self.cur, self.test)
-            logger.info(f"✅ DEBUG: Successfully saved to database!")
+    async def __gather_json_loads(self, session: CrawlSession) -> None:
+        configs = await self.__load_configs()
+        logger.info(f"🔍 DEBUG: Loaded {len(configs)} configs for crawling")
+
+        for config in configs:
+            self.scheduler.configure_host(config.url, config.throttle)
+
+        pipeline = IngestPipeline(
+            self.__ingest_batch, batch_size=self.batch_size, flush_interval=self.flush_interval
+        )
+        pipeline.start()
+        ctx = CrawlContext(
+            link_index=self.link_index,
+            pipeline=pipeline,
+            test=self.test,
+            parser=self.parse_executor,
+            state=self.crawl_state,
+            metrics=self.metrics,
+        )
+
+        tasks = [self.__crawl_source(session, config, ctx) for config in configs]
+        try:
+            # A crawler that raises only loses its own records; the others keep streaming
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            await pipeline.close()
+
+        for config, result in zip(configs, results):
+            if isinstance(result, BaseException):
+                logger.error(f"❌ Crawler for {config.url} failed: {type(result).__name__}: {result}")
+
+        logger.info(
+            f"✅ DEBUG: {pipeline.records_emitted} jobs streamed, {pipeline.rows_stored} inserted, "
+            f"{pipeline.failed_batches} failed batches"
+        )
+
+        # Like a watermark, the validators of a page whose jobs failed to store would hide them
+        await session.save_validators(
+            url for url, source in ctx.extracted.items() if source not in pipeline.failed_sources
+        )
+
+        # A watermark past jobs that never reached the db would hide them from the next run
+        if pipeline.failed_batches:
+            logger.warning("Some batches failed to store. Keeping the previous crawl watermarks.")
         else:
-            logger.error(
-                f"❌ DEBUG: Data has uneven entries. "
-                f"Exiting to avoid data corruption. Data lengths: {lengths}"
-            )
+            await self.db.write(partial(self.crawl_state.save, test=self.test))
+
+        table_size = await self.db.count_jobs(self.test)
+        logger.info(f"✅ DEBUG: {'test' if self.test else 'main_jobs'} now holds {table_size} jobs")
 
     async def run(self) -> None:
         start_time = asyncio.get_event_loop().time()
-
-        # Import and use SQLite database wrapper
-        from src.db import JobsDatabase
+        self.metrics = self.__new_metrics()
 
         # Initialize database and ensure schema exists
-        db = JobsDatabase(self.db_path)
-        self.conn = db.connect()
-        self.cur = db.get_cursor()
+        await self.db.connect()
+        self.link_index = await self.db.read(partial(LinkIndex.from_cursor, test=self.test))
+        self.crawl_state = await self.db.read(partial(CrawlState.from_cursor, test=self.test))
 
-        async with aiohttp.ClientSession() as session:
-            await self.__gather_json_loads(session)
+        # Test runs keep their own cache so they never mark pages as seen for production runs
+        http_cache = HttpCache(http_cache_path(self.db_path, self.test)) if self.use_http_cache else None
+        # Extracted descriptions don't depend on the target table, so both kinds of run share it
+        detail_cache = DetailCache(detail_cache_path(self.db_path)) if self.use_detail_cache else None
+        if self.spool_dir:
+            self.spool = JobSpool(self.spool_dir, "test" if self.test else "main_jobs", INSERT_COLUMNS)
 
-        self.conn.commit()
-        self.cur.close()
-        self.conn.close()
+        try:
+            async with aiohttp.ClientSession() as session:
+                await self.__gather_json_loads(
+                    CrawlSession(session, self.scheduler, http_cache, detail_cache, self.metrics)
+                )
+        finally:
+            if http_cache:
+                http_cache.close()
+            if detail_cache:
+                detail_cache.close()
+            if self.spool:
+                self.spool.close()
+            if self.owns_parse_executor:
+                self.parse_executor.shutdown()
+            if self.owns_db:
+                await self.db.close()
+            self.__write_metrics()
 
         elapsed_time = asyncio.get_event_loop().time() - start_time
         logger.info(f"All crawlers finished in: {elapsed_time:.2f} seconds.")
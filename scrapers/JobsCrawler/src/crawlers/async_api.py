@@ -1,7 +1,8 @@
 #!/usr/local/bin/python3
 import json
-import sqlite3
-from collections.abc import Callable, Coroutine
+import time
+from collections.abc import AsyncIterator, Callable, Coroutine
+from contextlib import aclosing
 from dataclasses import dataclass
 from datetime import date, datetime
 from typing import Any
@@ -9,13 +10,24 @@ from typing import Any
 import aiohttp
 import pandas as pd
 
-from config import SKIP_TITLE_KEYWORDS, AUTO_SKIP_REASON
 from src.utils.FollowLink import async_follow_link, async_follow_link_echojobs
-from src.utils.handy import link_exists_in_db
+from src.db import LinkIndex
+from src.db.crawl_state import Watermark, cut_at_watermark, is_job_link
+from src.pipeline import CrawlContext, empty_rows
+from src.utils.cleaning import CLEANING_PROFILES, clean_jobs_df
+from src.utils.filters import JobFilter
+from src.utils.handy import gather_bounded
+from src.utils.json_stream import iter_json_items
 from src.utils.logger_helper import get_custom_logger
+from src.utils.metrics import RunMetrics
+from src.utils.parsing import ParseExecutor
+from src.utils.scheduler import FETCH_ERRORS
 
 logger = get_custom_logger(__name__)
 
+# Jobs filtered and emitted together when a payload is streamed
+STREAM_BATCH_SIZE = 50
+
 @dataclass
 class ApiElementPath:
     dict_tag: str
@@ -28,39 +40,7 @@ class ApiElementPath:
 
 
 def clean_postgre_api(df: pd.DataFrame) -> pd.DataFrame:
-    for col in df.columns:
-        if col == "description":
-            if not df[col].empty:  # Check if the column has any rows
-                df[col] = df[col].astype(str)  # Convert the entire column to string
-                df[col] = df[col].str.replace(
-                    r'<.*?>|[{}[\]\'",]', "", regex=True
-                )  # Remove html tags & other characters
-        elif col == "location":
-            if not df[col].empty:  # Check if the column has any rows
-                df[col] = df[col].astype(str)  # Convert the entire column to string
-                df[col] = df[col].str.replace(
-                    r'<.*?>|[{}[\]\'",]', "", regex=True
-                )  # Remove html tags & other characters
-                # df[col] = df[col].str.replace(r'[{}[\]\'",]', '', regex=True)
-                df[col] = df[col].str.replace(
-                    r"\b(\w+)\s+\1\b", r"\1", regex=True
-                )  # Removes repeated words
-                df[col] = df[col].str.replace(
-                    r"\d{4}-\d{2}-\d{2}", "", regex=True
-                )  # Remove dates in the format "YYYY-MM-DD"
-                df[col] = df[col].str.replace(
-                    r"(USD|GBP)\d+-\d+/yr", "", regex=True
-                )  # Remove USD\d+-\d+/yr or GBP\d+-\d+/yr.
-                df[col] = df[col].str.replace("[-/]", " ", regex=True)  # Remove -
-                df[col] = df[col].str.replace(
-                    r"(?<=[a-z])(?=[A-Z])", " ", regex=True
-                )  # Insert space between lowercase and uppercase letters
-                pattern = r"(?i)\bRemote Job\b|\bRemote Work\b|\bRemote Office\b|\bRemote Global\b|\bRemote with frequent travel\b"  # Define a regex patter for all outliers that use remote
-                df[col] = df[col].str.replace(pattern, "Worldwide", regex=True)
-                df[col] = df[col].replace(
-                    "(?i)^remote$", "Worldwide", regex=True
-                )  # Replace
-                df[col] = df[col].str.strip()  # Remove trailing white space
+    df = clean_jobs_df(df, CLEANING_PROFILES["api"])
 
     logger.info("Finished API crawlers. Results below ⬇︎")
 
@@ -84,125 +64,269 @@ def __class_json_strategy(data, api_config: Any) -> list | dict:
         raise ValueError("The class json is unknown.")
 
 
-async def __get_jobs_data(
-    cur,
-    jobs: dict | list,
+def __job_key(job: dict, api_config: Any) -> tuple[Any, Any]:
+    """(link, id) of an API job, used to find the watermark."""
+    element_path = ApiElementPath(**api_config.elements_path)
+    return job.get(element_path.link_tag), job.get("id")
+
+
+def __job_watermark(job: dict, api_config: Any) -> Watermark | None:
+    """Watermark pointing at an API job, or None if the job has no usable link."""
+    element_path = ApiElementPath(**api_config.elements_path)
+    link = job.get(element_path.link_tag)
+    if not is_job_link(link):
+        return None
+    pubdate = job.get(element_path.pubdate_tag)
+    job_id = job.get("id")
+    return Watermark(
+        link=link,
+        pubdate=str(pubdate) if pubdate is not None else None,
+        job_id=str(job_id) if job_id is not None else None,
+    )
+
+
+async def _resolve_descriptions(
     session: aiohttp.ClientSession,
     api_config: Any,
-    test: bool = False,
-):
-    total_jobs_data = {
-        "title": [],
-        "link": [],
-        "description": [],
-        "pubdate": [],
-        "location": [],
-        "timestamp": [],
-    }
+    candidates: list[tuple[Any, Any, Any, Any]],
+    parser: ParseExecutor,
+    metrics: RunMetrics,
+) -> list[Any]:
+    """
+    Resolve the description of every candidate job, following links concurrently.
 
+    Results keep the order of ``candidates``; a failed follow falls back to the
+    description found in the API payload. Each follow is timed as ``follow_link``.
+    """
+    if api_config.follow_link != "yes":
+        return [default for _, _, default, _ in candidates]
+
+    if api_config.name == "echojobs.io":
+        follows = (
+            async_follow_link_echojobs(
+                session=session,
+                url_to_follow=link,
+                selector=api_config.inner_link_tag,
+                default=default,
+                parser=parser,
+            )
+            for _, link, default, _ in candidates
+        )
+    else:
+        follows = (
+            async_follow_link(
+                session=session,
+                followed_link=link,
+                description_final="",
+                inner_link_tag=api_config.inner_link_tag,
+                default=default,
+                parser=parser,
+            )
+            for _, link, default, _ in candidates
+        )
+
+    return await gather_bounded(
+        (metrics.timed("follow_link", follow) for follow in follows), api_config.follow_link_concurrency
+    )
+
+
+def __job_candidate(
+    link_index: LinkIndex, job: dict, api_config: Any, job_filter: JobFilter
+) -> tuple[Any, Any, Any, Any] | None:
+    """(title, link, default description, location) of a job to crawl, or None if it is filtered out or known."""
     element_path = ApiElementPath(**api_config.elements_path)
 
-    for job in jobs:
-        # Apply filters if configured
-        if api_config.filters:
-            # Check is_remote filter
-            if "is_remote" in api_config.filters:
-                if job.get("is_remote") != api_config.filters["is_remote"]:
-                    continue
+    # Check is_remote filter
+    filters = api_config.filters or {}
+    if "is_remote" in filters and job.get("is_remote") != filters["is_remote"]:
+        return None
 
-            # Check description_contains filter (case-insensitive)
-            if "description_contains" in api_config.filters:
-                description_text = str(job.get(element_path.description_tag, "")).lower()
-                search_term = api_config.filters["description_contains"].lower()
-                if search_term not in description_text:
-                    continue
+    title_element = job.get(element_path.title_tag, "NaN")
+    default = job.get(element_path.description_tag, "NaN")
 
-        title_element = job.get(element_path.title_tag, "NaN")
+    reason = job_filter.rejection(title_element, default)
+    if reason:
+        logger.info(f"Auto-skipping job: {title_element} - {reason}")
+        return None
 
-        title_lower = str(title_element).lower()
-        should_skip = any(keyword.lower() in title_lower for keyword in SKIP_TITLE_KEYWORDS)
+    link = job.get(element_path.link_tag, "NaN")
 
-        if should_skip:
-            logger.info(f"Auto-skipping job: {title_element} - matches excluded keyword")
-            continue
+    if link in link_index:
+        logger.debug(
+            f"Link {link} already found in the db. Skipping..."
+        )
+        return None
 
-        link = job.get(element_path.link_tag, "NaN")
+    location = (
+        job.get(element_path.location_tag, "NaN") or element_path.location_default
+    )
 
-        if await link_exists_in_db(
-            link=link, cur=cur, test=test
-        ):
-            logger.debug(
-                f"Link {element_path.link_tag} already found in the db. Skipping..."
-            )
-            continue
-
-        default = job.get(element_path.description_tag, "NaN")
-        description = ""
-        if api_config.follow_link == "yes":
-            if api_config.name == "echojobs.io":
-                description = await async_follow_link_echojobs(
-                    session=session,
-                    url_to_follow=link,
-                    selector=api_config.inner_link_tag,
-                    default=default,
-                )
-            else:
-                description = await async_follow_link(
-                    session=session,
-                    followed_link=link,
-                    description_final=description,
-                    inner_link_tag=api_config.inner_link_tag,
-                    default=default,
-                )
-        else:
-            description = default
+    return title_element, link, default, location
 
-        today = date.today()
 
-        location = (
-            job.get(element_path.location_tag, "NaN") or element_path.location_default
-        )
+async def __candidates_to_rows(
+    session: aiohttp.ClientSession,
+    api_config: Any,
+    candidates: list[tuple[Any, Any, Any, Any]],
+    parser: ParseExecutor,
+    metrics: RunMetrics,
+):
+    total_jobs_data = empty_rows()
+
+    descriptions = await _resolve_descriptions(session, api_config, candidates, parser, metrics)
+
+    for (title, link, _, location), description in zip(candidates, descriptions):
+        today = date.today()
 
         timestamp = datetime.now()
 
         for key, value in zip(
             total_jobs_data.keys(),
-            [title_element, link, description, today, location, timestamp],
+            [title, link, description, today, location, timestamp],
         ):
             total_jobs_data[key].append(value)
 
     return total_jobs_data
 
 
+async def __get_jobs_data(
+    link_index: LinkIndex,
+    jobs: dict | list,
+    session: aiohttp.ClientSession,
+    api_config: Any,
+    parser: ParseExecutor,
+    job_filter: JobFilter,
+    metrics: RunMetrics,
+):
+    with metrics.timer("dedup"):
+        candidates = [
+            candidate
+            for job in jobs
+            if (candidate := __job_candidate(link_index, job, api_config, job_filter)) is not None
+        ]
+    return await __candidates_to_rows(session, api_config, candidates, parser, metrics)
+
+
+def __stream_dict_tag(api_config: Any) -> str:
+    """Key holding the jobs of a streamed payload, empty when the payload is a list."""
+    if api_config.class_json == "dict":
+        return ApiElementPath(**api_config.elements_path).dict_tag
+    elif api_config.class_json == "list":
+        return ""
+    else:
+        raise ValueError("The class json is unknown.")
+
+
+async def __stream_jobs(
+    chunks: AsyncIterator[bytes],
+    dict_tag: str,
+    session: aiohttp.ClientSession,
+    api_config: Any,
+    ctx: CrawlContext,
+    watermark: Watermark | None,
+    job_filter: JobFilter,
+) -> tuple[int, Watermark | None]:
+    """
+    Filter and emit the jobs of a streamed payload as they are decoded.
+
+    Returns
+    -------
+        The number of jobs emitted and the watermark of the first job, if any
+    """
+    emitted = 0
+    head = None
+    seen = 0
+    candidates = []
+    # Summed over the payload and recorded once, like the dedup of a whole page
+    dedup_seconds = 0.0
+    async with (
+        aclosing(chunks),
+        aclosing(iter_json_items(chunks, dict_tag)) as items,
+        aclosing(ctx.metrics.timed_iter("parse", items)) as jobs,
+    ):
+        async for job in jobs:
+            started = time.perf_counter()
+            if head is None:
+                # The first job with a usable link, a broken one would cut the next crawl short
+                head = __job_watermark(job, api_config)
+            if watermark is not None and watermark.matches(*__job_key(job, api_config)):
+                logger.info(f"Reached the watermark of {api_config.name} after {seen} jobs")
+                break
+            seen += 1
+
+            candidate = __job_candidate(ctx.link_index, job, api_config, job_filter)
+            if candidate is not None:
+                candidates.append(candidate)
+            dedup_seconds += time.perf_counter() - started
+
+            # Followed links are resolved once the body is read, the API would not keep the response open that long
+            if len(candidates) >= STREAM_BATCH_SIZE and api_config.follow_link != "yes":
+                new_rows = await __candidates_to_rows(session, api_config, candidates, ctx.parser, ctx.metrics)
+                emitted += await ctx.pipeline.emit(new_rows, source=api_config.name)
+                candidates = []
+    ctx.metrics.observe("dedup", dedup_seconds)
+
+    if candidates:
+        new_rows = await __candidates_to_rows(session, api_config, candidates, ctx.parser, ctx.metrics)
+        emitted += await ctx.pipeline.emit(new_rows, source=api_config.name)
+    return emitted, head
+
+
 async def async_api_requests(
-    fetch_func: Callable[[aiohttp.ClientSession], Coroutine[Any, Any, str]],
+    fetch_func: Callable[..., Coroutine[Any, Any, str | AsyncIterator[bytes] | None]],
     session: aiohttp.ClientSession,
     api_config: Any,
-    cur: sqlite3.Cursor,
-    test: bool = False,
-) -> dict[str, list[str]]:
-    rows = {
-        key: []
-        for key in ["title", "link", "description", "pubdate", "location", "timestamp"]
-    }
+    ctx: CrawlContext,
+) -> int:
+    emitted = 0
 
     logger.info(f"{api_config.name} has started")
     logger.debug(f"All parameters for {api_config.name}:\n{api_config}")
 
     try:
-        response = await fetch_func(session)
+        watermark = ctx.state.get(api_config.url) if api_config.stop_at_watermark else None
+        job_filter = JobFilter.from_filters(api_config.filters)
+        # Checked before the request, an open stream must reach __stream_jobs to be released
+        dict_tag = __stream_dict_tag(api_config) if api_config.stream else None
+        response = await fetch_func(session, stream=api_config.stream)
+        if response is None:
+            return emitted
         logger.debug(f"Successful request on {api_config.url}")
-        data = json.loads(response)
+
+        if api_config.stream:
+            emitted, head = await __stream_jobs(response, dict_tag, session, api_config, ctx, watermark, job_filter)
+            if head is not None:
+                ctx.state.record(api_config.url, head)
+            ctx.extracted[api_config.url] = api_config.name
+            return emitted
+
+        with ctx.metrics.timer("parse"):
+            data = json.loads(response)
         jobs = __class_json_strategy(data, api_config)
 
-        new_rows = await __get_jobs_data(cur, jobs, session, api_config, test)
-        if new_rows:
-            for key in rows:
-                rows[key].extend(new_rows.get(key, []))
+        new_jobs = jobs
+        if isinstance(jobs, list):
+            new_jobs, reached_watermark = cut_at_watermark(jobs, watermark, key=lambda job: __job_key(job, api_config))
+            if reached_watermark:
+                logger.info(f"Reached the watermark of {api_config.name} after {len(new_jobs)} jobs")
+
+        new_rows = await __get_jobs_data(
+            ctx.link_index, new_jobs, session, api_config, ctx.parser, job_filter, ctx.metrics
+        )
+        if new_rows["link"]:
+            emitted += await ctx.pipeline.emit(new_rows, source=api_config.name)
+        ctx.extracted[api_config.url] = api_config.name
+
+        if isinstance(jobs, list):
+            head = next(filter(None, (__job_watermark(job, api_config) for job in jobs)), None)
+            if head is not None:
+                ctx.state.record(api_config.url, head)
+    except FETCH_ERRORS as e:
+        logger.warning(f"Could not fetch {api_config.url}: {type(e).__name__}: {e}")
     except Exception as e:
         logger.error(
             f"{type(e).__name__} occurred before deploying crawling strategy on {api_config.url}.\n\n{e}",
             exc_info=True,
         )
         pass
-    return rows
+    return emitted
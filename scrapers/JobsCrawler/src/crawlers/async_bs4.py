@@ -1,22 +1,35 @@
 #!/usr/local/bin/python3
 
-import sqlite3
+import asyncio
+import os
+from collections import deque
 from collections.abc import Callable, Coroutine
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from datetime import date, datetime
-from typing import Any
+from typing import Any, NamedTuple
 
 import aiohttp
-import bs4
 import pandas as pd
-from bs4 import BeautifulSoup
 
+from src.db.crawl_state import Watermark, cut_at_watermark
+from src.pipeline import CrawlContext, empty_rows
+from src.utils.cleaning import CLEANING_PROFILES, clean_jobs_df
+from src.utils.filters import JobFilter
 from src.utils.FollowLink import async_follow_link
-from src.utils.handy import link_exists_in_db
+from src.utils.handy import gather_bounded
 from src.utils.logger_helper import get_custom_logger
+from src.utils.metrics import RunMetrics
+from src.utils.parsing import ListingRow, ParseExecutor, extract_container_listing, extract_main_listing
+from src.utils.scheduler import FETCH_ERRORS, HostUnavailableError
 
 logger = get_custom_logger(__name__)
 
+# Listing pages are saved under debug_html/ unless SAVE_DEBUG_HTML=0
+SAVE_DEBUG_HTML = os.environ.get("SAVE_DEBUG_HTML", "1") != "0"
+
+# Answers to a page past the end of a listing, rather than failures
+END_OF_LISTING_STATUSES = frozenset({404, 410})
+
 @dataclass
 class Bs4ElementPath:
     """
@@ -53,330 +66,333 @@ def clean_postgre_bs4(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         Cleaned DataFrame ready for database insertion
     """
-    df = df.drop_duplicates()
-
-    for col in df.columns:
-        if col == "title" or col == "description":
-            if not df[col].empty:  # Check if the column has any rows
-                df[col] = df[col].astype(str)  # Convert the entire column to string
-                df[col] = df[col].str.replace(
-                    r'<.*?>|[{}[\]\'",]', "", regex=True
-                )  # Remove html tags & other characters
-        elif col == "location":
-            if not df[col].empty:  # Check if the column has any rows
-                df[col] = df[col].astype(str)  # Convert the entire column to string
-                df[col] = df[col].str.replace(
-                    r'<.*?>|[{}[\]\'",]', "", regex=True
-                )  # Remove html tags & other characters
-                # df[col] = df[col].str.replace(r'[{}[\]\'",]', '', regex=True)
-                df[col] = df[col].str.replace(
-                    r"\b(\w+)\s+\1\b", r"\1", regex=True
-                )  # Removes repeated words
-                df[col] = df[col].str.replace(
-                    r"\d{4}-\d{2}-\d{2}", "", regex=True
-                )  # Remove dates in the format "YYYY-MM-DD"
-                df[col] = df[col].str.replace(
-                    r"(USD|GBP)\d+-\d+/yr", "", regex=True
-                )  # Remove USD\d+-\d+/yr or GBP\d+-\d+/yr.
-                df[col] = df[col].str.replace("[-/]", " ", regex=True)  # Remove -
-                df[col] = df[col].str.replace(
-                    r"(?<=[a-z])(?=[A-Z])", " ", regex=True
-                )  # Insert space between lowercase and uppercase letters
-                pattern = r"(?i)\bRemote Job\b|\bRemote Work\b|\bRemote Office\b|\bRemote Global\b|\bRemote with frequent travel\b"  # Define a regex patter for all outliers that use remote
-                df[col] = df[col].str.replace(pattern, "Worldwide", regex=True)
-                df[col] = df[col].replace(
-                    "(?i)^remote$", "Worldwide", regex=True
-                )  # Replace
-                df[col] = df[col].str.strip()  # Remove trailing white space
+    df = clean_jobs_df(df, CLEANING_PROFILES["bs4"])
 
     logger.info("Finished bs4 crawlers. Results below ⬇︎")
 
     return df
 
-async def __async_main_strategy_bs4(
-    cur: sqlite3.Cursor,
+async def _resolve_descriptions(
     session: aiohttp.ClientSession,
     bs4_config: Any,
-    soup: bs4.BeautifulSoup,
-    test: bool = False,
-):
+    candidates: list[tuple[str, str, str, str]],
+    parser: ParseExecutor,
+    follow_default: str | None = None,
+    metrics: RunMetrics | None = None,
+) -> list[str]:
     """
-    Main strategy for extracting job listings from HTML.
-    
-    Selects individual job elements and extracts data from each one.
-    Best for pages where each job listing is a self-contained HTML element.
+    Resolve the description of every candidate job, following links concurrently.
     
     Args:
-        cur: Database cursor for checking existing links
         session: HTTP session for making requests
         bs4_config: Configuration object with crawling parameters
-        soup: BeautifulSoup object containing parsed HTML
-        test: Whether running in test mode
+        candidates: (title, link, default description, location) tuples in page order
+        parser: Executor the followed pages are parsed with
+        follow_default: Description used when a followed page has no usable
+            description. Defaults to the listing description of each candidate.
+        metrics: If given, each followed link is timed as the ``follow_link`` stage
         
     Returns:
-        Dictionary containing extracted job data
-    
-    Raises:
-        ValueError: If required elements are not found in the HTML
+        Descriptions in the same order as ``candidates``
     """
-    total_jobs_data = {
-        "title": [],
-        "link": [],
-        "description": [],
-        "pubdate": [],
-        "location": [],
-        "timestamp": [],
-    }
-
-    bs4_element_path = Bs4ElementPath(**bs4_config.elements_path)
-
-    jobs = soup.select(bs4_element_path.jobs_path)
-    if not jobs:
-        raise ValueError(
-            f"No jobs were found using this selector {bs4_element_path.jobs_path}"
+    if bs4_config.follow_link != "yes":
+        return [default for _, _, default, _ in candidates]
+
+    follows = (
+        async_follow_link(
+            session=session,
+            followed_link=link,
+            description_final="",
+            inner_link_tag=bs4_config.inner_link_tag,
+            default=default if follow_default is None else follow_default,
+            parser=parser,
         )
+        for _, link, default, _ in candidates
+    )
+    if metrics is not None:
+        follows = (metrics.timed("follow_link", follow) for follow in follows)
+    return await gather_bounded(follows, bs4_config.follow_link_concurrency)
 
-    for job in jobs:
-        title_element = job.select_one(bs4_element_path.title_path)
-        if not title_element:
-            raise ValueError(
-                f"No titles were found using this selector {bs4_element_path.title_path}"
-            )
 
-        link_element = job.select_one(bs4_element_path.link_path)
-        if not link_element:
-            raise ValueError(
-                f"No links were found using this selector {bs4_element_path.link_path}"
-            )
+# Strategy -> (extraction function, description used when a followed page has none).
+# ``None`` keeps the description found on the listing page.
+STRATEGIES: dict[str, tuple[Callable[[str, dict[str, str]], list[ListingRow]], str | None]] = {
+    # Each job listing is a self-contained element
+    "main": (extract_main_listing, None),
+    # One container holds parallel collections of titles, links, descriptions and locations
+    "container": (extract_container_listing, "NaN"),
+}
 
-        link = bs4_config.name + str(link_element["href"])
-
-        if await link_exists_in_db(link=link, cur=cur, test=test):
-            logger.debug(f"Link {link} already found in the db. Skipping...")
-            continue
-
-        description_element = job.select_one(bs4_element_path.description_path)
-        description = description_element.text if description_element else "NaN"
-        if bs4_config.follow_link == "yes":
-            description = await async_follow_link(
-                session=session,
-                followed_link=link,
-                description_final="",
-                inner_link_tag=bs4_config.inner_link_tag,
-                default=description,
-            )
-
-        today = date.today()
-        location_element = job.select_one(bs4_element_path.location_path)
-        location = location_element.text if location_element else "NaN"
 
-        timestamp = datetime.now()
+class CrawledPage(NamedTuple):
+    """
+    Outcome of crawling one listing page.
+    
+    Attributes
+    ----------
+        rows: New jobs found on the page that passed the job filter
+        head_link: Link of the first job listed on the page, if any
+        reached_watermark: Whether the page lists the source's watermark job
+        new_links: Number of links on the page not in the db yet, filtered out or not
+        not_modified: Whether the page was left unparsed because it is unchanged since
+            the last crawl, which says nothing about the pages after it
+    """
 
-        for key, value in zip(
-            total_jobs_data.keys(),
-            [title_element.text, link, description, today, location, timestamp],
-        ):
-            total_jobs_data[key].append(value)
-    return total_jobs_data
+    rows: dict[str, list[Any]]
+    head_link: str | None = None
+    reached_watermark: bool = False
+    new_links: int = 0
+    not_modified: bool = False
 
 
-async def __async_container_strategy_bs4(
-    cur: sqlite3.Cursor,
+async def _crawling_strategy(
     session: aiohttp.ClientSession,
     bs4_config: Any,
-    soup: bs4.BeautifulSoup,
-    test: bool = False,
-):
+    html: str,
+    ctx: CrawlContext,
+    watermark: Watermark | None = None,
+    job_filter: JobFilter | None = None,
+) -> CrawledPage | None:
     """
-    Container strategy for extracting job listings from HTML.
+    Extracts the jobs of a listing page with the configured strategy.
     
-    Selects a single container element and then extracts collections of titles,
-    links, descriptions, and locations, then pairs them together.
-    Best for pages where job attributes are organized in parallel collections.
+    The page is parsed by the run's ``ParseExecutor``. Jobs from the watermark
+    on are dropped, links already in the db are skipped, jobs rejected by the
+    job filter are dropped and the remaining jobs have their links followed.
     
     Args:
-        cur: Database cursor for checking existing links
         session: HTTP session for making requests
-        bs4_config: Configuration object with crawling parameters
-        soup: BeautifulSoup object containing parsed HTML
-        test: Whether running in test mode
+        bs4_config: Configuration object with crawling parameters and strategy
+        html: Raw HTML of the listing page
+        ctx: Run context with the link index and the parse executor
+        watermark: Newest job seen on the last crawl, if pagination should stop at it
+        job_filter: Title and description filter of the source. Defaults to the config's ``filters``
         
     Returns:
-        Dictionary containing extracted job data
-    
+        The crawled page or None if an error occurred
+        
     Raises:
-        ValueError: If required elements are not found in the HTML
+        ValueError: If an unrecognized strategy is specified
     """
-    bs4_element_path = Bs4ElementPath(**bs4_config.elements_path)
-
-    total_data = {
-        "title": [],
-        "link": [],
-        "description": [],
-        "pubdate": [],
-        "location": [],
-        "timestamp": [],
-    }
-
-    container = soup.select_one(bs4_element_path.jobs_path)
-    if not container:
-        raise ValueError(
-            f"No elements found for 'container'. Check '{bs4_element_path.jobs_path}'"
-        )
+    strategy = STRATEGIES.get(bs4_config.strategy)
+    if not strategy:
+        raise ValueError("Unrecognized strategy.")
+    extract, follow_default = strategy
+    job_filter = job_filter or JobFilter.from_filters(bs4_config.filters)
 
-    elements = {
-        "title": container.select(bs4_element_path.title_path),
-        "link": container.select(bs4_element_path.link_path),
-        "description": container.select(bs4_element_path.description_path),
-        "location": container.select(bs4_element_path.location_path),
-    }
-
-    for key, value in elements.items():
-        if not value:
-            raise ValueError(
-                f"No elements found for '{key}'. Check 'elements_path[\"{key}_path\"]'"
+    try:
+        # Validates the selectors before they are sent to a worker
+        elements_path = asdict(Bs4ElementPath(**bs4_config.elements_path))
+        with ctx.metrics.timer("parse"):
+            listed = await ctx.parser.run(extract, html, elements_path)
+
+        with ctx.metrics.timer("dedup"):
+            jobs, reached_watermark = cut_at_watermark(
+                listed, watermark, key=lambda job: (bs4_config.name + job[1], None)
             )
 
-    job_elements = zip(*elements.values())
-
-    for (
-        title_element,
-        link_element,
-        description_element,
-        location_element,
-    ) in job_elements:
-        title = title_element.get_text(strip=True) or "NaN"
-        link = bs4_config.name + (link_element.get("href") or "NaN")
-        description_default = description_element.get_text(strip=True) or "NaN"
-        location = location_element.get_text(strip=True) or "NaN"
-        if await link_exists_in_db(link=link, cur=cur, test=test):
-            logger.debug(f"Link {link} already found in the db. Skipping...")
-            continue
-
-        description = (
-            await async_follow_link(
-                session, link, description_default, bs4_config.inner_link_tag
-            )
-            if bs4_config.follow_link == "yes"
-            else description_default
+            candidates = []
+            new_links = 0
+            for title, href, description, location in jobs:
+                link = bs4_config.name + href
+                if link in ctx.link_index:
+                    logger.debug(f"Link {link} already found in the db. Skipping...")
+                    continue
+                new_links += 1
+
+                reason = job_filter.rejection(title, description)
+                if reason:
+                    logger.info(f"Auto-skipping job: {title.strip()} - {reason}")
+                    continue
+                candidates.append((title, link, description, location))
+
+        descriptions = await _resolve_descriptions(
+            session, bs4_config, candidates, ctx.parser, follow_default, ctx.metrics
         )
-
-        now = datetime.now()
-        total_data["title"].append(title)
-        total_data["link"].append(link)
-        total_data["description"].append(description)
-        total_data["pubdate"].append(date.today())
-        total_data["location"].append(location)
-        total_data["timestamp"].append(now)
-    
-    return total_data
-
-
-async def _crawling_strategy(
+    except Exception as e:
+        logger.error(
+            f"{type(e).__name__} using {bs4_config.strategy} strategy while crawling {bs4_config.url}.\n{e}",
+            exc_info=True,
+        )
+        return None
+
+    total_jobs_data = empty_rows()
+    for (title, link, _, location), description in zip(candidates, descriptions):
+        total_jobs_data["title"].append(title)
+        total_jobs_data["link"].append(link)
+        total_jobs_data["description"].append(description)
+        total_jobs_data["pubdate"].append(date.today())
+        total_jobs_data["location"].append(location)
+        total_jobs_data["timestamp"].append(datetime.now())
+
+    head_link = bs4_config.name + listed[0][1] if listed else None
+    return CrawledPage(total_jobs_data, head_link, reached_watermark, new_links)
+
+
+def _save_debug_html(bs4_config: Any, page: int, html: str) -> None:
+    """Save a fetched listing page under ``debug_html/`` for inspection."""
+    # Get project root (assuming script is in src/crawlers/)
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(os.path.dirname(script_dir))
+    debug_dir = os.path.join(project_root, "debug_html")
+    os.makedirs(debug_dir, exist_ok=True)
+    site_name = bs4_config.name.replace("https://", "").replace("/", "_").replace(":", "")
+    html_file = os.path.join(debug_dir, f"{site_name}_page{page}.html")
+    with open(html_file, "w", encoding="utf-8") as f:
+        f.write(html)
+    logger.info(f"💾 DEBUG: Saved HTML to {html_file}")
+
+
+async def _crawl_page(
+    fetch_func: Callable[..., Coroutine[Any, Any, str | None]],
     session: aiohttp.ClientSession,
     bs4_config: Any,
-    soup: BeautifulSoup,
-    test: bool,
-    cur: sqlite3.Cursor,
-) -> dict[str, list[str]] | None:
+    page: int,
+    ctx: CrawlContext,
+    watermark: Watermark | None = None,
+    job_filter: JobFilter | None = None,
+) -> CrawledPage | None:
     """
-    Selects and executes the appropriate crawling strategy based on configuration.
-    
-    Acts as a dispatcher that routes to the correct strategy implementation
-    and handles any errors that occur during crawling.
+    Fetch one listing page and run the configured strategy on it.
     
-    Args:
-        session: HTTP session for making requests
-        bs4_config: Configuration object with crawling parameters and strategy
-        soup: BeautifulSoup object containing parsed HTML
-        test: Whether running in test mode
-        cur: Database cursor for checking existing links
-        
     Returns:
-        Dictionary containing extracted job data or None if an error occurred
-        
-    Raises:
-        ValueError: If an unrecognized strategy is specified
+        The crawled page, or None if the page could not be crawled
     """
-    strategy_map = {
-        "main": __async_main_strategy_bs4,
-        "container": __async_container_strategy_bs4,
-    }
-    func_strategy = strategy_map.get(bs4_config.strategy)
-    if not func_strategy:
-        raise ValueError("Unrecognized strategy.")
+    url = bs4_config.url + str(page)
 
     try:
-        return await func_strategy(cur, session, bs4_config, soup, test)
+        html = await fetch_func(session, url)
+        if html is None:
+            # Unchanged since the last crawl, so nothing on it is new
+            return CrawledPage(empty_rows(), not_modified=True)
+
+        # DEBUG: Save HTML to file for inspection
+        if SAVE_DEBUG_HTML:
+            _save_debug_html(bs4_config, page, html)
+
+        logger.debug(f"Crawling {url} with {bs4_config.strategy} strategy")
+        return await _crawling_strategy(session, bs4_config, html, ctx, watermark, job_filter)
+
+    except HostUnavailableError:
+        raise
+    except aiohttp.ClientResponseError as e:
+        if e.status in END_OF_LISTING_STATUSES:
+            logger.info(f"{url} answered {e.status}. Treating it as the end of the listing.")
+            return CrawledPage(empty_rows())
+        logger.warning(f"Could not fetch {url}: {e.message}")
+        return None
+    except FETCH_ERRORS as e:
+        logger.warning(f"Could not fetch {url}: {type(e).__name__}: {e}")
+        return None
     except Exception as e:
         logger.error(
-            f"{type(e).__name__} using {bs4_config.strategy} strategy while crawling {bs4_config.url}.\n{e}",
+            f"{type(e).__name__} occurred before deploying crawling strategy on {url}.\n\n{e}",
             exc_info=True,
         )
+        return None
 
 
 async def async_bs4_crawl(
-    fetch_func: Callable[[aiohttp.ClientSession], Coroutine[Any, Any, str]],
+    fetch_func: Callable[..., Coroutine[Any, Any, str | None]],
     session: aiohttp.ClientSession,
     bs4_config: Any,
-    cur: sqlite3.Cursor,
-    test: bool = False,
-) -> dict[str, list[str]]:
+    ctx: CrawlContext,
+) -> int:
     """
     Main entry point for asynchronous BeautifulSoup-based web crawling.
     
     Crawls multiple pages of a job listing website according to the provided
     configuration, extracting job details using the specified strategy.
     
+    Pages are fetched concurrently in a sliding window of ``page_concurrency``
+    pages and consumed in page order. The jobs of each page are emitted into the
+    ingest pipeline as soon as the page is consumed. As soon as a page yields no
+    new links (every job on it is already in the db), or lists the source's
+    watermark when ``stop_at_watermark`` is set, the pages still in flight are
+    cancelled and no further pages are requested.
+    
+    The first job of the first page becomes the source's new watermark, unless
+    a page failed. Once the source's host trips its circuit breaker, no further
+    pages are requested.
+    
     Args:
-        fetch_func: Function that fetches HTML content using the provided session
+        fetch_func: Function that fetches the HTML of a page URL using the provided session,
+            returning None when the page is unchanged since the last crawl
         session: HTTP session for making requests
         bs4_config: Configuration object with crawling parameters
-        cur: Database cursor for checking existing links
-        test: Whether running in test mode
+        ctx: Run context with the link index and the ingest pipeline
         
     Returns:
-        Dictionary containing all extracted job data from all crawled pages
+        Number of jobs emitted from all crawled pages
     """
-    rows = {
-        key: []
-        for key in ["title", "link", "description", "pubdate", "location", "timestamp"]
-    }
+    emitted = 0
 
     logger.info(f"{bs4_config.name} has started")
     logger.debug(f"All parameters for {bs4_config.name}:\n{bs4_config}")
 
-    for i in range(bs4_config.start_point, bs4_config.pages_to_crawl + 1):
-        url = bs4_config.url + str(i)
-
-        try:
-            html = await fetch_func(session)
-
-            # DEBUG: Save HTML to file for inspection
-            import os
-            # Get project root (assuming script is in src/crawlers/)
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            project_root = os.path.dirname(os.path.dirname(script_dir))
-            debug_dir = os.path.join(project_root, "debug_html")
-            os.makedirs(debug_dir, exist_ok=True)
-            site_name = bs4_config.name.replace("https://", "").replace("/", "_").replace(":", "")
-            html_file = os.path.join(debug_dir, f"{site_name}_page{i}.html")
-            with open(html_file, "w", encoding="utf-8") as f:
-                f.write(html)
-            logger.info(f"💾 DEBUG: Saved HTML to {html_file}")
-
-            soup = BeautifulSoup(html, "lxml")
-
-            logger.debug(f"Crawling {url} with {bs4_config.strategy} strategy")
-            new_rows = await _crawling_strategy(session, bs4_config, soup, test, cur)
-            if new_rows:
-                for key in rows:
-                    rows[key].extend(new_rows.get(key, []))
-
-        except Exception as e:
-            logger.error(
-                f"{type(e).__name__} occurred before deploying crawling strategy on {url}.\n\n{e}",
-                exc_info=True,
+    watermark = ctx.state.get(bs4_config.url) if bs4_config.stop_at_watermark else None
+    job_filter = JobFilter.from_filters(bs4_config.filters)
+    head_link: str | None = None
+    failed = False
+
+    pages = iter(range(bs4_config.start_point, bs4_config.pages_to_crawl + 1))
+    window: deque[tuple[int, asyncio.Task]] = deque()
+
+    def schedule_next() -> None:
+        page = next(pages, None)
+        if page is not None:
+            task = asyncio.ensure_future(
+                _crawl_page(fetch_func, session, bs4_config, page, ctx, watermark, job_filter)
             )
-            continue
-    return rows
+            window.append((page, task))
+
+    for _ in range(max(1, bs4_config.page_concurrency)):
+        schedule_next()
+
+    try:
+        while window:
+            page, task = window.popleft()
+            try:
+                crawled = await task
+            except HostUnavailableError as e:
+                logger.error(f"{bs4_config.name}: {e}. Stopping pagination.")
+                failed = True
+                break
+
+            if crawled is None:
+                failed = True
+                schedule_next()
+                continue
+
+            if page == bs4_config.start_point:
+                head_link = crawled.head_link
+
+            if crawled.rows["link"]:
+                emitted += await ctx.pipeline.emit(crawled.rows, source=bs4_config.name)
+            if not crawled.not_modified:
+                ctx.extracted[bs4_config.url + str(page)] = bs4_config.name
+
+            if crawled.reached_watermark:
+                logger.info(
+                    f"Reached the watermark on page {page} of {bs4_config.name}. Stopping pagination early."
+                )
+                break
+
+            # Filtered-out jobs still count, they don't mean the rest of the listing is known.
+            # An unchanged page was not parsed, so the pages after it may still hold new jobs.
+            if not crawled.new_links and not crawled.not_modified:
+                logger.info(
+                    f"No new links on page {page} of {bs4_config.name}. Stopping pagination early."
+                )
+                break
+
+            schedule_next()
+    finally:
+        for _, task in window:
+            task.cancel()
+        await asyncio.gather(*(task for _, task in window), return_exceptions=True)
+
+    if head_link and not failed:
+        ctx.state.record(bs4_config.url, Watermark(head_link))
+
+    return emitted
@@ -1,66 +1,85 @@
 #!/usr/local/bin/python3
 
-import sqlite3
 from collections.abc import Callable, Coroutine
 from datetime import date, datetime
 from typing import Any
 
 import aiohttp
-import feedparser
 import pandas as pd
-from feedparser import FeedParserDict
 
+from src.db import LinkIndex
+from src.db.crawl_state import Watermark, cut_at_watermark, is_job_link
+from src.pipeline import CrawlContext, empty_rows
+from src.utils.cleaning import CLEANING_PROFILES, clean_jobs_df
+from src.utils.filters import JobFilter
 from src.utils.FollowLink import async_follow_link
-from src.utils.handy import link_exists_in_db
+from src.utils.handy import gather_bounded
 from src.utils.logger_helper import get_custom_logger
+from src.utils.metrics import RunMetrics
+from src.utils.parsing import ParseExecutor, extract_feed_entries
+from src.utils.scheduler import FETCH_ERRORS
 
 logger = get_custom_logger(__name__)
 
-async def __async_get_feed_entries(feed: FeedParserDict,
-	cur: sqlite3.Cursor,
+async def _resolve_descriptions(
 	session: aiohttp.ClientSession,
 	rss_config: Any,
-	test: bool = False
+	candidates: list[tuple[Any, Any, Any, Any]],
+	parser: ParseExecutor,
+	metrics: RunMetrics,
+) -> list[Any]:
+	"""Resolve the description of every feed entry in order, following links concurrently."""
+	# A failed follow falls back to the description found in the feed. Each follow is timed as ``follow_link``
+	if rss_config.follow_link != 'yes':
+		return [default for _, _, default, _ in candidates]
+
+	return await gather_bounded(
+		(
+			metrics.timed("follow_link", async_follow_link(
+				session=session,
+				followed_link=link,
+				description_final="",
+				inner_link_tag=rss_config.inner_link_tag,
+				default=default,
+				parser=parser,
+			))
+			for _, link, default, _ in candidates
+		),
+		rss_config.follow_link_concurrency,
+	)
+
+
+async def __async_get_feed_entries(entries: list[tuple[Any, Any, Any, Any]],
+	link_index: LinkIndex,
+	session: aiohttp.ClientSession,
+	rss_config: Any,
+	parser: ParseExecutor,
+	job_filter: JobFilter,
+	metrics: RunMetrics,
 ):
-	total_jobs_data = {
-		"title": [],
-		"link": [],
-		"description": [],
-		"pubdate": [],
-		"location": [],
-		"timestamp": [],
-	}
+	total_jobs_data = empty_rows()
 
-	for entry in feed.entries:
+	candidates = []
+	with metrics.timer("dedup"):
+		for title, link, default, location in entries:
 
-		title = getattr(entry, rss_config.title_tag) if hasattr(entry, rss_config.location_tag) else "NaN"
-
-		link = getattr(entry, rss_config.link_tag) if hasattr(entry, rss_config.location_tag) else "NaN"
-		
-		if await link_exists_in_db(
-			link=rss_config.link_tag, cur=cur, test=test
-		):
-			logger.debug(
-				f"Link {rss_config.link_tag} already found in the db. Skipping..."
-			)
-			continue
-		
-		default = getattr(entry, rss_config.description_tag) if hasattr(entry, rss_config.location_tag) else "NaN"
-		description = ""
-		if rss_config.follow_link == 'yes':
-			description = await async_follow_link(
-					session=session,
-					followed_link=link,
-					description_final=description,
-					inner_link_tag=rss_config.inner_link_tag,
-					default=default,
+			if link in link_index:
+				logger.debug(
+					f"Link {link} already found in the db. Skipping..."
 				)
-		else:
-			description = default
-		
-		today = date.today()
+				continue
+
+			reason = job_filter.rejection(title, default)
+			if reason:
+				logger.info(f"Auto-skipping job: {title} - {reason}")
+				continue
+
+			candidates.append((title, link, default, location))
+
+	descriptions = await _resolve_descriptions(session, rss_config, candidates, parser, metrics)
 
-		location = getattr(entry, rss_config.location_tag) if hasattr(entry, rss_config.location_tag) else "NaN"
+	for (title, link, _, location), description in zip(candidates, descriptions):
+		today = date.today()
 
 		timestamp = datetime.now()
 		for key, value in zip(
@@ -73,27 +92,7 @@ async def __async_get_feed_entries(feed: FeedParserDict,
 		
 
 def clean_postgre_rss(df: pd.DataFrame) -> pd.DataFrame:
-	df = df.drop_duplicates()
-	#Cleaning columns
-	for col in df.columns:
-		if col == 'description':
-			if not df[col].empty:  # Check if the column has any rows
-				df[col] = df[col].astype(str)  # Convert the entire column to string
-				df[col] = df[col].str.replace(r'<.*?>|[{}[\]\'",]', '', regex=True) #Remove html tags & other characters
-		elif col == 'location':
-			if not df[col].empty:  # Check if the column has any rows
-				df[col] = df[col].astype(str)  # Convert the entire column to string
-				df[col] = df[col].str.replace(r'<.*?>|[{}[\]\'",]', '', regex=True) #Remove html tags & other characters
-				#df[col] = df[col].str.replace(r'[{}[\]\'",]', '', regex=True)
-				df[col] = df[col].str.replace(r'\b(\w+)\s+\1\b', r'\1', regex=True) # Removes repeated words
-				df[col] = df[col].str.replace(r'\d{4}-\d{2}-\d{2}', '', regex=True)  # Remove dates in the format "YYYY-MM-DD"
-				df[col] = df[col].str.replace(r'(USD|GBP)\d+-\d+/yr', '', regex=True)  # Remove USD\d+-\d+/yr or GBP\d+-\d+/yr.
-				df[col] = df[col].str.replace('[-/]', ' ', regex=True)  # Remove -
-				df[col] = df[col].str.replace(r'(?<=[a-z])(?=[A-Z])', ' ', regex=True)  # Insert space between lowercase and uppercase letters
-				pattern = r'(?i)\bRemote Job\b|\bRemote Work\b|\bRemote Office\b|\bRemote Global\b|\bRemote with frequent travel\b'     # Define a regex patter for all outliers that use remote 
-				df[col] = df[col].str.replace(pattern, 'Worldwide', regex=True)
-				df[col] = df[col].replace('(?i)^remote$', 'Worldwide', regex=True) # Replace 
-				df[col] = df[col].str.strip()  # Remove trailing white space
+	df = clean_jobs_df(df, CLEANING_PROFILES["rss"])
 
 	#Log it 
 	logger.info('Finished RSS Reader. Results below ⬇︎')
@@ -102,33 +101,54 @@ def clean_postgre_rss(df: pd.DataFrame) -> pd.DataFrame:
 
 
 async def async_rss_reader(
-	fetch_func: Callable[[aiohttp.ClientSession], Coroutine[Any, Any, str]],
+	fetch_func: Callable[[aiohttp.ClientSession], Coroutine[Any, Any, str | None]],
 	session: aiohttp.ClientSession,
 	rss_config: Any,
-	cur: sqlite3.Cursor,
-	test: bool = False,
-) -> dict[str, list[str]]:
-	rows = {
-		key: []
-		for key in ["title", "link", "description", "pubdate", "location", "timestamp"]
-	}
+	ctx: CrawlContext,
+) -> int:
+	emitted = 0
 
 	logger.info(f"{rss_config.url} has started")
 	logger.debug(f"All parameters for {rss_config.url}:\n{rss_config}")
 
 	try:
 		response = await fetch_func(session)
+		if response is None:
+			return emitted
 		logger.debug(f"Successful request on {rss_config.url}")
-		feed = feedparser.parse(response)
+		with ctx.metrics.timer("parse"):
+			entries = await ctx.parser.run(
+				extract_feed_entries,
+				response,
+				rss_config.title_tag,
+				rss_config.link_tag,
+				rss_config.description_tag,
+				rss_config.location_tag,
+			)
 
-		new_rows = await __async_get_feed_entries(feed, cur, session, rss_config, test)
-		if new_rows:
-			for key in rows:
-				rows[key].extend(new_rows.get(key, []))
+		watermark = ctx.state.get(rss_config.url) if rss_config.stop_at_watermark else None
+		new_entries, reached_watermark = cut_at_watermark(entries, watermark, key=lambda entry: (entry[1], None))
+		if reached_watermark:
+			logger.info(f"Reached the watermark of {rss_config.url} after {len(new_entries)} entries")
+
+		new_rows = await __async_get_feed_entries(
+			new_entries, ctx.link_index, session, rss_config, ctx.parser, JobFilter.from_filters(rss_config.filters),
+			ctx.metrics,
+		)
+		if new_rows["link"]:
+			emitted += await ctx.pipeline.emit(new_rows, source=rss_config.url)
+		ctx.extracted[rss_config.url] = rss_config.url
+
+		# The first entry with a usable link, a broken one would cut the next crawl short
+		head_link = next((entry[1] for entry in entries if is_job_link(entry[1])), None)
+		if head_link is not None:
+			ctx.state.record(rss_config.url, Watermark(head_link))
+	except FETCH_ERRORS as e:
+		logger.warning(f"Could not fetch {rss_config.url}: {type(e).__name__}: {e}")
 	except Exception as e:
 		logger.error(
 			f"{type(e).__name__} occurred before deploying crawling strategy on {rss_config.url}.\n\n{e}",
 			exc_info=True,
 		)
 		pass
-	return rows
+	return emitted
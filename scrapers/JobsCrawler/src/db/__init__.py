@@ -1,3 +1,20 @@
-from src.db.sqlite_wrapper import JobsDatabase
+from src.db.async_db import AsyncJobsDatabase, RemoteJobsDatabase
+from src.db.crawl_state import CrawlState, Watermark
+from src.db.detail_cache import DetailCache
+from src.db.http_cache import HttpCache
+from src.db.link_index import LinkIndex
+from src.db.spool import JobSpool
+from src.db.sqlite_wrapper import JobsDatabase, job_source
 
-__all__ = ["JobsDatabase"]
+__all__ = [
+    "AsyncJobsDatabase",
+    "CrawlState",
+    "DetailCache",
+    "HttpCache",
+    "JobSpool",
+    "JobsDatabase",
+    "LinkIndex",
+    "RemoteJobsDatabase",
+    "Watermark",
+    "job_source",
+]
@@ -0,0 +1,261 @@
+"""
+Non-blocking access to the jobs database from the event loop.
+
+``sqlite3`` calls block the thread they run on, so running them on the event
+loop stalls every in-flight fetch while a batch is inserted. ``AsyncJobsDatabase``
+moves them off the loop:
+
+- Writes go to a single writer thread owning the ``JobsDatabase`` connection.
+  Requests queue up in submission order, so there is one writer per process
+  and no lock contention between concurrent crawl coroutines.
+- Reads go to a small pool of read-only connections. In WAL mode they run
+  while the writer is inserting and see every committed batch.
+
+Requests are plain functions taking a cursor, e.g. ``crawled_df_to_db`` or
+``LinkIndex.from_cursor`` with their other arguments bound by ``functools.partial``.
+
+When the crawl runs in several processes (see ``src/workers.py``), every worker
+uses a ``RemoteJobsDatabase``: reads stay local, and writes are sent to the one
+process running ``serve_writes``.
+"""
+import asyncio
+import itertools
+import pickle
+import queue
+import sqlite3
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, TypeVar
+
+from src.db.sqlite_wrapper import JobsDatabase
+from src.utils.logger_helper import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_READERS = 2
+
+# Seconds a worker waits for the writer process to answer before failing the write
+WRITE_TIMEOUT = 300.0
+
+
+class AsyncJobsDatabase:
+    """
+    Awaitable facade over a ``JobsDatabase``, with a writer thread and a reader pool.
+
+    Args:
+        db_path: Path to the SQLite database file.
+        readers: Number of read-only connections.
+        wal: Use WAL journal mode, needed for reads to run alongside writes.
+
+    Methods
+    -------
+        connect(): Open the writer connection, create the schema, then open the readers.
+        write(): Run a function with a cursor on the writer connection.
+        read(): Run a function with a cursor on a read-only connection.
+        count_jobs(): Number of jobs in a table.
+        close(): Wait for pending requests and close every connection.
+    """
+
+    def __init__(self, db_path: str = "data/jobs.db", readers: int = DEFAULT_READERS, wal: bool = True) -> None:
+        self.db_path = db_path
+        self.readers = max(1, readers)
+        self.db = JobsDatabase(db_path, wal=wal)
+        self._writer: ThreadPoolExecutor | None = None
+        self._reader_pool: ThreadPoolExecutor | None = None
+        self._reader_conns: queue.SimpleQueue[sqlite3.Connection] = queue.SimpleQueue()
+        # Engines sharing the database all call connect(); only the first one opens it
+        self._connect_lock = asyncio.Lock()
+
+    async def connect(self) -> "AsyncJobsDatabase":
+        async with self._connect_lock:
+            if self._writer is None:
+                await self._open()
+        return self
+
+    async def _open(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        # One worker, so every write runs on the thread that opened the connection
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jobs-db-writer")
+        await loop.run_in_executor(self._writer, self._connect_writer)
+
+        self._reader_pool = ThreadPoolExecutor(max_workers=self.readers, thread_name_prefix="jobs-db-reader")
+        for _ in range(self.readers):
+            self._reader_conns.put(self._open_reader())
+
+        logger.info(f"Opened {self.db_path} with a writer thread and {self.readers} readers")
+
+    def _connect_writer(self) -> None:
+        self.db.connect()
+
+    def _open_reader(self) -> sqlite3.Connection:
+        # Pooled connections move between reader threads, one request at a time
+        conn = sqlite3.connect(
+            f"{Path(self.db_path).resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False
+        )
+        conn.execute("PRAGMA busy_timeout = 5000")
+        return conn
+
+    def _write(self, func: Callable[[sqlite3.Cursor], T]) -> T:
+        cur = self.db.get_cursor()
+        try:
+            return func(cur)
+        finally:
+            cur.close()
+
+    def _read(self, func: Callable[[sqlite3.Cursor], T]) -> T:
+        conn = self._reader_conns.get()
+        cur = conn.cursor()
+        try:
+            return func(cur)
+        finally:
+            cur.close()
+            self._reader_conns.put(conn)
+
+    async def write(self, func: Callable[[sqlite3.Cursor], T]) -> T:
+        """
+        Run ``func(cursor)`` on the writer thread and return its result.
+
+        ``func`` is responsible for committing, like ``crawled_df_to_db``.
+
+        Raises
+        ------
+            ValueError: If the database is not connected
+        """
+        if self._writer is None:
+            raise ValueError("Database connection not established. Call connect() first.")
+        return await asyncio.get_running_loop().run_in_executor(self._writer, self._write, func)
+
+    async def read(self, func: Callable[[sqlite3.Cursor], T]) -> T:
+        """
+        Run ``func(cursor)`` on a read-only connection and return its result.
+
+        Raises
+        ------
+            ValueError: If the database is not connected
+            sqlite3.OperationalError: If ``func`` tries to write
+        """
+        if self._reader_pool is None:
+            raise ValueError("Database connection not established. Call connect() first.")
+        return await asyncio.get_running_loop().run_in_executor(self._reader_pool, self._read, func)
+
+    async def count_jobs(self, test: bool = False) -> int:
+        table = "test" if test else "main_jobs"
+
+        def count(cur: sqlite3.Cursor) -> int:
+            cur.execute(f"SELECT COUNT(*) FROM {table}")
+            return cur.fetchone()[0]
+
+        return await self.read(count)
+
+    async def close(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._reader_pool is not None:
+            await loop.run_in_executor(None, self._reader_pool.shutdown)
+            self._reader_pool = None
+            while not self._reader_conns.empty():
+                self._reader_conns.get().close()
+        if self._writer is not None:
+            # Queued after every pending write, so they all complete first
+            await loop.run_in_executor(self._writer, self.db.close)
+            await loop.run_in_executor(None, self._writer.shutdown)
+            self._writer = None
+
+    async def __aenter__(self) -> "AsyncJobsDatabase":
+        return await self.connect()
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
+
+
+class RemoteJobsDatabase(AsyncJobsDatabase):
+    """
+    ``AsyncJobsDatabase`` of a worker process, whose writes run in the writer process.
+
+    Reads use local read-only connections, so the schema must exist before the
+    worker connects. Each write is sent to ``requests`` with the worker id, a
+    request id and its pickled function, and the worker waits for the reply on
+    ``replies``. Replies carry the request id back, so the late reply of a
+    write that timed out is discarded instead of answering the next one.
+
+    Args:
+        db_path: Path to the SQLite database file.
+        requests: Queue read by ``serve_writes``, shared by every worker.
+        replies: Queue ``serve_writes`` answers this worker on.
+        worker_id: Index of ``replies`` in the queues given to ``serve_writes``.
+        readers: Number of read-only connections.
+    """
+
+    def __init__(
+        self, db_path: str, requests: Any, replies: Any, worker_id: int, readers: int = DEFAULT_READERS
+    ) -> None:
+        super().__init__(db_path, readers=readers)
+        self.requests = requests
+        self.replies = replies
+        self.worker_id = worker_id
+        self._request_ids = itertools.count()
+
+    def _connect_writer(self) -> None:
+        # The writer process owns the write connection and the schema
+        pass
+
+    def _write(self, func: Callable[[sqlite3.Cursor], T]) -> T:
+        request_id = next(self._request_ids)
+        self.requests.put((self.worker_id, request_id, func))
+        deadline = time.monotonic() + WRITE_TIMEOUT
+        while True:
+            try:
+                reply_id, ok, value = self.replies.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                raise TimeoutError(f"The writer process did not answer within {WRITE_TIMEOUT:.0f}s") from None
+            if reply_id == request_id:
+                break
+            logger.warning(f"Discarding the late reply to write request {reply_id} of worker {self.worker_id}")
+        if not ok:
+            raise value
+        return value
+
+
+def _picklable_error(error: Exception) -> Exception:
+    try:
+        pickle.dumps(error)
+        return error
+    except Exception:
+        return RuntimeError(f"{type(error).__name__}: {error}")
+
+
+def serve_writes(db_path: str, requests: Any, replies: Sequence[Any]) -> None:
+    """
+    Run the write requests of every worker on one connection until None is received.
+
+    Target of the writer process. A failed request is rolled back and its
+    exception sent back to the worker that made it.
+
+    Args:
+        db_path: Path to the SQLite database file.
+        requests: Queue of ``(worker_id, request_id, func)`` requests, answered with ``(request_id, ok, value)``.
+        replies: One queue per worker, indexed by worker id.
+    """
+    db = JobsDatabase(db_path)
+    db.connect()
+    served = 0
+    try:
+        while (request := requests.get()) is not None:
+            worker_id, request_id, func = request
+            cur = db.get_cursor()
+            try:
+                reply = (request_id, True, func(cur))
+            except Exception as e:
+                db.conn.rollback()
+                reply = (request_id, False, _picklable_error(e))
+            finally:
+                cur.close()
+            replies[worker_id].put(reply)
+            served += 1
+    finally:
+        db.close()
+    logger.info(f"Writer process served {served} write requests")
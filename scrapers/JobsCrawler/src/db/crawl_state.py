@@ -0,0 +1,130 @@
+"""
+Per-source crawl watermarks.
+
+Listings, feeds and API payloads list the newest jobs first. The watermark of a
+source is the first (newest) job it returned on the last successful crawl. A
+source configured with ``stop_at_watermark`` stops iterating, or paginating, as
+soon as that job shows up again, since everything after it was already seen.
+"""
+import sqlite3
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import Any, TypeVar
+from urllib.parse import urlparse
+
+from src.utils.logger_helper import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class Watermark:
+    """
+    Newest job seen from a source.
+
+    Attributes
+    ----------
+        link: Link of the job
+        pubdate: Publication date given by the source, if any
+        job_id: Identifier given by the source, if any
+    """
+
+    link: str
+    pubdate: str | None = None
+    job_id: str | None = None
+
+    def matches(self, link: Any, job_id: Any = None) -> bool:
+        """Whether a job is the one this watermark points at."""
+        if self.job_id is not None and job_id is not None:
+            return str(job_id) == self.job_id
+        return str(link) == self.link
+
+
+def is_job_link(link: Any) -> bool:
+    """Whether ``link`` is an http(s) URL a watermark can point at, not a placeholder like "NaN"."""
+    if not isinstance(link, str):
+        return False
+    parsed = urlparse(link)
+    return parsed.scheme in ("http", "https") and bool(parsed.netloc)
+
+
+def cut_at_watermark(  # noqa: UP047
+    items: Sequence[T], watermark: Watermark | None, key: Callable[[T], tuple[Any, Any]]
+) -> tuple[Sequence[T], bool]:
+    """
+    Return the items before the watermark and whether it was reached.
+
+    Args:
+        items: Jobs in source order, newest first
+        watermark: Watermark of the source, if any
+        key: Returns the (link, id) of an item; the id may be None
+    """
+    if watermark is None:
+        return items, False
+    for position, item in enumerate(items):
+        if watermark.matches(*key(item)):
+            return items[:position], True
+    return items, False
+
+
+class CrawlState:
+    """
+    Watermarks of the sources crawled into one jobs table.
+
+    Watermarks recorded during a run are only written by ``save()``, which the
+    engine calls once every job of the run has been stored.
+
+    Methods
+    -------
+        from_cursor(): Load the watermarks of a table.
+        get(): Return the watermark of a source.
+        record(): Set the new watermark of a source for this run.
+        save(): Write the recorded watermarks.
+    """
+
+    def __init__(self, watermarks: dict[str, Watermark] | None = None) -> None:
+        self.watermarks = watermarks or {}
+        self.pending: dict[str, Watermark] = {}
+
+    @staticmethod
+    def _target(test: bool) -> str:
+        return "test" if test else "main_jobs"
+
+    @classmethod
+    def from_cursor(cls, cur: sqlite3.Cursor, test: bool = False) -> "CrawlState":
+        cur.execute(
+            "SELECT source, last_link, last_pubdate, last_id FROM crawl_state WHERE target = ?",
+            (cls._target(test),),
+        )
+        return cls({source: Watermark(link, pubdate, job_id) for source, link, pubdate, job_id in cur.fetchall()})
+
+    def get(self, source: str) -> Watermark | None:
+        return self.watermarks.get(source)
+
+    def record(self, source: str, watermark: Watermark) -> None:
+        self.pending[source] = watermark
+
+    def save(self, cur: sqlite3.Cursor, test: bool = False) -> None:
+        if not self.pending:
+            return
+        cur.executemany(
+            """
+            INSERT INTO crawl_state (source, target, last_link, last_pubdate, last_id, updated_at)
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (source, target) DO UPDATE SET
+                last_link = excluded.last_link,
+                last_pubdate = excluded.last_pubdate,
+                last_id = excluded.last_id,
+                updated_at = excluded.updated_at
+            """,
+            [
+                (source, self._target(test), mark.link, mark.pubdate, mark.job_id)
+                for source, mark in self.pending.items()
+            ],
+        )
+        cur.connection.commit()
+        self.watermarks.update(self.pending)
+        logger.info(f"Saved crawl watermarks for {len(self.pending)} sources")
+        self.pending.clear()
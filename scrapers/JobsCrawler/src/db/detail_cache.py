@@ -0,0 +1,187 @@
+"""
+Persistent cache of what was extracted from followed job pages.
+
+The same detail page gets followed again when a job is listed on several pages,
+when a crawl is re-run after a crash, or when test runs crawl the same sources
+as production. ``DetailCache`` keeps the status code and the extracted value of
+every detail fetch, keyed by URL and extraction spec (the selectors used), so a
+page is only downloaded again once its entry expires.
+
+The cache holds at most ``max_entries`` entries; the least recently used ones
+are evicted first. Hits only record their time in memory, written back by
+``evict()`` and ``close()``, so a hit never commits.
+
+The methods block on SQLite, so ``get_or_fetch`` calls them from a worker
+thread, like ``CrawlSession`` does for the ``HttpCache``. A lock serializes them
+on the shared connection.
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+from src.utils.logger_helper import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 50_000
+
+# Outcomes worth remembering: transient failures (403 from bot protection, 5xx) are retried next time
+CACHEABLE_STATUSES = frozenset({200, 404, 410})
+
+DetailResult = tuple[int, Any]
+
+
+class DetailCache:
+    """
+    TTL and LRU bounded store of (status, extracted value) per detail page.
+
+    Args:
+        db_path: Path to the cache database, created if missing.
+        ttl: Seconds an entry stays valid after it was fetched.
+        max_entries: Maximum number of entries kept.
+
+    Methods
+    -------
+        get(): Return the cached result for a URL and spec, if still valid.
+        put(): Store the result of a fetch.
+        get_or_fetch(): Return the cached result or run the fetch, once per key.
+        evict(): Save the times of the hits, then drop the expired and least recently used entries.
+        close(): Evict over-limit entries and close the database.
+    """
+
+    def __init__(self, db_path: str, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._inflight: dict[tuple[str, str], asyncio.Future] = {}
+        # Last hit of each key since the last eviction
+        self._used: dict[tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute("PRAGMA busy_timeout = 5000")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS detail_cache (
+                url TEXT NOT NULL,
+                spec TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                value TEXT,
+                fetched_at REAL NOT NULL,
+                used_at REAL NOT NULL,
+                PRIMARY KEY (url, spec)
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_detail_cache_used_at ON detail_cache(used_at)")
+        self.evict()
+
+    def evict(self) -> int:
+        """Drop expired entries, then the least recently used ones above ``max_entries``."""
+        with self._lock:
+            self.conn.executemany(
+                "UPDATE detail_cache SET used_at = ? WHERE url = ? AND spec = ?",
+                [(used_at, url, spec) for (url, spec), used_at in self._used.items()],
+            )
+            self._used.clear()
+            evicted = self.conn.execute(
+                "DELETE FROM detail_cache WHERE fetched_at < ?", (time.time() - self.ttl,)
+            ).rowcount
+            evicted += self.conn.execute(
+                """
+                DELETE FROM detail_cache WHERE rowid IN (
+                    SELECT rowid FROM detail_cache ORDER BY used_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            ).rowcount
+            self.conn.commit()
+        if evicted:
+            logger.debug(f"Evicted {evicted} entries from the detail cache")
+        return evicted
+
+    def get(self, url: str, spec: str) -> DetailResult | None:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT status, value FROM detail_cache WHERE url = ? AND spec = ? AND fetched_at >= ?",
+                (url, spec, time.time() - self.ttl),
+            ).fetchone()
+            if row is None:
+                return None
+            self._used[(url, spec)] = time.time()
+        status, value = row
+        return status, json.loads(value)
+
+    def put(self, url: str, spec: str, status: int, value: Any) -> None:
+        if status not in CACHEABLE_STATUSES:
+            return
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                """
+                INSERT OR REPLACE INTO detail_cache (url, spec, status, value, fetched_at, used_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (url, spec, status, json.dumps(value), now, now),
+            )
+            self.conn.commit()
+
+    async def get_or_fetch(self, url: str, spec: str, fetch: Callable[[], Awaitable[DetailResult]]) -> DetailResult:
+        """
+        Return the cached (status, value) for ``url``, calling ``fetch`` on a miss.
+
+        Concurrent calls for the same key share a single fetch.
+        """
+        cached = await asyncio.to_thread(self.get, url, spec)
+        if cached is not None:
+            self.hits += 1
+            logger.debug(f"Detail cache hit for {url}")
+            return cached
+
+        key = (url, spec)
+        if key in self._inflight:
+            return await asyncio.shield(self._inflight[key])
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await fetch()
+            # Stored while the key is still in flight, so a later call can't miss both
+            await asyncio.to_thread(self.put, url, spec, *result)
+        except BaseException as e:
+            future.set_exception(e)
+            # Only the waiters, if any, should see the exception a second time
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+        future.set_result(result)
+        return result
+
+    def close(self) -> None:
+        self.evict()
+        logger.info(f"Detail cache: {self.hits} hits, {self.misses} misses")
+        self.conn.close()
+
+
+async def fetch_detail(
+    session: Any, url: str, spec: str, fetch: Callable[[], Awaitable[DetailResult]]
+) -> DetailResult:
+    """Run ``fetch`` through the session's ``detail_cache`` when it has one."""
+    cache: DetailCache | None = getattr(session, "detail_cache", None)
+    if cache is None:
+        return await fetch()
+    return await cache.get_or_fetch(url, spec, fetch)
@@ -0,0 +1,158 @@
+"""
+On-disk cache of HTTP responses for conditional requests.
+
+Listing pages, feeds and API payloads rarely change between two cron runs a few
+minutes apart. The cache keeps the validators (``ETag`` and ``Last-Modified``)
+of every response that carries them, so the next request for the same URL can
+be sent with ``If-None-Match``/``If-Modified-Since``. A ``304 Not Modified``
+answer then costs a few hundred bytes instead of the whole body, and the
+crawlers skip its extraction.
+
+Only validators are kept, never bodies. Responses without validators are not
+cached. The engine caches its listing pages, feeds and API payloads; detail
+pages go to the ``DetailCache`` instead.
+
+The methods block on SQLite, so ``CrawlSession`` calls them from a worker
+thread. A lock serializes them on the shared connection.
+"""
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.utils.logger_helper import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+# Entries not requested for this long are dropped when the cache is opened
+DEFAULT_MAX_AGE = 30 * 24 * 3600
+# Beyond this many entries the least recently used are dropped
+DEFAULT_MAX_ENTRIES = 5_000
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """
+    A response stored in the cache.
+
+    Attributes
+    ----------
+        url: Requested URL
+        etag: Value of the ``ETag`` header, if any
+        last_modified: Value of the ``Last-Modified`` header, if any
+        fetched_at: Unix time the response was downloaded
+    """
+
+    url: str
+    etag: str | None
+    last_modified: str | None
+    fetched_at: float
+
+    def validator_headers(self) -> dict[str, str]:
+        """Headers that turn a GET for this URL into a conditional request."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """
+    SQLite-backed store of cacheable responses, keyed by URL.
+
+    Args:
+        db_path: Path to the cache database, created if missing.
+        max_age: Seconds after which an unused entry is pruned.
+        max_entries: Maximum number of entries kept.
+
+    Methods
+    -------
+        get(): Return the cached response for a URL, if any.
+        store(): Save or replace the cached response for a URL.
+        touch(): Record that a cached response was revalidated.
+        evict(): Drop the stale entries and the least recently used ones over ``max_entries``.
+        close(): Evict over-limit entries and close the cache database.
+    """
+
+    def __init__(self, db_path: str, max_age: float = DEFAULT_MAX_AGE, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.db_path = db_path
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute("PRAGMA busy_timeout = 5000")
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(http_cache)")}
+        if "body" in columns:
+            # Caches written before only validators were kept; their entries are simply fetched again
+            self.conn.execute("DROP TABLE http_cache")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS http_cache (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                used_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_http_cache_used_at ON http_cache(used_at)")
+        self.evict()
+
+    def evict(self) -> int:
+        with self._lock:
+            evicted = self.conn.execute(
+                "DELETE FROM http_cache WHERE used_at < ?", (time.time() - self.max_age,)
+            ).rowcount
+            evicted += self.conn.execute(
+                """
+                DELETE FROM http_cache WHERE rowid IN (
+                    SELECT rowid FROM http_cache ORDER BY used_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            ).rowcount
+            self.conn.commit()
+        if evicted:
+            logger.info(f"Evicted {evicted} entries from the HTTP cache at {self.db_path}")
+        return evicted
+
+    def get(self, url: str) -> CachedResponse | None:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT url, etag, last_modified, fetched_at FROM http_cache WHERE url = ?",
+                (url,),
+            ).fetchone()
+        return CachedResponse(*row) if row else None
+
+    def store(self, response: CachedResponse) -> None:
+        with self._lock:
+            self.conn.execute(
+                """
+                INSERT OR REPLACE INTO http_cache (url, etag, last_modified, fetched_at, used_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (
+                    response.url,
+                    response.etag,
+                    response.last_modified,
+                    response.fetched_at,
+                    response.fetched_at,
+                ),
+            )
+            self.conn.commit()
+
+    def touch(self, url: str) -> None:
+        with self._lock:
+            self.conn.execute("UPDATE http_cache SET used_at = ? WHERE url = ?", (time.time(), url))
+            self.conn.commit()
+
+    def close(self) -> None:
+        self.evict()
+        self.conn.close()
@@ -0,0 +1,75 @@
+"""
+In-memory index of the links already stored in a jobs table.
+
+The crawlers check every scraped link against the database before following it.
+Loading the links once per run and answering membership from memory keeps those
+checks off SQLite (and off the event loop).
+"""
+import hashlib
+import sqlite3
+from collections.abc import Iterable
+
+from src.utils.logger_helper import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+
+class LinkIndex:
+    """
+    Set of known job links, stored as 64-bit BLAKE2b digests.
+
+    Hashing keeps the footprint flat regardless of URL length. The digest is
+    deterministic, so an index can be built in one process and used in another.
+    With a few hundred thousand links the chance of a false positive is in the
+    order of 1e-9.
+
+    Methods
+    -------
+        from_cursor(): Build the index from the links in a jobs table.
+        add(): Record a single link.
+        update(): Record several links.
+    """
+
+    def __init__(self, links: Iterable[str] = ()) -> None:
+        self._digests: set[int] = set()
+        self.update(links)
+
+    @staticmethod
+    def _digest(link: str) -> int:
+        return int.from_bytes(hashlib.blake2b(str(link).encode("utf-8"), digest_size=8).digest(), "little")
+
+    @classmethod
+    def from_cursor(cls, cur: sqlite3.Cursor, test: bool = False, batch_size: int = 10_000) -> "LinkIndex":
+        """
+        Load every link of the jobs table into a new index.
+
+        Args:
+            cur: SQLite cursor
+            test: Whether to load the test table (default: False)
+            batch_size: Number of rows fetched per round-trip
+
+        Returns
+        -------
+            LinkIndex: Index holding every link in the table.
+        """
+        table = "test" if test else "main_jobs"
+        index = cls()
+
+        cur.execute(f"SELECT link FROM {table}")
+        while rows := cur.fetchmany(batch_size):
+            index.update(row[0] for row in rows)
+
+        logger.info(f"Loaded {len(index)} links from '{table}' into the link index")
+        return index
+
+    def add(self, link: str) -> None:
+        self._digests.add(self._digest(link))
+
+    def update(self, links: Iterable[str]) -> None:
+        self._digests.update(self._digest(link) for link in links)
+
+    def __contains__(self, link: object) -> bool:
+        return self._digest(str(link)) in self._digests
+
+    def __len__(self) -> int:
+        return len(self._digests)
@@ -0,0 +1,106 @@
+"""
+Keyword search over the full-text index of ``main_jobs``.
+
+``JobsDatabase.create_tables`` maintains ``main_jobs_fts``, an FTS5 index over
+the title, description and location of every job. The helpers below build
+FTS5 ``MATCH`` expressions from keyword lists and run searches ranked with
+``bm25``, where a match in the title counts more than one in the location,
+which counts more than one in the description.
+"""
+import sqlite3
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+from src.db.sqlite_wrapper import job_source
+
+FTS_TABLE = "main_jobs_fts"
+
+# bm25 weights of the title, description and location columns
+RANK_WEIGHTS = (10.0, 1.0, 2.0)
+RANK = f"bm25({FTS_TABLE}, {', '.join(str(weight) for weight in RANK_WEIGHTS)})"
+
+
+def has_search_index(conn: sqlite3.Connection) -> bool:
+    """Whether the database has the full-text index (SQLite may lack FTS5)."""
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)).fetchone()
+    return row is not None
+
+
+def keywords_expression(keywords: Iterable[str] | None, columns: Sequence[str] = ()) -> str | None:
+    """
+    Build a MATCH expression matching any of ``keywords``.
+
+    Every keyword is quoted as a phrase, so multi-word keywords ("head of")
+    and symbols are matched literally instead of as query syntax. Its last
+    word is matched as a prefix, like the keyword filters of
+    ``src/utils/filters.py``, so "manager" also finds "Managers".
+
+    Args:
+        keywords: Keywords, any of which must be present
+        columns: Restrict the match to these columns (title, description, location)
+
+    Returns
+    -------
+        The expression, or None if there are no keywords
+    """
+    phrases = ['"' + keyword.strip().replace('"', '""') + '"*' for keyword in keywords or () if keyword.strip()]
+    if not phrases:
+        return None
+    expression = " OR ".join(phrases)
+    if columns:
+        return f"{{{' '.join(columns)}}} : ({expression})"
+    return expression
+
+
+def search_jobs(
+    conn: sqlite3.Connection,
+    query: str,
+    source: str | None = None,
+    statuses: Sequence[str] | None = None,
+    limit: int = 20,
+) -> list[dict[str, Any]]:
+    """
+    Return the jobs of ``main_jobs`` matching an FTS5 query, best match first.
+
+    Args:
+        conn: Connection to the jobs database
+        query: FTS5 query, e.g. ``python AND title:senior NOT php``
+        source: Only return jobs from this source (host of the job links)
+        statuses: Only return jobs in these statuses
+        limit: Maximum number of jobs returned
+
+    Raises
+    ------
+        sqlite3.OperationalError: If the query is not valid FTS5 syntax
+    """
+    sql = f"""
+        SELECT
+            j.id,
+            j.title,
+            j.link,
+            j.location,
+            j.pubdate,
+            j.timestamp,
+            j.status,
+            snippet({FTS_TABLE}, 1, '[', ']', '…', 16) AS snippet,
+            {RANK} AS rank
+        FROM {FTS_TABLE}
+        JOIN main_jobs j ON j.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH ?
+    """
+    params: list[Any] = [query]
+
+    if source:
+        sql += " AND j.source = ?"
+        params.append(job_source(source))
+
+    if statuses:
+        sql += f" AND j.status IN ({', '.join('?' for _ in statuses)})"
+        params.extend(statuses)
+
+    sql += " ORDER BY rank LIMIT ?"
+    params.append(limit)
+
+    cursor = conn.execute(sql, params)
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
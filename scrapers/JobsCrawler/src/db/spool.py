@@ -0,0 +1,118 @@
+"""
+JSON Lines spools of crawled jobs, for crawls spread over several machines.
+
+A node crawling its shard of the configs writes every batch it stores to a
+spool file, one job per line, with the values exactly as they are inserted.
+``scripts/merge_spools.py`` later inserts spools into the central ``jobs.db``.
+The merge relies on the unique ``link`` column, so merging a spool twice, or
+two spools holding the same job, stores it once.
+
+Each batch is written as ``<name>.jsonl.part`` and renamed to ``<name>.jsonl``
+before it is stored locally, so a merge never reads a spool that is still
+being written, and a node killed mid-run has published every job its own
+database dedups. Names start with the target table and end with the batch
+number: ``main_jobs-<host>-<time>-<id>-<batch>.jsonl``.
+"""
+import json
+import os
+import socket
+import uuid
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from src.utils.logger_helper import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+SPOOL_SUFFIX = ".jsonl"
+PART_SUFFIX = ".part"
+
+
+class JobSpool:
+    """
+    Spools of the jobs stored by one engine run, one per batch.
+
+    Args:
+        spool_dir: Directory the spools are written to, created if missing.
+        table: Table the jobs belong to, ``main_jobs`` or ``test``.
+        columns: Names of the values in every row written.
+
+    Methods
+    -------
+        write(): Publish a batch of rows as a spool of its own.
+        close(): Log the spools published by the run.
+    """
+
+    def __init__(self, spool_dir: str, table: str, columns: Sequence[str]) -> None:
+        self.spool_dir = Path(spool_dir)
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self.name = f"{table}-{socket.gethostname()}-{datetime.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.columns = tuple(columns)
+        self.rows_written = 0
+        self.paths: list[Path] = []
+
+    def write(self, rows: Sequence[Sequence[Any]]) -> Path | None:
+        """
+        Write ``rows`` to a new spool and publish it.
+
+        Returns
+        -------
+            The published spool, or None if there were no rows
+        """
+        if not rows:
+            return None
+        path = self.spool_dir / f"{self.name}-{len(self.paths) + 1:05d}{SPOOL_SUFFIX}"
+        part = path.with_name(path.name + PART_SUFFIX)
+        with open(part, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(dict(zip(self.columns, row)), ensure_ascii=False) + "\n" for row in rows)
+            f.flush()
+            # On disk before it is published, so a crash can't publish a truncated spool
+            os.fsync(f.fileno())
+        part.rename(path)
+        self.paths.append(path)
+        self.rows_written += len(rows)
+        return path
+
+    def close(self) -> None:
+        if self.paths:
+            logger.info(f"Spooled {self.rows_written} jobs to {len(self.paths)} spools named {self.name}-*")
+
+
+def spool_table(path: str | Path) -> str:
+    """Return the table a spool was written for, from its name."""
+    return Path(path).name.split("-", 1)[0]
+
+
+def find_spools(paths: Iterable[str | Path]) -> list[Path]:
+    """Return the finished spools among ``paths``, looking inside directories, oldest name first."""
+    spools = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            spools.extend(sorted(path.glob(f"*{SPOOL_SUFFIX}")))
+        elif path.name.endswith(SPOOL_SUFFIX):
+            spools.append(path)
+    return spools
+
+
+def read_spool(path: str | Path, columns: Sequence[str]) -> Iterator[tuple[Any, ...]]:
+    """
+    Yield the rows of a spool as tuples of ``columns``.
+
+    Columns missing from a line, e.g. in spools written before a column
+    existed, are None.
+
+    Raises
+    ------
+        ValueError: If a line is not valid JSON
+    """
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{number} is not valid JSON: {e}") from None
+            yield tuple(record.get(column) for column in columns)
@@ -4,15 +4,98 @@ SQLite database wrapper for JobsCrawler.
 This module provides a clean interface for database operations,
 implementing separation of concerns (SOC) pattern.
 """
+import ast
+import json
 import os
 import sqlite3
+from datetime import date, datetime, time
 from pathlib import Path
 from typing import Any
+from urllib.parse import urlparse
 
 from src.utils.logger_helper import get_custom_logger
 
 logger = get_custom_logger(__name__)
 
+# Stored in PRAGMA user_version once create_tables has run; bump it when the schema or a migration changes
+SCHEMA_VERSION = 1
+
+
+def job_source(link: str | None) -> str | None:
+    """
+    Return the source of a job: the host of its link, lowercased and without ``www.``.
+
+    Also accepts a bare host, so user input like ``www.4dayweek.io`` can be
+    normalized the same way.
+    """
+    if not link or not isinstance(link, str):
+        return None
+    host = urlparse(link if "//" in link else f"//{link}").hostname
+    if not host:
+        return None
+    return host.removeprefix("www.")
+
+
+def _as_datetime(value: Any) -> datetime | None:
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.strip())
+        except ValueError:
+            return None
+    elif isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime.combine(value, time())
+    return value if isinstance(value, datetime) else None
+
+
+def epoch_seconds(value: Any) -> int | None:
+    """
+    Return a date or datetime as Unix seconds, or None if it isn't one.
+
+    Accepts ``date``/``datetime`` objects (pandas Timestamps included) and the
+    ISO-8601 strings older rows hold. Naive values are local time, like the
+    ``datetime.now()`` of the crawlers.
+    """
+    moment = _as_datetime(value)
+    try:
+        return int(moment.timestamp()) if moment is not None else None
+    except ValueError:  # NaT
+        return None
+
+
+def iso_date(value: Any) -> str | None:
+    """Return a date or datetime as ``YYYY-MM-DD``, or None if it isn't one."""
+    moment = _as_datetime(value)
+    try:
+        return moment.strftime("%Y-%m-%d") if moment is not None else None
+    except ValueError:  # NaT
+        return None
+
+
+def iso_timestamp(value: Any) -> str | None:
+    """Return a date or datetime as ``YYYY-MM-DD HH:MM:SS``, or None if it isn't one."""
+    moment = _as_datetime(value)
+    try:
+        return moment.strftime("%Y-%m-%d %H:%M:%S") if moment is not None else None
+    except ValueError:  # NaT
+        return None
+
+
+def location_tags_json(value: Any) -> str | None:
+    """
+    Return location tags as a JSON array, e.g. ``["EUROPE", "REMOTE"]``.
+
+    Accepts a list of tags, a JSON array, or the ``str(list)`` rows stored
+    before the column held JSON.
+    """
+    if isinstance(value, str):
+        try:
+            value = json.loads(value) if value.startswith('["') or value == "[]" else ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return None
+    if not isinstance(value, (list, tuple)):
+        return None
+    return json.dumps(list(dict.fromkeys(str(tag) for tag in value)))
+
 
 class JobsDatabase:
     """
@@ -24,6 +107,7 @@ class JobsDatabase:
     Attributes
     ----------
         db_path (str): Path to the SQLite database file.
+        wal (bool): Whether connections use WAL journal mode.
         conn (sqlite3.Connection | None): Database connection object.
 
     Methods
@@ -35,15 +119,18 @@ class JobsDatabase:
         create_tables(): Create required database tables.
     """
 
-    def __init__(self, db_path: str = "data/jobs.db"):
+    def __init__(self, db_path: str = "data/jobs.db", wal: bool = True):
         """
         Initialize the JobsDatabase.
 
         Args:
             db_path (str): Path to the SQLite database file.
                           Defaults to 'data/jobs.db'.
+            wal (bool): Use WAL journal mode with synchronous=NORMAL so bulk
+                       ingests don't block readers. Defaults to True.
         """
         self.db_path = db_path
+        self.wal = wal
         self.conn: sqlite3.Connection | None = None
         self._ensure_data_directory()
 
@@ -69,6 +156,14 @@ class JobsDatabase:
         # Enable foreign keys support
         self.conn.execute("PRAGMA foreign_keys = ON")
 
+        # Wait on locks held by other processes (e.g. the review scripts) instead of failing
+        self.conn.execute("PRAGMA busy_timeout = 5000")
+
+        if self.wal:
+            # WAL lets readers run while a crawl is writing; NORMAL sync is safe in WAL mode
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+
         # Create tables if they don't exist
         self.create_tables()
 
@@ -111,15 +206,25 @@ class JobsDatabase:
         Creates the following tables:
         - main_jobs: Primary table for production scraped jobs
         - test: Table for test/development scraped jobs
+        - crawl_state: Newest job seen per source and target table
+        - main_jobs_location_tags / test_location_tags: One row per job and location tag
+        - main_jobs_fts: Full-text index over main_jobs, if SQLite has FTS5
 
         Both tables use UNIQUE constraint on 'link' column for
         automatic deduplication via INSERT OR IGNORE.
+
+        The schema and migrations are skipped when the database is already at
+        ``SCHEMA_VERSION``, so the review scripts don't re-run them on every call.
         """
         if not self.conn:
             raise ValueError("Database connection not established")
 
         cursor = self.conn.cursor()
 
+        if cursor.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            logger.debug(f"Database schema is at version {SCHEMA_VERSION}")
+            return
+
         # Schema for scraped jobs
         job_schema = """
             CREATE TABLE IF NOT EXISTS {table_name} (
@@ -144,10 +249,32 @@ class JobsDatabase:
         cursor.execute(job_schema.format(table_name="test"))
         logger.debug("Created/verified test table")
 
+        # Watermark of each source, per target table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS crawl_state (
+                source TEXT NOT NULL,
+                target TEXT NOT NULL,
+                last_link TEXT NOT NULL,
+                last_pubdate TEXT,
+                last_id TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (source, target)
+            )
+        """)
+        logger.debug("Created/verified crawl_state table")
+
         # Migrate existing tables to add status and notes columns if they don't exist
         self._migrate_add_status_columns(cursor, "main_jobs")
         self._migrate_add_status_columns(cursor, "test")
 
+        # Migrate existing tables to add the source column the review queue is indexed by
+        self._migrate_add_source_column(cursor, "main_jobs")
+        self._migrate_add_source_column(cursor, "test")
+
+        # Migrate existing tables to epoch columns and indexed location tags
+        self._migrate_typed_columns(cursor, "main_jobs")
+        self._migrate_typed_columns(cursor, "test")
+
         # Create index on link for faster lookups
         cursor.execute("""
             CREATE INDEX IF NOT EXISTS idx_main_jobs_link
@@ -170,6 +297,10 @@ class JobsDatabase:
             ON test(timestamp)
         """)
 
+        # Full-text index for keyword searches over the job history
+        self._create_search_index(cursor, "main_jobs")
+
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
         self.conn.commit()
         logger.info("Database schema created/verified successfully")
 
@@ -193,6 +324,195 @@ class JobsDatabase:
             cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN notes TEXT")
             logger.info(f"Added 'notes' column to {table_name}")
 
+    def _migrate_add_source_column(self, cursor: sqlite3.Cursor, table_name: str) -> None:
+        """
+        Add the ``source`` column and the review queue index to a jobs table.
+
+        ``source`` is derived from the link at ingest (see ``job_source``); rows
+        stored before it existed are backfilled here. The first migration also
+        turns NULL statuses into 'new', so the queue can be read with
+        ``source = ? AND status = 'new' ORDER BY timestamp DESC`` as a single
+        seek on ``(source, status, timestamp)``.
+
+        Args:
+            cursor: Database cursor
+            table_name: Name of the table to migrate
+        """
+        cursor.execute(f"PRAGMA table_info({table_name})")
+        columns = [row[1] for row in cursor.fetchall()]
+
+        if "source" not in columns:
+            cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN source TEXT")
+            cursor.execute(f"UPDATE {table_name} SET status = 'new' WHERE status IS NULL")
+            logger.info(f"Added 'source' column to {table_name}")
+
+        cursor.execute(f"""
+            CREATE INDEX IF NOT EXISTS idx_{table_name}_source_status_timestamp
+            ON {table_name}(source, status, timestamp)
+        """)
+
+        # A seek on the index, so this is cheap once every row has a source
+        self.conn.create_function("job_source", 1, job_source, deterministic=True)
+        cursor.execute(f"UPDATE {table_name} SET source = job_source(link) WHERE source IS NULL")
+        if cursor.rowcount > 0:
+            logger.info(f"Backfilled the source of {cursor.rowcount} jobs in {table_name}")
+
+    def _migrate_typed_columns(self, cursor: sqlite3.Cursor, table_name: str) -> None:
+        """
+        Add the epoch columns and the location tags table to a jobs table.
+
+        ``published_at`` and ``crawled_at`` hold ``pubdate`` and ``timestamp`` as
+        Unix seconds, so time ranges are integer comparisons on an index. The
+        text columns are kept for display, as ``YYYY-MM-DD`` and
+        ``YYYY-MM-DD HH:MM:SS``. ``location_tags`` holds a JSON array, and
+        ``{table_name}_location_tags`` has one row per job and tag, kept in sync
+        by triggers and indexed on ``(tag, crawled_at)``: "jobs tagged EUROPE
+        crawled in the last 24h" is a range scan on that index.
+
+        Rows stored before are converted once, from the ``str()`` of their
+        values, when the columns are added.
+
+        Args:
+            cursor: Database cursor
+            table_name: Name of the table to migrate
+        """
+        tags_table = f"{table_name}_location_tags"
+        cursor.execute(f"PRAGMA table_info({table_name})")
+        columns = [row[1] for row in cursor.fetchall()]
+
+        if "crawled_at" not in columns:
+            cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN published_at INTEGER")
+            cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN crawled_at INTEGER")
+            logger.info(f"Added 'published_at' and 'crawled_at' columns to {table_name}")
+
+            self.conn.create_function("epoch_seconds", 1, epoch_seconds, deterministic=True)
+            self.conn.create_function("iso_date", 1, iso_date, deterministic=True)
+            self.conn.create_function("iso_timestamp", 1, iso_timestamp, deterministic=True)
+            self.conn.create_function("location_tags_json", 1, location_tags_json, deterministic=True)
+            # Values that can't be parsed are kept as they are
+            cursor.execute(f"""
+                UPDATE {table_name} SET
+                    published_at = epoch_seconds(pubdate),
+                    crawled_at = epoch_seconds(timestamp),
+                    pubdate = COALESCE(iso_date(pubdate), pubdate),
+                    timestamp = COALESCE(iso_timestamp(timestamp), timestamp),
+                    location_tags = COALESCE(location_tags_json(location_tags), location_tags)
+            """)
+            if cursor.rowcount > 0:
+                logger.info(f"Converted the dates and location tags of {cursor.rowcount} jobs in {table_name}")
+
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (tags_table,))
+        tags_table_exists = cursor.fetchone() is not None
+
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {tags_table} (
+                job_id INTEGER NOT NULL,
+                tag TEXT NOT NULL,
+                crawled_at INTEGER,
+                PRIMARY KEY (job_id, tag)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute(f"""
+            CREATE INDEX IF NOT EXISTS idx_{tags_table}_tag_crawled_at
+            ON {tags_table}(tag, crawled_at)
+        """)
+        cursor.execute(f"""
+            CREATE INDEX IF NOT EXISTS idx_{table_name}_crawled_at
+            ON {table_name}(crawled_at)
+        """)
+
+        # json_each skips NULLs; the json_valid guard skips rows the conversion couldn't parse
+        tags_of_new = f"""
+            INSERT OR IGNORE INTO {tags_table} (job_id, tag, crawled_at)
+            SELECT new.id, value, new.crawled_at FROM json_each(new.location_tags)
+            WHERE json_valid(new.location_tags);
+        """
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {tags_table}_insert AFTER INSERT ON {table_name} BEGIN
+                {tags_of_new}
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {tags_table}_delete AFTER DELETE ON {table_name} BEGIN
+                DELETE FROM {tags_table} WHERE job_id = old.id;
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {tags_table}_update
+            AFTER UPDATE OF location_tags, crawled_at ON {table_name} BEGIN
+                DELETE FROM {tags_table} WHERE job_id = old.id;
+                {tags_of_new}
+            END
+        """)
+
+        if not tags_table_exists:
+            cursor.execute(f"""
+                INSERT OR IGNORE INTO {tags_table} (job_id, tag, crawled_at)
+                SELECT j.id, tags.value, j.crawled_at
+                FROM {table_name} j, json_each(j.location_tags) tags
+                WHERE json_valid(j.location_tags)
+            """)
+            if cursor.rowcount > 0:
+                logger.info(f"Indexed {cursor.rowcount} location tags of {table_name}")
+
+    def _create_search_index(self, cursor: sqlite3.Cursor, table_name: str) -> None:
+        """
+        Create the FTS5 index over the title, description and location of a jobs table.
+
+        The index is an external-content table named ``{table_name}_fts``: it
+        only stores the index and reads the text from the jobs table, so jobs
+        are not stored twice. Triggers keep it in sync with inserts, deletes and
+        text edits. Status and notes updates don't touch it. When the index is
+        created for a table that already holds jobs, it is built from them.
+
+        ``+`` and ``#`` are kept inside tokens so "C++" and "C#" are searchable.
+
+        Args:
+            cursor: Database cursor
+            table_name: Name of the jobs table to index
+        """
+        fts_table = f"{table_name}_fts"
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts_table,))
+        exists = cursor.fetchone() is not None
+
+        try:
+            cursor.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+                    title, description, location,
+                    content='{table_name}', content_rowid='id',
+                    tokenize="unicode61 remove_diacritics 2 tokenchars '+#'"
+                )
+            """)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Full-text search unavailable, SQLite was built without FTS5: {e}")
+            return
+
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_insert AFTER INSERT ON {table_name} BEGIN
+                INSERT INTO {fts_table} (rowid, title, description, location)
+                VALUES (new.id, new.title, new.description, new.location);
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_delete AFTER DELETE ON {table_name} BEGIN
+                INSERT INTO {fts_table} ({fts_table}, rowid, title, description, location)
+                VALUES ('delete', old.id, old.title, old.description, old.location);
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_update
+            AFTER UPDATE OF title, description, location ON {table_name} BEGIN
+                INSERT INTO {fts_table} ({fts_table}, rowid, title, description, location)
+                VALUES ('delete', old.id, old.title, old.description, old.location);
+                INSERT INTO {fts_table} (rowid, title, description, location)
+                VALUES (new.id, new.title, new.description, new.location);
+            END
+        """)
+
+        if not exists:
+            cursor.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
+            logger.info(f"Built the full-text index {fts_table}")
+
     def get_job_count(self, test: bool = False) -> int:
         """
         Get the total count of jobs in the database.
@@ -210,6 +530,42 @@ class JobsDatabase:
         result = cursor.fetchone()
         return result[0] if result else 0
 
+    def get_jobs_by_location_tag(
+        self, tag: str, since: datetime | None = None, test: bool = False, limit: int | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        Get the jobs with a location tag, most recently crawled first.
+
+        Args:
+            tag (str): Location tag, e.g. 'EUROPE'.
+            since (datetime | None): Only jobs crawled at or after this time.
+            test (bool): If True, read the test table. Otherwise, main_jobs.
+            limit (int | None): Maximum number of jobs returned.
+
+        Returns
+        -------
+            list[dict[str, Any]]: The jobs, as column name to value mappings.
+        """
+        table = "test" if test else "main_jobs"
+        query = f"""
+            SELECT j.* FROM {table}_location_tags t
+            JOIN {table} j ON j.id = t.job_id
+            WHERE t.tag = ?
+        """
+        params: list[Any] = [tag.upper()]
+        if since is not None:
+            query += " AND t.crawled_at >= ?"
+            params.append(epoch_seconds(since))
+        query += " ORDER BY t.crawled_at DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        cursor = self.get_cursor()
+        cursor.execute(query, params)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
     def __enter__(self):
         """Context manager entry - establishes connection."""
         self.connect()
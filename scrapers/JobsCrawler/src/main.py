@@ -1,13 +1,18 @@
+import argparse
 import asyncio
 import os
 from collections.abc import Coroutine
 from typing import Any
 
 from src.crawler import AsyncCrawlerEngine
+from src.db import AsyncJobsDatabase
 # IMPORTANT: Embedding functionality disabled - DO NOT DELETE, may be re-enabled later
 # from src.embeddings.embed_latest_crawled_data import embed_data
 from src.models import ApiArgs, Bs4Args, RssArgs
 from src.utils.logger_helper import get_custom_logger
+from src.utils.parsing import ParseExecutor
+from src.utils.scheduler import FetchScheduler
+from src.workers import DEFAULT_SHARDS, run_crawlers_in_processes
 
 # SQLite database path - no longer using PostgreSQL URL
 DB_PATH = os.environ.get("DB_PATH", "data/jobs.db")
@@ -18,13 +23,38 @@ async def run_strategy(args: RssArgs | ApiArgs | Bs4Args) -> Coroutine[Any, Any,
     engine = AsyncCrawlerEngine(args)
     await engine.run()
 
-async def run_crawlers(is_test: bool = False) -> Coroutine[Any, Any, None] | None:
+async def run_crawlers(
+    is_test: bool = False,
+    node_shard: int = 0,
+    node_count: int = 1,
+    spool_dir: str | None = None,
+    metrics_dir: str | None = None,
+    prometheus_dir: str | None = None,
+) -> Coroutine[Any, Any, None] | None:
     start_time = asyncio.get_event_loop().time()
 
+    # One scheduler for every strategy so the global concurrency cap and the
+    # per-host limits hold across RSS, API and BS4 crawls hitting the same hosts.
+    scheduler = FetchScheduler()
+    # Likewise one pool of parse workers, instead of one per strategy
+    parse_executor = ParseExecutor()
+    # And one writer thread, so the strategies never wait on each other's write locks
+    database = AsyncJobsDatabase(DB_PATH)
+
+    shared = {
+        "scheduler": scheduler,
+        "parse_executor": parse_executor,
+        "database": database,
+        "node_shard": node_shard,
+        "node_count": node_count,
+        "spool_dir": spool_dir,
+        "metrics_dir": metrics_dir,
+        "prometheus_dir": prometheus_dir,
+    }
     strategies = [
-        (RssArgs(test=is_test)),
-        (ApiArgs(test=is_test)),
-        (Bs4Args(test=is_test)),
+        (RssArgs(test=is_test, db_path=DB_PATH, **shared)),
+        (ApiArgs(test=is_test, db_path=DB_PATH, **shared)),
+        (Bs4Args(test=is_test, db_path=DB_PATH, **shared)),
     ]
 
     tasks = [run_strategy(args) for args in strategies]
@@ -33,15 +63,74 @@ async def run_crawlers(is_test: bool = False) -> Coroutine[Any, Any, None] | Non
         await asyncio.gather(*tasks)
     except Exception as e:
         logger.error(f"An error occurred: {str(e)}", exc_info=True)
+    finally:
+        parse_executor.shutdown()
+        await database.close()
 
     elapsed_time = asyncio.get_event_loop().time() - start_time
     logger.info(f"All strategies completed in {elapsed_time:.2f} seconds")
 
-async def main():
+def parse_node(value: str) -> tuple[int, int]:
+    """Parse ``INDEX/COUNT`` (1-based) into a 0-based node index and the node count."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected INDEX/COUNT, e.g. 2/3, got {value!r}") from None
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"node index must be between 1 and {count}, got {index}")
+    return index - 1, count
+
+def create_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Crawl every enabled RSS, API and BS4 source")
+    parser.add_argument(
+        "--processes", action="store_true",
+        help="Run the strategies in worker processes storing through a single writer process",
+    )
+    parser.add_argument(
+        "--shards", type=int, default=None,
+        help=f"With --processes, number of worker processes, each crawling the configs of a share of the hosts "
+        f"(default {DEFAULT_SHARDS})",
+    )
+    parser.add_argument(
+        "--node", type=parse_node, default=(0, 1), metavar="INDEX/COUNT",
+        help="Only crawl the share of the configs of node INDEX out of COUNT machines, e.g. 2/3",
+    )
+    parser.add_argument(
+        "--spool-dir", type=str, default=None,
+        help="Also write the stored jobs to JSONL spools in this directory, see scripts/merge_spools.py",
+    )
+    parser.add_argument(
+        "--metrics-dir", type=str, default=None,
+        help="Directory of the JSON run reports. Defaults to a metrics/ directory next to the database",
+    )
+    parser.add_argument(
+        "--prometheus-dir", type=str, default=None,
+        help="Also write the run metrics as Prometheus textfiles in this directory",
+    )
+    return parser
+
+async def main(argv: list[str] | None = None):
+    parser = create_argument_parser()
+    args = parser.parse_args(argv)
+    if args.shards is not None and not args.processes:
+        parser.error("--shards only applies with --processes")
     logger.info("Running all the crawlers...")
 
     # Run crawlers and wait for them to complete
-    await run_crawlers()
+    node_shard, node_count = args.node
+    if args.processes:
+        start_time = asyncio.get_event_loop().time()
+        await run_crawlers_in_processes(
+            DB_PATH, shards=args.shards or DEFAULT_SHARDS, node_shard=node_shard, node_count=node_count,
+            spool_dir=args.spool_dir, metrics_dir=args.metrics_dir, prometheus_dir=args.prometheus_dir,
+        )
+        elapsed_time = asyncio.get_event_loop().time() - start_time
+        logger.info(f"All strategies completed in {elapsed_time:.2f} seconds")
+    else:
+        await run_crawlers(
+            node_shard=node_shard, node_count=node_count, spool_dir=args.spool_dir,
+            metrics_dir=args.metrics_dir, prometheus_dir=args.prometheus_dir,
+        )
 
     # IMPORTANT: Embedding disabled - DO NOT DELETE, may be re-enabled later
     # This requires PyTorch, transformers, and pgvector (~5GB of dependencies)
@@ -1,8 +1,7 @@
 import os
-from collections.abc import Callable, Coroutine
+from collections.abc import AsyncIterator, Callable, Coroutine
 from dataclasses import dataclass
 from typing import Any, TypeAlias, TypedDict
-import sqlite3
 
 import aiohttp
 import pandas as pd
@@ -11,7 +10,11 @@ from dotenv import load_dotenv
 from src.crawlers.async_api import async_api_requests, clean_postgre_api
 from src.crawlers.async_bs4 import async_bs4_crawl, clean_postgre_bs4
 from src.crawlers.async_rss import async_rss_reader, clean_postgre_rss
+from src.db import AsyncJobsDatabase
+from src.pipeline import CrawlContext
 from src.utils.logger_helper import get_custom_logger
+from src.utils.parsing import ParseExecutor
+from src.utils.scheduler import DEFAULT_MAX_CONCURRENCY, FetchScheduler
 
 load_dotenv()
 
@@ -66,6 +69,11 @@ class Bs4Config:
     follow_link: str
     inner_link_tag: str
     elements_path: Bs4ElementPath
+    filters: dict[str, Any] | None = None
+    throttle: dict[str, Any] | None = None
+    follow_link_concurrency: int = 8
+    page_concurrency: int = 3
+    stop_at_watermark: bool = False
 
 
 @dataclass
@@ -78,6 +86,15 @@ class ApiConfig:
     inner_link_tag: str
     elements_path: ApiElementPath
     filters: dict[str, Any] | None = None
+    throttle: dict[str, Any] | None = None
+    follow_link_concurrency: int = 8
+    stop_at_watermark: bool = False
+    # Streamed jobs whose link is followed are held until the body is read, so those sources parse it whole
+    stream: bool | None = None
+
+    def __post_init__(self) -> None:
+        if self.stream is None:
+            self.stream = self.follow_link != "yes"
 
 
 @dataclass
@@ -90,47 +107,65 @@ class RssConfig:
     location_tag: str
     follow_link: str
     inner_link_tag: str
+    filters: dict[str, Any] | None = None
+    throttle: dict[str, Any] | None = None
+    follow_link_concurrency: int = 8
+    stop_at_watermark: bool = False
 
 
 CustomCrawlFuncType: TypeAlias = Callable[
     [
-        Callable[[aiohttp.ClientSession], Coroutine[Any, Any, str]],
+        Callable[..., Coroutine[Any, Any, str | AsyncIterator[bytes] | None]],
         aiohttp.ClientSession,
         Bs4Config | ApiConfig | RssConfig,
-        sqlite3.Cursor,
-        bool,
+        CrawlContext,
     ],
-    Coroutine[Any, Any, dict[str, list[str]]],
+    Coroutine[Any, Any, int],
 ]
 
 @dataclass
-class Bs4Args:
+class CrawlArgs:
+    test: bool = False
+    db_path: str = DB_PATH
+    batch_size: int = 100
+    flush_interval: float = 2.0
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    scheduler: FetchScheduler | None = None
+    parse_executor: ParseExecutor | None = None
+    database: AsyncJobsDatabase | None = None
+    node_shard: int = 0
+    node_count: int = 1
+    shard: int = 0
+    shard_count: int = 1
+    spool_dir: str | None = None
+    metrics_dir: str | None = None
+    prometheus_dir: str | None = None
+    use_http_cache: bool = True
+    use_detail_cache: bool = True
+
+
+@dataclass
+class Bs4Args(CrawlArgs):
     config: type[Bs4Config] = Bs4Config
     custom_crawl_func: CustomCrawlFuncType = async_bs4_crawl
     custom_clean_func: Callable[[pd.DataFrame], pd.DataFrame] = clean_postgre_bs4
-    test: bool = False
-    db_path: str = DB_PATH
     json_prod_path: str = bs4_json_prod
     json_test_path: str = bs4_json_test
 
 
 @dataclass
-class ApiArgs:
+class ApiArgs(CrawlArgs):
     config: type[ApiConfig] = ApiConfig
     custom_crawl_func: CustomCrawlFuncType = async_api_requests
     custom_clean_func: Callable[[pd.DataFrame], pd.DataFrame] = clean_postgre_api
-    test: bool = False
-    db_path: str = DB_PATH
     json_prod_path: str = api_json_prod
     json_test_path: str = api_json_test
 
 
 @dataclass
-class RssArgs:
+class RssArgs(CrawlArgs):
     config: type[RssConfig] = RssConfig
     custom_crawl_func: CustomCrawlFuncType = async_rss_reader
     custom_clean_func: Callable[[pd.DataFrame], pd.DataFrame] = clean_postgre_rss
-    test: bool = False
-    db_path: str = DB_PATH
     json_prod_path: str = rss_json_prod
-    json_test_path: str = rss_json_test
\ No newline at end of file
+    json_test_path: str = rss_json_test
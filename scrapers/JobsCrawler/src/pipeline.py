@@ -0,0 +1,221 @@
+"""
+Streaming crawl-to-database pipeline.
+
+Crawlers emit the jobs they extract into an ``IngestPipeline`` as soon as a page
+(or feed, or API payload) has been processed. A single consumer task drains the
+queue in micro-batches and hands each batch to a processing callback that
+cleans, tags and stores it. Memory is bounded by the queue and batch sizes
+instead of by the size of the whole crawl, and rows reach the database while the
+rest of the sites are still being crawled.
+
+A batch mixes the jobs of several sources. When it fails, the jobs of each
+source are processed again on their own, so a source whose jobs cannot be
+stored only loses its own.
+"""
+import asyncio
+import inspect
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+import pandas as pd
+
+from src.db import CrawlState, LinkIndex
+from src.utils.logger_helper import get_custom_logger
+from src.utils.metrics import RunMetrics
+from src.utils.parsing import INLINE_PARSER, ParseExecutor
+
+logger = get_custom_logger(__name__)
+
+JOB_FIELDS = ("title", "link", "description", "pubdate", "location", "timestamp")
+
+# Queue marker telling the consumer that no more records will arrive
+_CLOSED = object()
+
+
+def empty_rows() -> dict[str, list[Any]]:
+    """Return an empty column-oriented container for extracted jobs."""
+    return {key: [] for key in JOB_FIELDS}
+
+
+class IngestPipeline:
+    """
+    Bounded queue of job records drained in micro-batches.
+
+    Args:
+        process_batch: Callback receiving each micro-batch as a DataFrame with the
+            ``JOB_FIELDS`` columns. It returns the number of rows it stored, or
+            a coroutine resolving to it, which is awaited before the next batch.
+        batch_size: Maximum number of records per micro-batch.
+        flush_interval: Seconds to wait for a batch to fill up before processing
+            whatever has arrived.
+        max_queued: Maximum number of records waiting in the queue. Producers
+            wait when it is full. Defaults to four batches.
+
+    Attributes
+    ----------
+        failed_batches: Number of batches, or of a failed batch's per-source parts, that could not be stored.
+        failed_sources: Sources that lost jobs to a failed batch.
+
+    Methods
+    -------
+        emit(): Queue the rows extracted from one source, one record per job.
+        run(): Consume the queue until ``close()`` is called.
+        close(): Flush the remaining records and stop the consumer.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[pd.DataFrame], int | Awaitable[int]],
+        batch_size: int = 100,
+        flush_interval: float = 2.0,
+        max_queued: int | None = None,
+    ) -> None:
+        self.process_batch = process_batch
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queued or self.batch_size * 4)
+        self.records_emitted = 0
+        self.rows_stored = 0
+        self.failed_batches = 0
+        self.failed_sources: set[str] = set()
+        self._consumer: asyncio.Task | None = None
+
+    async def emit(self, rows: dict[str, list[Any]], source: str) -> int:
+        """
+        Queue the jobs extracted from ``source``.
+
+        Rows whose columns have uneven lengths are dropped with an error, so a
+        broken source never corrupts the records of the others.
+
+        Args:
+            rows: Column-oriented jobs, keyed by ``JOB_FIELDS``.
+            source: Name of the source, used for logging and to isolate its jobs when a batch fails.
+
+        Returns
+        -------
+            int: Number of records queued.
+        """
+        columns = [rows.get(key, []) for key in JOB_FIELDS]
+        lengths = {key: len(column) for key, column in zip(JOB_FIELDS, columns)}
+        if len(set(lengths.values())) != 1:
+            logger.error(
+                f"❌ Data from {source} has uneven entries. Dropping it to avoid data corruption. "
+                f"Data lengths: {lengths}"
+            )
+            return 0
+
+        count = 0
+        for values in zip(*columns):
+            await self.queue.put((source, dict(zip(JOB_FIELDS, values))))
+            count += 1
+
+        self.records_emitted += count
+        logger.debug(f"Queued {count} jobs from {source}")
+        return count
+
+    def start(self) -> asyncio.Task:
+        """Start the consumer task."""
+        if self._consumer is None:
+            self._consumer = asyncio.ensure_future(self.run())
+        return self._consumer
+
+    async def close(self) -> None:
+        """Flush the remaining records and wait for the consumer to finish."""
+        await self.queue.put(_CLOSED)
+        if self._consumer is not None:
+            await self._consumer
+
+    async def run(self) -> None:
+        while True:
+            batch, closed = await self._next_batch()
+            if batch:
+                await self._flush(batch)
+            if closed:
+                return
+
+    async def _next_batch(self) -> tuple[list[tuple[str, dict[str, Any]]], bool]:
+        loop = asyncio.get_running_loop()
+        batch: list[tuple[str, dict[str, Any]]] = []
+        deadline: float | None = None
+
+        while len(batch) < self.batch_size:
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            try:
+                record = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:  # noqa: UP041
+                break
+
+            if record is _CLOSED:
+                return batch, True
+
+            batch.append(record)
+            if deadline is None:
+                deadline = loop.time() + self.flush_interval
+
+        return batch, False
+
+    async def _flush(self, batch: list[tuple[str, dict[str, Any]]]) -> None:
+        by_source: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        for source, record in batch:
+            by_source[source].append(record)
+
+        try:
+            self.rows_stored += await self._process([record for _, record in batch])
+            return
+        except Exception as e:
+            if len(by_source) == 1:
+                self._record_failure(next(iter(by_source)), len(batch), e)
+                return
+            logger.warning(
+                f"{type(e).__name__} while processing a batch of {len(batch)} jobs from {len(by_source)} sources. "
+                f"Retrying each source on its own.\n{e}"
+            )
+
+        for source, records in by_source.items():
+            try:
+                self.rows_stored += await self._process(records)
+            except Exception as e:
+                self._record_failure(source, len(records), e)
+
+    async def _process(self, records: list[dict[str, Any]]) -> int:
+        stored = self.process_batch(pd.DataFrame.from_records(records, columns=JOB_FIELDS))
+        if inspect.isawaitable(stored):
+            stored = await stored
+        return stored
+
+    def _record_failure(self, source: str, count: int, error: Exception) -> None:
+        self.failed_batches += 1
+        self.failed_sources.add(source)
+        logger.error(
+            f"{type(error).__name__} while processing {count} jobs from {source}. They are lost.\n{error}",
+            exc_info=error,
+        )
+
+
+@dataclass
+class CrawlContext:
+    """
+    Per-run state handed to the crawl functions.
+
+    Attributes
+    ----------
+        link_index: Links already stored in the target table
+        pipeline: Pipeline the extracted jobs are emitted into
+        test: Whether the crawl targets the test table
+        parser: Executor the fetched pages and feeds are parsed with
+        state: Watermarks of the sources, see ``src/db/crawl_state.py``
+        metrics: Timings and counters of the run, see ``src/utils/metrics.py``
+        extracted: Source of each listing page, feed or payload whose jobs were all
+            emitted, by URL. Its cache validators are saved once the jobs of that
+            source are stored.
+    """
+
+    link_index: LinkIndex
+    pipeline: IngestPipeline
+    test: bool = False
+    parser: ParseExecutor = field(default=INLINE_PARSER)
+    state: CrawlState = field(default_factory=CrawlState)
+    metrics: RunMetrics = field(default_factory=RunMetrics)
+    extracted: dict[str, str] = field(default_factory=dict)
@@ -1,7 +1,9 @@
 import aiohttp
-import bs4
 
+from src.db.detail_cache import DetailResult, fetch_detail
 from src.utils.logger_helper import get_custom_logger
+from src.utils.parsing import INLINE_PARSER, ParseExecutor, extract_text, select_texts
+from src.utils.scheduler import FETCH_ERRORS
 
 logger = get_custom_logger(__name__)
 
@@ -11,32 +13,49 @@ async def async_follow_link(
     description_final: str,
     inner_link_tag: str,
     default: str = "NaN",
+    parser: ParseExecutor = INLINE_PARSER,
 ) -> str:
-    async with session.get(followed_link) as link_res:
-        if link_res.status == 200:
+    async def fetch() -> DetailResult:
+        async with session.get(followed_link) as link_res:
+            if link_res.status != 200:
+                return link_res.status, None
             logger.info(f"""CONNECTION ESTABLISHED ON {followed_link}\n""")
             link_text = await link_res.text()
-            link_soup = bs4.BeautifulSoup(link_text, "html.parser")
-            description_tag = link_soup.select_one(inner_link_tag)
-            if description_tag:
-                description_final = description_tag.text
-                return description_final
-            else:
-                logger.warning(f"No description tag found by 'async_follow_link()' while following: {followed_link}. Setting the description to default.")
-                description_final = default
-                return description_final
-        elif link_res.status == 403:
-            logger.warning(
-                f"""CONNECTION PROHIBITED WITH BS4 ON 'async_follow_link()'. FOLLOWING: {followed_link}. STATUS CODE: "{link_res.status}". SETTING DESCRIPTION TO DEFAULT."""
-            )
-            description_final = default
+            return link_res.status, await parser.run(extract_text, link_text, inner_link_tag)
+
+    try:
+        status, description_text = await fetch_detail(session, followed_link, inner_link_tag, fetch)
+    except FETCH_ERRORS as e:
+        logger.warning(
+            f"Could not follow {followed_link} with 'async_follow_link()': {type(e).__name__}: {e}."
+            " Setting the description to default."
+        )
+        return default
+    if status == 200:
+        if description_text is not None:
+            description_final = description_text
             return description_final
         else:
             logger.warning(
-                f"""UNEXPECTED STATUS CODE WITH BS4 ON 'async_follow_link()'. FOLLOWING: {followed_link}. STATUS CODE: "{link_res.status}". SETTING DESCRIPTION TO DEFAULT."""
+                f"No description tag found by 'async_follow_link()' while following: {followed_link}."
+                " Setting the description to default."
             )
             description_final = default
             return description_final
+    elif status == 403:
+        logger.warning(
+            f"""CONNECTION PROHIBITED WITH BS4 ON 'async_follow_link()'. FOLLOWING: {followed_link}."""
+            f""" STATUS CODE: "{status}". SETTING DESCRIPTION TO DEFAULT."""
+        )
+        description_final = default
+        return description_final
+    else:
+        logger.warning(
+            f"""UNEXPECTED STATUS CODE WITH BS4 ON 'async_follow_link()'. FOLLOWING: {followed_link}."""
+            f""" STATUS CODE: "{status}". SETTING DESCRIPTION TO DEFAULT."""
+        )
+        description_final = default
+        return description_final
 
 
 async def async_follow_link_title_description(
@@ -46,30 +65,48 @@ async def async_follow_link_title_description(
     inner_link_tag: str,
     title_inner_link_tag: str,
     default: str = "NaN",
+    parser: ParseExecutor = INLINE_PARSER,
 ):
-    async with session.get(followed_link) as link_res:
-        if link_res.status == 200:
+    async def fetch() -> DetailResult:
+        async with session.get(followed_link) as link_res:
+            if link_res.status != 200:
+                return link_res.status, None
             logger.debug(f"""CONNECTION ESTABLISHED ON {followed_link}\n""")
             link_text = await link_res.text()
-            link_soup = bs4.BeautifulSoup(link_text, "html.parser")
-            title_tag = link_soup.select_one(title_inner_link_tag)
-            description_tag = link_soup.select_one(inner_link_tag)
-            title_final = title_tag.text if title_tag else default
-            description_final = description_tag.text if description_tag else default
-            return title_final, description_final
-
-        elif link_res.status == 403:
-            logger.warning(
-                f"""CONNECTION PROHIBITED WITH BS4 ON 'async_follow_link_title_description()'. FOLLOWING: {followed_link}. STATUS CODE: "{link_res.status}". SETTING DESCRIPTION TO DEFAULT."""
-            )
-            description_final = "NaN"
-            return description_final
-        else:
-            logger.warning(
-                f"""UNEXPECTED STATUS CODE WITH BS4 ON 'async_follow_link()'. FOLLOWING: {followed_link}. STATUS CODE: "{link_res.status}". SETTING DESCRIPTION TO DEFAULT."""
+            return link_res.status, await parser.run(
+                select_texts, link_text, (title_inner_link_tag, inner_link_tag)
             )
-            description_final = default
-            return description_final
+
+    try:
+        status, texts = await fetch_detail(
+            session, followed_link, f"{title_inner_link_tag}\n{inner_link_tag}", fetch
+        )
+    except FETCH_ERRORS as e:
+        logger.warning(
+            f"Could not follow {followed_link} with 'async_follow_link_title_description()': {type(e).__name__}: {e}."
+            " Setting the description to default."
+        )
+        return default
+    if status == 200:
+        title_text, description_text = texts
+        title_final = title_text if title_text is not None else default
+        description_final = description_text if description_text is not None else default
+        return title_final, description_final
+
+    elif status == 403:
+        logger.warning(
+            """CONNECTION PROHIBITED WITH BS4 ON 'async_follow_link_title_description()'."""
+            f""" FOLLOWING: {followed_link}. STATUS CODE: "{status}". SETTING DESCRIPTION TO DEFAULT."""
+        )
+        description_final = "NaN"
+        return description_final
+    else:
+        logger.warning(
+            f"""UNEXPECTED STATUS CODE WITH BS4 ON 'async_follow_link()'. FOLLOWING: {followed_link}."""
+            f""" STATUS CODE: "{status}". SETTING DESCRIPTION TO DEFAULT."""
+        )
+        description_final = default
+        return description_final
 
 
 
@@ -126,35 +163,43 @@ async def async_follow_link_indeed(followed_link, inner_link_tag, driver, fetch_
 
 
 async def async_follow_link_echojobs(
-    session: aiohttp.ClientSession, url_to_follow: str, selector: str, default: str
+    session: aiohttp.ClientSession,
+    url_to_follow: str,
+    selector: str,
+    default: str,
+    parser: ParseExecutor = INLINE_PARSER,
 ):
-    async with session.get(url_to_follow) as r:
-        try:
-            if r.status == 200:
-                logger.debug(
-                    f"""CONNECTION ESTABLISHED ON {url_to_follow}. USING FollowLinkEchoJobs()\n"""
-                )
-
-                request = await r.text()
+    css_selector = "div." + ".".join(selector.split())
+
+    async def fetch() -> DetailResult:
+        async with session.get(url_to_follow) as r:
+            if r.status != 200:
+                return r.status, None
+            logger.debug(
+                f"""CONNECTION ESTABLISHED ON {url_to_follow}. USING FollowLinkEchoJobs()\n"""
+            )
 
-                soup = bs4.BeautifulSoup(request, "html.parser")
+            request = await r.text()
 
-                div_tag = soup.find("div", {"class": selector})
+            return r.status, await parser.run(extract_text, request, css_selector)
 
-                if div_tag:
-                    description_text = div_tag.get_text()
-                    return description_text
-                else:
-                    logger.warning(
-                        f"Setting description to default at AsyncFollowLinkEchoJobs().\nFollowing {url_to_follow}\n"
-                    )
-                    return default
+    try:
+        status, description_text = await fetch_detail(session, url_to_follow, css_selector, fetch)
+        if status == 200:
+            if description_text is not None:
+                return description_text
             else:
                 logger.warning(
-                    f"""CONNECTION FAILED ON {url_to_follow}. STATUS CODE: "{r.status}". Setting description to default."""
+                    f"Setting description to default at AsyncFollowLinkEchoJobs().\nFollowing {url_to_follow}\n"
                 )
                 return default
-        except Exception as e:
+        else:
             logger.warning(
-                f"Exception at AsyncFollowLinkEchoJobs(). Following {url_to_follow}\n {e}"
+                f"""CONNECTION FAILED ON {url_to_follow}. STATUS CODE: "{status}". Setting description to default."""
             )
+            return default
+    except Exception as e:
+        logger.warning(
+            f"Exception at AsyncFollowLinkEchoJobs(). Following {url_to_follow}\n {e}"
+        )
+        return default
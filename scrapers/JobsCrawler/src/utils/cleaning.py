@@ -0,0 +1,120 @@
+"""
+Text cleaning shared by the bs4, API and RSS crawlers.
+
+Each strategy used to chain about ten ``Series.str.replace`` calls over the
+location column, allocating a new Series per pass and recompiling the regexes
+on every run. Here the patterns are compiled once, every cleaner is a plain
+function that runs all of its substitutions over one string, and each distinct
+value of a column is cleaned only once.
+
+What gets cleaned for each strategy is declared in ``CLEANING_PROFILES``.
+"""
+import re
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+# Remove html tags & other characters
+_HTML_AND_PUNCTUATION = re.compile(r'<.*?>|[{}[\]\'",]')
+# Removes repeated words
+_REPEATED_WORDS = re.compile(r"\b(\w+)\s+\1\b")
+# Remove dates in the format "YYYY-MM-DD"
+_ISO_DATES = re.compile(r"\d{4}-\d{2}-\d{2}")
+# Remove USD\d+-\d+/yr or GBP\d+-\d+/yr
+_YEARLY_SALARIES = re.compile(r"(USD|GBP)\d+-\d+/yr")
+# Dashes and slashes become spaces
+_DASHES_AND_SLASHES = re.compile(r"[-/]")
+# Insert space between lowercase and uppercase letters
+_CAMEL_CASE_BOUNDARY = re.compile(r"(?<=[a-z])(?=[A-Z])")
+# All the outliers that use remote to mean anywhere
+_REMOTE_OUTLIERS = re.compile(
+    r"(?i)\bRemote Job\b|\bRemote Work\b|\bRemote Office\b|\bRemote Global\b|\bRemote with frequent travel\b"
+)
+_REMOTE_ONLY = re.compile(r"(?i)^remote$")
+
+
+def clean_text(value: str) -> str:
+    """Strip html tags, brackets, quotes and commas from a title or description."""
+    return _HTML_AND_PUNCTUATION.sub("", value)
+
+
+def clean_location(value: str) -> str:
+    """Normalize a location string in a single pass over it."""
+    value = _HTML_AND_PUNCTUATION.sub("", value)
+    value = _REPEATED_WORDS.sub(r"\1", value)
+    value = _ISO_DATES.sub("", value)
+    value = _YEARLY_SALARIES.sub("", value)
+    value = _DASHES_AND_SLASHES.sub(" ", value)
+    value = _CAMEL_CASE_BOUNDARY.sub(" ", value)
+    value = _REMOTE_OUTLIERS.sub("Worldwide", value)
+    value = _REMOTE_ONLY.sub("Worldwide", value)
+    return value.strip()
+
+
+CLEANERS: dict[str, Callable[[str], str]] = {
+    "text": clean_text,
+    "location": clean_location,
+}
+
+
+@dataclass(frozen=True)
+class CleaningProfile:
+    """
+    How a crawl strategy cleans its DataFrame before it is tagged and stored.
+
+    Attributes
+    ----------
+        drop_duplicates: Whether to drop duplicated rows first
+        columns: Column name -> name of the cleaner in ``CLEANERS``
+    """
+
+    drop_duplicates: bool = True
+    columns: dict[str, str] = field(default_factory=dict)
+
+
+CLEANING_PROFILES: dict[str, CleaningProfile] = {
+    "bs4": CleaningProfile(
+        drop_duplicates=True,
+        columns={"title": "text", "description": "text", "location": "location"},
+    ),
+    "api": CleaningProfile(
+        drop_duplicates=False,
+        columns={"description": "text", "location": "location"},
+    ),
+    "rss": CleaningProfile(
+        drop_duplicates=True,
+        columns={"description": "text", "location": "location"},
+    ),
+}
+
+
+def clean_series(series: pd.Series, cleaner: Callable[[str], str]) -> pd.Series:
+    """Apply ``cleaner`` to the string form of a Series, once per distinct value."""
+    values = series.astype(str)
+    cleaned = {value: cleaner(value) for value in values.unique()}
+    return values.map(cleaned)
+
+
+def clean_jobs_df(df: pd.DataFrame, profile: CleaningProfile) -> pd.DataFrame:
+    """
+    Clean a DataFrame of crawled jobs according to a profile.
+
+    Args:
+        df: DataFrame containing job listing data
+        profile: What to clean, usually one of ``CLEANING_PROFILES``
+
+    Returns
+    -------
+        A cleaned copy of ``df``, the input frame is not modified
+    """
+    if profile.drop_duplicates:
+        df = df.drop_duplicates()
+
+    cleaned_columns = {
+        col: clean_series(df[col], CLEANERS[cleaner_name])
+        for col, cleaner_name in profile.columns.items()
+        if col in df.columns and not df[col].empty
+    }
+
+    return df.assign(**cleaned_columns)
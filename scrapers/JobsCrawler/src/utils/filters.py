@@ -0,0 +1,128 @@
+"""
+Keyword filters applied to crawled jobs.
+
+Every crawler rejects jobs on their title and listing description before any
+link is followed, using the ``SKIP_TITLE_KEYWORDS`` of ``config.py`` plus the
+optional ``filters`` of each config entry. The CLI scripts use the same
+matchers, registered as SQLite functions.
+
+Keywords match case-insensitively at the start of a word, so plurals and
+derived words match too: ``intern`` matches "Intern", "Internship" and
+"Internal tools", ``analyst`` matches "Analysts", but ``manager`` doesn't
+match "Taskmanager".
+All the keywords of a filter are compiled into a single alternation regex, so
+a title is scanned once no matter how many keywords there are.
+"""
+import re
+import sqlite3
+from collections.abc import Iterable
+from functools import cache
+from typing import Any
+
+from config import SKIP_TITLE_KEYWORDS
+from src.utils.logger_helper import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+
+@cache
+def _compile_keywords(keywords: tuple[str, ...]) -> re.Pattern | None:
+    if not keywords:
+        return None
+    # Longest first so "head of" wins over a shorter keyword sharing its start
+    alternation = "|".join(re.escape(keyword) for keyword in sorted(keywords, key=len, reverse=True))
+    # A lookbehind instead of \b so keywords starting with a symbol match too; any suffix is allowed
+    return re.compile(rf"(?<!\w)({alternation})\w*", re.IGNORECASE)
+
+
+def _as_keywords(value: str | Iterable[str] | None) -> tuple[str, ...]:
+    if not value:
+        return ()
+    if isinstance(value, str):
+        value = (value,)
+    return tuple(dict.fromkeys(keyword.strip().lower() for keyword in value if keyword.strip()))
+
+
+class KeywordMatcher:
+    """
+    Case-insensitive matcher for a set of keywords, each starting a word.
+
+    Args:
+        keywords: Keywords to look for; blanks and duplicates are ignored.
+    """
+
+    def __init__(self, keywords: str | Iterable[str] | None = None) -> None:
+        self.keywords = _as_keywords(keywords)
+        self.pattern = _compile_keywords(self.keywords)
+
+    def __bool__(self) -> bool:
+        return self.pattern is not None
+
+    def search(self, text: Any) -> str | None:
+        """Return the first keyword found in ``text``, lowercased, or None."""
+        if self.pattern is None or text is None:
+            return None
+        match = self.pattern.search(str(text))
+        return match.group(1).lower() if match else None
+
+
+class JobFilter:
+    """
+    Accepts or rejects a job from its title and description.
+
+    Args:
+        exclude_title: Reject jobs whose title contains any of these keywords.
+        include_title: If given, reject jobs whose title contains none of these.
+        include_description: If given, reject jobs whose description contains none of these.
+
+    Methods
+    -------
+        from_filters(): Build the filter of a config entry.
+        rejection(): Return why a job is rejected, or None.
+        accepts(): Whether a job passes the filter.
+        register(): Register ``accepts`` as an SQLite function.
+    """
+
+    def __init__(
+        self,
+        exclude_title: str | Iterable[str] | None = None,
+        include_title: str | Iterable[str] | None = None,
+        include_description: str | Iterable[str] | None = None,
+    ) -> None:
+        self.exclude_title = KeywordMatcher(exclude_title)
+        self.include_title = KeywordMatcher(include_title)
+        self.include_description = KeywordMatcher(include_description)
+
+    @classmethod
+    def from_filters(cls, filters: dict[str, Any] | None = None) -> "JobFilter":
+        """
+        Build the filter of a config entry.
+
+        ``SKIP_TITLE_KEYWORDS`` are always excluded. ``filters`` may add
+        ``exclude_title``, ``include_title`` and ``description_contains``
+        (a keyword or a list of keywords, any of which must be present).
+        Other keys are source-specific and left to the crawler.
+        """
+        filters = filters or {}
+        return cls(
+            exclude_title=[*SKIP_TITLE_KEYWORDS, *_as_keywords(filters.get("exclude_title"))],
+            include_title=filters.get("include_title"),
+            include_description=filters.get("description_contains"),
+        )
+
+    def rejection(self, title: Any, description: Any = None) -> str | None:
+        keyword = self.exclude_title.search(title)
+        if keyword:
+            return f"title contains excluded keyword '{keyword}'"
+        if self.include_title and not self.include_title.search(title):
+            return "title has none of the required keywords"
+        if self.include_description and not self.include_description.search(description):
+            return "description has none of the required keywords"
+        return None
+
+    def accepts(self, title: Any, description: Any = None) -> bool:
+        return self.rejection(title, description) is None
+
+    def register(self, conn: sqlite3.Connection, name: str = "job_filter_accepts") -> None:
+        """Make ``name(title, description)`` usable in the queries of ``conn``."""
+        conn.create_function(name, 2, self.accepts, deterministic=True)
@@ -1,32 +1,42 @@
+import asyncio
 import smtplib
-import sqlite3
+from collections.abc import Awaitable, Iterable
 from email import encoders
 from email.mime.base import MIMEBase
 from email.mime.multipart import MIMEMultipart
+from typing import TypeVar
 
 """ LOAD THE ENVIRONMENT VARIABLES """
 
-async def link_exists_in_db(link: str, cur: sqlite3.Cursor, test: bool = False) -> bool:
+T = TypeVar("T")
+
+async def gather_bounded(aws: Iterable[Awaitable[T]], limit: int) -> list[T]:  # noqa: UP047
 	"""
-	Check if a link already exists in the database.
+	Await a batch of awaitables with at most ``limit`` of them running at once.
+
+	Results are returned in input order, like ``asyncio.gather``. If one of them
+	raises, the rest are cancelled and the exception is propagated.
 
 	Args:
-		link: The job link to check
-		cur: SQLite cursor
-		test: Whether to check in test table (default: False)
+		aws: Awaitables to run, typically one follow-link call per job
+		limit: Maximum number of awaitables in flight
 
 	Returns:
-		True if link exists, False otherwise
+		List with the result of each awaitable, in input order
 	"""
-	table = "test" if test else "main_jobs"
-
-	# SQLite uses ? for parameter placeholders instead of %s
-	query = f"SELECT EXISTS(SELECT 1 FROM {table} WHERE link=?)"
-	cur.execute(query, (link,))
+	semaphore = asyncio.Semaphore(max(1, limit))
 
-	result = cur.fetchone()
+	async def worker(aw: Awaitable[T]) -> T:
+		async with semaphore:
+			return await aw
 
-	return bool(result[0]) if result else False
+	tasks = [asyncio.ensure_future(worker(aw)) for aw in aws]
+	try:
+		return await asyncio.gather(*tasks)
+	except BaseException:
+		for task in tasks:
+			task.cancel()
+		raise
 
 
 """ OTHER UTILS """
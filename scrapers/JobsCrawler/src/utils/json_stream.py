@@ -0,0 +1,151 @@
+"""
+Incremental parsing of the job list in a JSON API payload.
+
+``json.loads(await response.text())`` keeps the raw bytes, the decoded text and
+the whole parsed document in memory before the first job is looked at. The
+scanner below reads the body chunk by chunk, only tracking nesting and string
+state, and decodes one element of the job array at a time, so the memory used
+per source is about one chunk plus one job.
+
+Elements are decoded with ``orjson`` when it is installed, ``json`` otherwise.
+"""
+import json
+import re
+from collections.abc import AsyncIterable, AsyncIterator
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Outside strings only these bytes change the scanner state
+_STRUCTURAL = re.compile(rb'[\[\]{}",]')
+# A complete string token, escapes included; no match means it continues in the next chunk
+_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+
+_OBJECT, _ARRAY = ord("{"), ord("[")
+
+
+class JsonArrayScanner:
+    """
+    Push parser yielding the elements of one array of a JSON document.
+
+    The document is not validated beyond what is needed to find the array and
+    split its elements; each element is decoded on its own.
+
+    Args:
+        dict_tag: Key of the array in the top-level object, or ``""`` when the
+            document itself is the array.
+
+    Methods
+    -------
+        feed(): Consume a chunk and return the elements it completed.
+        close(): Check that the array was found and fully read.
+    """
+
+    def __init__(self, dict_tag: str = "") -> None:
+        self.dict_tag = dict_tag
+        self.done = False
+        self._buf = bytearray()
+        self._pos = 0
+        self._stack: list[int] = []
+        self._expect_key = False
+        self._key: str | None = None
+        self._array_depth: int | None = None
+        self._item_start: int | None = None
+
+    def feed(self, chunk: bytes) -> list[Any]:
+        if self.done:
+            return []
+
+        self._buf += chunk
+        buf, pos, stack = self._buf, self._pos, self._stack
+        items = []
+        while not self.done:
+            match = _STRUCTURAL.search(buf, pos)
+            if match is None:
+                pos = len(buf)
+                break
+            char = buf[match.start()]
+
+            if char == ord('"'):
+                string = _STRING.match(buf, match.start())
+                if string is None:
+                    pos = match.start()
+                    break
+                pos = string.end()
+                if self._expect_key and len(stack) == 1:
+                    self._key = json.loads(string.group())
+                self._expect_key = False
+                continue
+
+            pos = match.end()
+            if char in b"{[":
+                if not stack and (char == _OBJECT) != bool(self.dict_tag):
+                    expected = f"an object with a '{self.dict_tag}' list" if self.dict_tag else "a list"
+                    raise ValueError(f"Expected {expected} at the top level of the JSON document")
+                is_target = not stack or (len(stack) == 1 and self._key == self.dict_tag)
+                if self._array_depth is None and char == _ARRAY and is_target:
+                    self._array_depth = len(stack) + 1
+                    self._item_start = pos
+                stack.append(char)
+                self._expect_key = char == _OBJECT
+            elif char in b"]}":
+                if not stack:
+                    raise ValueError("Unbalanced JSON document")
+                if len(stack) == self._array_depth:
+                    items.extend(self._take_item(pos - 1))
+                    self.done = True
+                stack.pop()
+            else:
+                if len(stack) == self._array_depth:
+                    items.extend(self._take_item(pos - 1))
+                    self._item_start = pos
+                self._expect_key = bool(stack) and stack[-1] == _OBJECT
+
+        self._compact(pos)
+        return items
+
+    def _take_item(self, end: int) -> list[Any]:
+        raw = bytes(self._buf[self._item_start:end]).strip()
+        return [_loads(raw)] if raw else []
+
+    def _compact(self, pos: int) -> None:
+        """Drop the consumed part of the buffer, keeping the element being read."""
+        keep = pos if self._item_start is None or self.done else min(pos, self._item_start)
+        del self._buf[:keep]
+        self._pos = pos - keep
+        if self._item_start is not None:
+            self._item_start -= keep
+
+    def close(self) -> None:
+        if self.done:
+            return
+        if self._array_depth is None:
+            where = f"under '{self.dict_tag}'" if self.dict_tag else "at the top level"
+            raise ValueError(f"No JSON list found {where}")
+        raise ValueError("The JSON document ended inside the job list")
+
+
+async def iter_json_items(chunks: AsyncIterable[bytes], dict_tag: str = "") -> AsyncIterator[Any]:
+    """
+    Yield the elements of the array under ``dict_tag`` as the body arrives.
+
+    Reading stops as soon as the array is closed.
+
+    Raises
+    ------
+        ValueError: If the document has no such array or is truncated
+    """
+    scanner = JsonArrayScanner(dict_tag)
+    async for chunk in chunks:
+        for item in scanner.feed(chunk):
+            yield item
+        if scanner.done:
+            return
+    scanner.close()
@@ -0,0 +1,200 @@
+"""
+Location tagging backed by a precompiled lookup index over ``WorldLocations.json``.
+
+The JSON tree maps continents to zones and countries, and every country to the
+names and codes that refer to it. ``LocationIndex`` flattens that tree once into
+a dict from normalized (upper-case, single-spaced) tokens and phrases to their
+canonical tag, so tagging a word is a single dict lookup.
+
+The flattened index is cached next to the JSON file and rebuilt whenever the
+JSON content changes.
+
+``tag_location`` tokenizes a raw location string and matches the longest known
+phrase at each position, and ``tag_locations`` applies it to a Series once per
+unique value.
+"""
+import hashlib
+import json
+import os
+from functools import cache
+from typing import Any
+
+import pandas as pd
+
+from src.utils.logger_helper import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+INDEX_CACHE_VERSION = 1
+
+# Characters dropped from a location before tokenizing; "|" separates words
+_LOCATION_TRANSLATION = str.maketrans({",": None, "(": None, ")": None, "[": None, "]": None, "'": None, "|": " "})
+
+
+def normalize_phrase(phrase: str) -> str:
+    """Upper-case a phrase and collapse its whitespace to single spaces."""
+    return " ".join(phrase.upper().split())
+
+
+def _file_sha256(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _default_cache_path(json_path: str) -> str:
+    root, _ = os.path.splitext(json_path)
+    return f"{root}.index.json"
+
+
+class LocationIndex:
+    """
+    Dict-backed lookup from location tokens and phrases to location tags.
+
+    Attributes
+    ----------
+        lookup (dict[str, str]): Normalized phrase -> tag.
+        max_phrase_words (int): Number of words in the longest phrase of the index.
+
+    Methods
+    -------
+        from_location_data(): Flatten a parsed WorldLocations tree.
+        load(): Load the index for a JSON file, using the on-disk cache when valid.
+        tag(): Return the tag of a token or phrase, or "" if unknown.
+    """
+
+    def __init__(self, lookup: dict[str, str]) -> None:
+        self.lookup = lookup
+        self.max_phrase_words = max((len(key.split()) for key in lookup), default=1)
+
+    @classmethod
+    def from_location_data(cls, location_data: dict[str, Any]) -> "LocationIndex":
+        """
+        Flatten a WorldLocations tree into a lookup dict.
+
+        Continents and zones map to themselves, countries and their locations map
+        to the country name. Entries are visited in file order and the first tag
+        registered for a phrase wins, mirroring a top-down search of the tree.
+        """
+        lookup: dict[str, str] = {}
+
+        def register(phrase: str, tag: str) -> None:
+            lookup.setdefault(normalize_phrase(phrase), tag)
+
+        for continent, countries in location_data.items():
+            register(continent, continent.upper())
+            for zone in countries["Zones"]:
+                register(zone, zone)
+            for country in countries["Countries"]:
+                for country_name, locations in country.items():
+                    register(country_name, country_name)
+                    for location in locations:
+                        register(location, country_name)
+
+        return cls(lookup)
+
+    @classmethod
+    def load(cls, json_path: str, cache_path: str | None = None) -> "LocationIndex":
+        """
+        Load the index for ``json_path``.
+
+        The cache file stores the SHA-256 of the JSON it was built from; if it is
+        missing, stale or unreadable the index is rebuilt and the cache rewritten.
+
+        Args:
+            json_path: Path to a WorldLocations JSON file.
+            cache_path: Where to cache the flattened index. Defaults to
+                ``<json_path without extension>.index.json``.
+
+        Returns
+        -------
+            LocationIndex: Index for the current content of ``json_path``.
+        """
+        cache_path = cache_path or _default_cache_path(json_path)
+        source_hash = _file_sha256(json_path)
+
+        try:
+            with open(cache_path) as f:
+                cached = json.load(f)
+            if cached.get("version") == INDEX_CACHE_VERSION and cached.get("source_sha256") == source_hash:
+                logger.debug(f"Loaded location index from {cache_path}")
+                return cls(cached["lookup"])
+        except (OSError, ValueError, KeyError):
+            pass
+
+        with open(json_path) as f:
+            index = cls.from_location_data(json.load(f))
+
+        try:
+            with open(cache_path, "w") as f:
+                json.dump({"version": INDEX_CACHE_VERSION, "source_sha256": source_hash, "lookup": index.lookup}, f)
+            logger.info(f"Built location index with {len(index.lookup)} entries, cached at {cache_path}")
+        except OSError as e:
+            logger.warning(f"Could not cache location index at {cache_path}: {e}")
+
+        return index
+
+    def tag(self, phrase: str) -> str:
+        """Return the tag of a token or phrase, or an empty string if it isn't a known location."""
+        return self.lookup.get(normalize_phrase(phrase), "")
+
+
+@cache
+def get_location_index(json_path: str) -> LocationIndex:
+    """Return the process-wide ``LocationIndex`` for a WorldLocations JSON file."""
+    return LocationIndex.load(json_path)
+
+
+def tokenize_location(location: str) -> list[str]:
+    """Split a raw location string into words, dropping separators and brackets."""
+    return location.translate(_LOCATION_TRANSLATION).split()
+
+
+def tag_location(location: str, index: LocationIndex) -> tuple[str, list[str]]:
+    """
+    Tag a single location string.
+
+    Walks the tokens left to right and, at each position, matches the longest
+    phrase (up to ``index.max_phrase_words`` words) present in the index.
+    Unmatched words are skipped.
+
+    Args:
+        location: Raw location string, e.g. "Remote (New York City | UK)".
+        index: Location index to match against.
+
+    Returns
+    -------
+        tuple[str, list[str]]: The location with its tokens joined by single spaces
+        and the unique tags found, in order of first appearance.
+    """
+    tokens = tokenize_location(location)
+    words = [token.upper() for token in tokens]
+    tags: dict[str, None] = {}
+
+    i = 0
+    while i < len(words):
+        for size in range(min(index.max_phrase_words, len(words) - i), 0, -1):
+            tag = index.lookup.get(" ".join(words[i:i + size]))
+            if tag:
+                tags.setdefault(tag)
+                i += size
+                break
+        else:
+            i += 1
+
+    return " ".join(tokens), list(tags)
+
+
+def tag_locations(locations: pd.Series, index: LocationIndex) -> tuple[pd.Series, pd.Series]:
+    """
+    Tag a Series of location strings, computing each distinct value only once.
+
+    Returns
+    -------
+        tuple[pd.Series, pd.Series]: Cleaned locations and lists of tags, aligned with ``locations``.
+    """
+    locations = locations.astype(str)
+    tagged = {value: tag_location(value, index) for value in locations.unique()}
+
+    cleaned = locations.map({value: result[0] for value, result in tagged.items()})
+    tags = locations.map({value: result[1] for value, result in tagged.items()})
+    return cleaned, tags
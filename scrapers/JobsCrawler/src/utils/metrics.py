@@ -0,0 +1,300 @@
+"""
+Per-stage timings and counters of a crawl run.
+
+Every engine run records a ``RunMetrics``:
+
+- latency histograms per source and stage: ``throttle`` (waiting for the
+  scheduler), ``fetch``, ``parse``, ``dedup`` (watermark, link index and job
+  filter), ``follow_link`` (resolving one job's description, fetch included),
+  and the batch stages ``clean``, ``tag`` and ``insert``,
+- bytes downloaded and HTTP status codes per source,
+- rows yielded per source and rows inserted per run.
+
+The source is the config a measure belongs to (its ``name``, or its ``url``).
+The engine sets it with ``source_scope`` around each config's crawl, and it
+follows every task the crawl starts, so deep helpers such as ``CrawlSession.get``
+record under the right source without taking it as an argument. Batches mix
+the jobs of every source, so the batch stages and the inserted rows are
+recorded under ``ALL_SOURCES``.
+
+At the end of the run the engine writes ``report()`` as JSON, and optionally a
+Prometheus textfile for the node exporter's textfile collector.
+"""
+import bisect
+import json
+import os
+import time
+from collections import defaultdict
+from collections.abc import AsyncIterator, Awaitable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+# Source of the measures not tied to one config, such as ingested batches
+ALL_SOURCES = "*"
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+PROMETHEUS_PREFIX = "jobscrawler"
+
+_current_source: ContextVar[str] = ContextVar("metrics_source", default=ALL_SOURCES)
+
+
+@contextmanager
+def source_scope(source: str) -> Iterator[None]:
+    """Record the measures taken in this block, and in the tasks it starts, under ``source``."""
+    token = _current_source.set(source)
+    try:
+        yield
+    finally:
+        _current_source.reset(token)
+
+
+def current_source() -> str:
+    return _current_source.get()
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram of durations in seconds.
+
+    Quantiles are estimated by interpolating inside the bucket they fall in,
+    so they are as precise as the buckets are narrow.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        # The last count is the overflow bucket, above every bound
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+    def cumulative(self) -> Iterator[tuple[float, int]]:
+        """Yield ``(upper bound, observations at or below it)``, ending with ``inf``."""
+        total = 0
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            total += count
+            yield bound, total
+
+    def summary(self) -> dict[str, float | int]:
+        return {
+            "count": self.count,
+            "seconds": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "p50": round(self.quantile(0.5), 6),
+            "p90": round(self.quantile(0.9), 6),
+            "p99": round(self.quantile(0.99), 6),
+            "max": round(self.max, 6),
+        }
+
+
+class RunMetrics:
+    """
+    Timings and counters of one engine run, keyed by source.
+
+    Args:
+        name: Name of the run, used for the report files, e.g. ``bs4`` or ``api_test``.
+        labels: Constant labels of the run, such as the strategy and the table,
+            copied into the report and onto every Prometheus sample.
+
+    Methods
+    -------
+        observe(): Record a duration for a stage.
+        timer(): Context manager timing a stage.
+        timed(): Await an awaitable, timing it as a stage.
+        timed_iter(): Iterate an async iterator, timing the waits for its items as a stage.
+        add(): Increase a counter.
+        record_response(): Count an HTTP response by status code.
+        report(): The measures as a JSON-serializable dict.
+        write_json(), write_prometheus(): Write the report to a file.
+    """
+
+    def __init__(self, name: str = "crawl", labels: dict[str, str] | None = None) -> None:
+        self.name = name
+        self.labels = dict(labels or {})
+        self.started_at = time.time()
+        self.finished_at: float | None = None
+        self.stages: dict[str, dict[str, Histogram]] = defaultdict(dict)
+        self.counters: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.status_codes: dict[str, dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    def observe(self, stage: str, seconds: float, source: str | None = None) -> None:
+        stages = self.stages[source or current_source()]
+        histogram = stages.get(stage)
+        if histogram is None:
+            histogram = stages[stage] = Histogram()
+        histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str, source: str | None = None) -> Iterator[None]:
+        """Time the block as ``stage``, whether it completes or raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started, source)
+
+    async def timed(self, stage: str, aw: Awaitable[T], source: str | None = None) -> T:
+        with self.timer(stage, source):
+            return await aw
+
+    async def timed_iter(self, stage: str, items: AsyncIterator[T], source: str | None = None) -> AsyncIterator[T]:
+        """
+        Yield the items of ``items``, recording the time spent waiting for them as one ``stage`` measure.
+
+        Used for streamed payloads, which are decoded as they are received.
+        """
+        waited = 0.0
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = await anext(items)
+                except StopAsyncIteration:
+                    return
+                finally:
+                    waited += time.perf_counter() - started
+                yield item
+        finally:
+            self.observe(stage, waited, source)
+
+    def add(self, counter: str, value: int = 1, source: str | None = None) -> None:
+        self.counters[source or current_source()][counter] += value
+
+    def record_response(self, status: int, size: int = 0, source: str | None = None) -> None:
+        """Count a response with ``status`` and ``size`` bytes of body."""
+        source = source or current_source()
+        self.status_codes[source][status] += 1
+        if size:
+            self.counters[source]["bytes_downloaded"] += size
+
+    def finish(self) -> None:
+        self.finished_at = time.time()
+
+    def report(self) -> dict[str, Any]:
+        """
+        Return the measures of the run.
+
+        ``sources`` holds the measures of every config, ``ingest`` those recorded
+        under ``ALL_SOURCES`` and ``totals`` the sum of both, to spot the stage
+        dominating the run before looking for the source dominating the stage.
+        """
+        finished_at = self.finished_at or time.time()
+        sections = {}
+        for source in sorted(self.stages.keys() | self.counters.keys() | self.status_codes.keys()):
+            sections[source] = {
+                "stages": {stage: h.summary() for stage, h in sorted(self.stages.get(source, {}).items())},
+                **dict(sorted(self.counters.get(source, {}).items())),
+                "status_codes": {str(code): n for code, n in sorted(self.status_codes.get(source, {}).items())},
+            }
+
+        stage_totals: dict[str, dict[str, float]] = {}
+        counter_totals: dict[str, int] = defaultdict(int)
+        code_totals: dict[str, int] = defaultdict(int)
+        for section in sections.values():
+            for stage, summary in section["stages"].items():
+                total = stage_totals.setdefault(stage, {"count": 0, "seconds": 0.0})
+                total["count"] += summary["count"]
+                total["seconds"] = round(total["seconds"] + summary["seconds"], 6)
+            for key, value in section.items():
+                if key not in ("stages", "status_codes"):
+                    counter_totals[key] += value
+            for code, n in section["status_codes"].items():
+                code_totals[code] += n
+
+        return {
+            "run": self.name,
+            **self.labels,
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds"),
+            "duration_seconds": round(finished_at - self.started_at, 3),
+            "totals": {
+                "stages": dict(sorted(stage_totals.items(), key=lambda item: -item[1]["seconds"])),
+                **dict(sorted(counter_totals.items())),
+                "status_codes": dict(sorted(code_totals.items())),
+            },
+            "ingest": sections.pop(ALL_SOURCES, {"stages": {}, "status_codes": {}}),
+            "sources": sections,
+        }
+
+    def write_json(self, path: str) -> None:
+        _write_atomic(path, json.dumps(self.report(), indent=2, ensure_ascii=False) + "\n")
+
+    def write_prometheus(self, path: str) -> None:
+        """Write the measures in the Prometheus text format, for the node exporter's textfile collector."""
+        _write_atomic(path, "".join(self._prometheus_lines()))
+
+    def _prometheus_lines(self) -> Iterator[str]:
+        prefix = PROMETHEUS_PREFIX
+
+        yield f"# HELP {prefix}_stage_duration_seconds Duration of the crawl stages.\n"
+        yield f"# TYPE {prefix}_stage_duration_seconds histogram\n"
+        for source, stages in sorted(self.stages.items()):
+            for stage, histogram in sorted(stages.items()):
+                labels = {"source": source, "stage": stage}
+                for bound, count in histogram.cumulative():
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    yield _sample(f"{prefix}_stage_duration_seconds_bucket", self.labels, {**labels, "le": le}, count)
+                yield _sample(f"{prefix}_stage_duration_seconds_sum", self.labels, labels, histogram.sum)
+                yield _sample(f"{prefix}_stage_duration_seconds_count", self.labels, labels, histogram.count)
+
+        yield f"# HELP {prefix}_http_responses_total HTTP responses received, by status code.\n"
+        yield f"# TYPE {prefix}_http_responses_total counter\n"
+        for source, codes in sorted(self.status_codes.items()):
+            for code, count in sorted(codes.items()):
+                labels = {"source": source, "code": str(code)}
+                yield _sample(f"{prefix}_http_responses_total", self.labels, labels, count)
+
+        names = sorted({counter for counters in self.counters.values() for counter in counters})
+        for counter in names:
+            yield f"# TYPE {prefix}_{counter}_total counter\n"
+            for source, counters in sorted(self.counters.items()):
+                if counter in counters:
+                    yield _sample(f"{prefix}_{counter}_total", self.labels, {"source": source}, counters[counter])
+
+        finished_at = self.finished_at or time.time()
+        yield f"# TYPE {prefix}_run_duration_seconds gauge\n"
+        yield _sample(f"{prefix}_run_duration_seconds", self.labels, {}, finished_at - self.started_at)
+        yield f"# TYPE {prefix}_run_finished_timestamp_seconds gauge\n"
+        yield _sample(f"{prefix}_run_finished_timestamp_seconds", self.labels, {}, finished_at)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _sample(metric: str, run_labels: dict[str, str], labels: dict[str, str], value: float) -> str:
+    pairs = ",".join(f'{key}="{_escape(str(val))}"' for key, val in {**run_labels, **labels}.items())
+    return f"{metric}{{{pairs}}} {value}\n" if pairs else f"{metric} {value}\n"
+
+
+def _write_atomic(path: str, text: str) -> None:
+    # Readers, like the textfile collector, never see a half-written file
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
@@ -0,0 +1,301 @@
+"""
+Off-loop parsing of fetched HTML pages and feeds.
+
+Building a BeautifulSoup tree or running feedparser is CPU bound and used to run
+on the event loop, stalling every other in-flight fetch while a large page was
+parsed. The extraction functions below take the raw document plus a selector
+spec and return only plain extracted values (strings, tuples, lists), so they
+can run in a worker process without shipping soup objects between processes.
+
+Detail pages are usually read for one or two selectors only, so their text is
+extracted through a pluggable backend (see ``EXTRACTION_BACKENDS``):
+
+- ``bs4``: full ``html.parser`` DOM, the reference behaviour.
+- ``strainer``: bs4 on lxml with a ``SoupStrainer`` built from the outermost
+  part of the selectors, so only the matching subtrees are turned into a tree.
+- ``selectolax``: the C-backed lexbor parser, when ``selectolax`` is installed.
+
+The default is ``selectolax`` if available, ``strainer`` otherwise, and can be
+overridden with the ``EXTRACTION_BACKEND`` environment variable.
+
+``ParseExecutor`` decides where each document is parsed: small documents are
+parsed inline because the round-trip to a worker costs more than the parse
+itself, larger ones go to a process pool.
+"""
+import asyncio
+import multiprocessing
+import os
+import re
+from collections.abc import Callable, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, TypeVar
+
+import feedparser
+from bs4 import BeautifulSoup, SoupStrainer
+
+from src.utils.logger_helper import get_custom_logger
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # optional dependency
+    LexborHTMLParser = None
+
+logger = get_custom_logger(__name__)
+
+T = TypeVar("T")
+
+# Documents smaller than this (in characters or bytes) are parsed on the event loop
+DEFAULT_INLINE_THRESHOLD = 32 * 1024
+DEFAULT_PARSE_WORKERS = min(4, os.cpu_count() or 1)
+
+# (title, href, description, location) as found on a listing page
+ListingRow = tuple[str, str, str, str]
+
+
+# Leading compound selector made of a tag name, classes and ids only, e.g. "div.job#main"
+_SIMPLE_COMPOUND = re.compile(r"^(?P<tag>[a-zA-Z][\w-]*)?(?P<rest>(?:[.#](?:[\w-]|\\.)+)*)$")
+_COMPOUND_PART = re.compile(r"([.#])((?:[\w-]|\\.)+)")
+_CSS_ESCAPE = re.compile(r"\\(.)")
+
+
+def _leading_strainer(selectors: Sequence[str]) -> SoupStrainer | None:
+    """
+    Build a strainer keeping the subtrees that can contain a match for every selector.
+
+    Only possible when all selectors start with the same simple compound and
+    use descendant or child combinators; returns None otherwise.
+    """
+    leading = {selector.split()[0] if selector.split() else "" for selector in selectors}
+    if len(leading) != 1 or any(char in selector for selector in selectors for char in ",+~:["):
+        return None
+
+    match = _SIMPLE_COMPOUND.match(leading.pop())
+    if not match or not (match["tag"] or match["rest"]):
+        return None
+
+    attrs = {}
+    for kind, value in _COMPOUND_PART.findall(match["rest"]):
+        key = "class" if kind == "." else "id"
+        # A single class is enough, the full selector runs on the kept subtrees
+        attrs.setdefault(key, _CSS_ESCAPE.sub(r"\1", value))
+    return SoupStrainer(match["tag"], attrs=attrs)
+
+
+def _element_text(element, strip: bool) -> str:
+    return element.get_text(strip=True) if strip else element.text
+
+
+def _bs4_select_texts(html: str | bytes, selectors: Sequence[str], strip: bool) -> list[str | None]:
+    soup = BeautifulSoup(html, "html.parser")
+    return [_element_text(element, strip) if (element := soup.select_one(selector)) else None for selector in selectors]
+
+
+def _strainer_select_texts(html: str | bytes, selectors: Sequence[str], strip: bool) -> list[str | None]:
+    strainer = _leading_strainer(selectors)
+    if strainer is None:
+        return _bs4_select_texts(html, selectors, strip)
+
+    soup = BeautifulSoup(html, "lxml", parse_only=strainer)
+    return [_element_text(element, strip) if (element := soup.select_one(selector)) else None for selector in selectors]
+
+
+def _selectolax_select_texts(html: str | bytes, selectors: Sequence[str], strip: bool) -> list[str | None]:
+    tree = LexborHTMLParser(html)
+    return [node.text(strip=strip) if (node := tree.css_first(selector)) else None for selector in selectors]
+
+
+EXTRACTION_BACKENDS: dict[str, Callable[[str | bytes, Sequence[str], bool], list[str | None]]] = {
+    "bs4": _bs4_select_texts,
+    "strainer": _strainer_select_texts,
+}
+if LexborHTMLParser is not None:
+    EXTRACTION_BACKENDS["selectolax"] = _selectolax_select_texts
+
+EXTRACTION_BACKEND = os.environ.get(
+    "EXTRACTION_BACKEND", "selectolax" if "selectolax" in EXTRACTION_BACKENDS else "strainer"
+)
+
+
+def select_texts(
+    html: str | bytes,
+    selectors: Sequence[str],
+    strip: bool = False,
+    backend: str = EXTRACTION_BACKEND,
+) -> list[str | None]:
+    """
+    Return the text of the first element matching each selector.
+
+    Args:
+        html: Raw page
+        selectors: CSS selectors
+        strip: Strip whitespace from every text node, like ``get_text(strip=True)``
+        backend: Name of one of the ``EXTRACTION_BACKENDS``
+
+    Returns
+    -------
+        One text per selector, None where nothing matched
+    """
+    return EXTRACTION_BACKENDS[backend](html, selectors, strip)
+
+
+def extract_text(html: str | bytes, selector: str, backend: str = EXTRACTION_BACKEND) -> str | None:
+    """Return the text of the first element matching ``selector``, or None."""
+    return select_texts(html, (selector,), backend=backend)[0]
+
+
+def extract_main_listing(html: str | bytes, elements_path: dict[str, str]) -> list[ListingRow]:
+    """
+    Extract jobs from a page where every job is a self-contained element.
+
+    Missing descriptions and locations become "NaN".
+
+    Args:
+        html: Raw listing page
+        elements_path: CSS selectors, as in the ``elements_path`` config key
+
+    Returns
+    -------
+        (title, href, description, location) for every job element, in page order
+
+    Raises
+    ------
+        ValueError: If no job element, or a job without title or link, is found
+    """
+    soup = BeautifulSoup(html, "lxml")
+
+    jobs = soup.select(elements_path["jobs_path"])
+    if not jobs:
+        raise ValueError(f"No jobs were found using this selector {elements_path['jobs_path']}")
+
+    rows = []
+    for job in jobs:
+        title_element = job.select_one(elements_path["title_path"])
+        if not title_element:
+            raise ValueError(f"No titles were found using this selector {elements_path['title_path']}")
+
+        link_element = job.select_one(elements_path["link_path"])
+        if not link_element:
+            raise ValueError(f"No links were found using this selector {elements_path['link_path']}")
+
+        description_element = job.select_one(elements_path["description_path"])
+        location_element = job.select_one(elements_path["location_path"])
+
+        rows.append((
+            title_element.text,
+            str(link_element["href"]),
+            description_element.text if description_element else "NaN",
+            location_element.text if location_element else "NaN",
+        ))
+    return rows
+
+
+def extract_container_listing(html: str | bytes, elements_path: dict[str, str]) -> list[ListingRow]:
+    """
+    Extract jobs from a page whose fields are parallel collections inside one container.
+
+    Titles, links, descriptions and locations are selected separately and zipped.
+    Values are stripped and empty ones become "NaN".
+
+    Raises
+    ------
+        ValueError: If the container or one of the collections is not found
+    """
+    soup = BeautifulSoup(html, "lxml")
+
+    container = soup.select_one(elements_path["jobs_path"])
+    if not container:
+        raise ValueError(f"No elements found for 'container'. Check '{elements_path['jobs_path']}'")
+
+    elements = {
+        "title": container.select(elements_path["title_path"]),
+        "link": container.select(elements_path["link_path"]),
+        "description": container.select(elements_path["description_path"]),
+        "location": container.select(elements_path["location_path"]),
+    }
+    for key, value in elements.items():
+        if not value:
+            raise ValueError(f"No elements found for '{key}'. Check 'elements_path[\"{key}_path\"]'")
+
+    return [
+        (
+            title.get_text(strip=True) or "NaN",
+            link.get("href") or "NaN",
+            description.get_text(strip=True) or "NaN",
+            location.get_text(strip=True) or "NaN",
+        )
+        for title, link, description, location in zip(*elements.values())
+    ]
+
+
+def extract_feed_entries(
+    feed: str | bytes, title_tag: str, link_tag: str, description_tag: str, location_tag: str
+) -> list[tuple[Any, Any, Any, Any]]:
+    """
+    Parse an RSS/Atom feed and return (title, link, description, location) per entry.
+
+    Entries without ``location_tag`` get "NaN" for every field.
+    """
+    rows = []
+    for entry in feedparser.parse(feed).entries:
+        if location_tag in entry:
+            rows.append(
+                (entry.get(title_tag), entry.get(link_tag), entry.get(description_tag), entry.get(location_tag))
+            )
+        else:
+            rows.append(("NaN", "NaN", "NaN", "NaN"))
+    return rows
+
+
+class ParseExecutor:
+    """
+    Runs extraction functions inline or in a process pool, depending on document size.
+
+    Args:
+        max_workers: Size of the process pool. ``0`` parses everything inline.
+        inline_threshold: Documents shorter than this are parsed inline.
+
+    Methods
+    -------
+        run(): Run an extraction function over a document and return its result.
+        shutdown(): Stop the worker processes.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_PARSE_WORKERS,
+        inline_threshold: int = DEFAULT_INLINE_THRESHOLD,
+    ) -> None:
+        self.max_workers = max_workers
+        self.inline_threshold = inline_threshold
+        self._pool: Executor | None = None
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            # Spawned workers don't inherit the event loop, sockets or sqlite handles
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.debug(f"Started parse pool with {self.max_workers} workers")
+        return self._pool
+
+    async def run(self, func: Callable[..., T], document: str | bytes, *args: Any) -> T:
+        """
+        Run ``func(document, *args)`` and return its result.
+
+        ``func`` must be a module-level function and its arguments and result
+        picklable, since large documents are handed to a worker process.
+        """
+        if self.max_workers <= 0 or len(document) < self.inline_threshold:
+            return func(document, *args)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_pool(), func, document, *args)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+
+# Parses everything on the calling thread; used when no executor is configured
+INLINE_PARSER = ParseExecutor(max_workers=0)
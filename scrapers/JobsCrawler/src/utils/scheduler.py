@@ -0,0 +1,467 @@
+"""
+Shared fetch scheduler for the crawler engines.
+
+Every outgoing request goes through a ``FetchScheduler`` which enforces:
+
+- a global concurrency cap shared by all engines in the process,
+- a per-host connection limit,
+- a per-host token bucket (requests per second with a burst allowance).
+
+``CrawlSession`` wraps an ``aiohttp.ClientSession`` so existing code that calls
+``session.get(...)`` is throttled without changing its call sites. Given an
+``HttpCache``, requests made with ``cache=True`` for cached URLs become
+conditional requests.
+
+Requests are bounded by the timeouts of the scheduler's ``RetryPolicy``, and
+transient failures (connection errors, timeouts, 5xx and 429 answers) are retried
+with jittered exponential backoff. A host whose requests keep failing trips its
+circuit breaker: every later request to it in the run raises ``HostUnavailableError``
+without touching the network.
+"""
+import asyncio
+import time
+from collections.abc import AsyncIterator, Iterable
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any
+from urllib.parse import urlparse
+
+import aiohttp
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    retry_if_exception_type,
+    retry_if_result,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+from src.db.detail_cache import DetailCache
+from src.db.http_cache import CachedResponse, HttpCache
+from src.utils.logger_helper import get_custom_logger
+from src.utils.metrics import RunMetrics
+
+logger = get_custom_logger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 20
+
+# Failures worth another try: the next one may well succeed
+TRANSIENT_ERRORS = (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError)
+
+
+class HostUnavailableError(aiohttp.ClientError):
+    """Raised instead of requesting a host whose circuit breaker tripped earlier in the run."""
+
+
+# What a caller catches to survive any failed request, skipped hosts and non-200 answers included
+FETCH_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError)
+
+
+def host_of(url: str) -> str:
+    """Return the lowercase host (netloc) of a URL, or the input if it is already a host."""
+    netloc = urlparse(url).netloc
+    return (netloc or url).lower()
+
+
+@dataclass
+class HostPolicy:
+    """
+    Throttling policy for a single host.
+
+    Attributes
+    ----------
+        rate: Sustained requests per second. ``0`` disables rate limiting.
+        burst: Number of requests allowed back-to-back before ``rate`` applies.
+        max_connections: Maximum number of in-flight requests to the host.
+    """
+
+    rate: float = 2.0
+    burst: int = 5
+    max_connections: int = 4
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Timeouts, retries and circuit breaking of the requests made through a ``CrawlSession``.
+
+    Attributes
+    ----------
+        attempts: Tries per request, the first one included.
+        backoff: The n-th retry waits a random duration up to ``backoff * 2 ** n`` seconds.
+        max_backoff: Longest wait before a retry. A ``Retry-After`` asking for longer
+            is not waited for, the request fails right away.
+        connect_timeout: Seconds to establish a connection.
+        read_timeout: Seconds without receiving any data.
+        total_timeout: Seconds for a whole request, body included. Streamed bodies
+            are read by the caller and are only bounded by ``read_timeout``.
+        failure_threshold: Consecutive failed requests after which a host is skipped
+            for the rest of the run. ``0`` never skips a host.
+    """
+
+    attempts: int = 3
+    backoff: float = 0.5
+    max_backoff: float = 30.0
+    connect_timeout: float = 10.0
+    read_timeout: float = 30.0
+    total_timeout: float = 60.0
+    failure_threshold: int = 5
+
+    def timeout(self, stream: bool = False) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(
+            total=None if stream else self.total_timeout,
+            sock_connect=self.connect_timeout,
+            sock_read=self.read_timeout,
+        )
+
+
+def is_retryable_status(status: int) -> bool:
+    return status == 429 or status >= 500
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait according to a ``Retry-After`` header, given in seconds or as an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)  # noqa: UP017
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())  # noqa: UP017
+
+
+class TokenBucket:
+    """Asynchronous token bucket used to space out requests to one host."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated: float | None = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and consume it."""
+        if self.rate <= 0:
+            return
+
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                if self._updated is not None:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@dataclass
+class _HostState:
+    policy: HostPolicy
+    bucket: TokenBucket = field(init=False)
+    semaphore: asyncio.Semaphore = field(init=False)
+    # Requests that failed in a row, and whether that tripped the circuit breaker
+    failures: int = field(default=0, init=False)
+    tripped: bool = field(default=False, init=False)
+
+    def __post_init__(self) -> None:
+        self.bucket = TokenBucket(self.policy.rate, self.policy.burst)
+        self.semaphore = asyncio.Semaphore(max(1, self.policy.max_connections))
+
+
+class FetchScheduler:
+    """
+    Global and per-host request scheduler.
+
+    Args:
+        max_concurrency: Maximum number of in-flight requests across all hosts.
+        default_policy: Policy applied to hosts that were not configured explicitly.
+        retry_policy: Timeouts, retries and circuit breaking of every request.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        default_policy: HostPolicy | None = None,
+        retry_policy: RetryPolicy | None = None,
+    ) -> None:
+        self.max_concurrency = max(1, max_concurrency)
+        self.default_policy = default_policy or HostPolicy()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self._global = asyncio.Semaphore(self.max_concurrency)
+        self._policies: dict[str, HostPolicy] = {}
+        self._hosts: dict[str, _HostState] = {}
+
+    def configure_host(self, url: str, throttle: dict[str, Any] | None = None) -> None:
+        """
+        Register the throttling policy for the host of ``url``.
+
+        ``throttle`` holds the optional ``rate``, ``burst`` and ``max_connections``
+        keys of a config entry. Missing keys fall back to the default policy. The
+        first registration of a host wins so shared hosts keep one policy per run.
+        """
+        host = host_of(url)
+        if host in self._policies:
+            return
+
+        policy = HostPolicy(**{**self.default_policy.__dict__, **(throttle or {})})
+        self._policies[host] = policy
+        logger.debug(f"Registered fetch policy for {host}: {policy}")
+
+    def _state_for(self, url: str) -> _HostState:
+        host = host_of(url)
+        state = self._hosts.get(host)
+        if state is None:
+            state = _HostState(self._policies.get(host, self.default_policy))
+            self._hosts[host] = state
+        return state
+
+    def is_available(self, url: str) -> bool:
+        """Whether the circuit breaker of the host of ``url`` is still closed."""
+        state = self._hosts.get(host_of(url))
+        return state is None or not state.tripped
+
+    def record_success(self, url: str) -> None:
+        self._state_for(url).failures = 0
+
+    def record_failure(self, url: str) -> None:
+        """Count a failed request to the host of ``url``, tripping its breaker at the threshold."""
+        state = self._state_for(url)
+        state.failures += 1
+        threshold = self.retry_policy.failure_threshold
+        if threshold and state.failures >= threshold and not state.tripped:
+            state.tripped = True
+            logger.error(
+                f"❌ {host_of(url)} failed {state.failures} requests in a row. Skipping it for the rest of the run."
+            )
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        """
+        Hold a request slot for ``url``.
+
+        The host limits are acquired before the global slot so a throttled host
+        never sits on capacity that other hosts could use.
+        """
+        state = self._state_for(url)
+        async with state.semaphore:
+            await state.bucket.acquire()
+            async with self._global:
+                yield
+
+
+class NotModifiedResponse:
+    """
+    Stands for a ``304 Not Modified`` answer to a request sent with the ``HttpCache`` validators.
+
+    It has no body: callers check ``not_modified`` and skip the unchanged content.
+    """
+
+    not_modified = True
+    status = 304
+
+    def __init__(self, cached: CachedResponse) -> None:
+        self.url = cached.url
+        self.cached = cached
+
+
+class CrawlSession:
+    """
+    ``aiohttp.ClientSession`` facade that routes every request through a ``FetchScheduler``.
+
+    Only ``get`` is intercepted; any other attribute is delegated to the wrapped session.
+    With an ``http_cache``, the ``ETag`` or ``Last-Modified`` validators of 200
+    answers to requests made with ``cache=True`` are staged, and stored by
+    ``save_validators`` once the caller has stored the jobs of the answer.
+    Later requests for the same URL send the stored validators, and a 304
+    answer is replaced by a ``NotModifiedResponse``. The cache is reached from
+    a worker thread, so its SQLite calls never block the event loop.
+    Every request is recorded in ``metrics``: the wait for a scheduler slot as
+    ``throttle``, the request as ``fetch``, its status code and body size.
+    Retries and requests skipped because their host is unavailable are counted
+    as ``retries`` and ``skipped_requests``.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        scheduler: FetchScheduler,
+        http_cache: HttpCache | None = None,
+        detail_cache: DetailCache | None = None,
+        metrics: RunMetrics | None = None,
+    ) -> None:
+        self.session = session
+        self.scheduler = scheduler
+        self.http_cache = http_cache
+        # Consulted by the follow-link helpers before they fetch a detail page
+        self.detail_cache = detail_cache
+        self.metrics = metrics or RunMetrics()
+        # Validators of the answers whose jobs are not stored yet
+        self.staged_validators: dict[str, CachedResponse] = {}
+
+    @asynccontextmanager
+    async def get(
+        self, url: str, stream: bool = False, cache: bool = False, **kwargs: Any
+    ) -> AsyncIterator[aiohttp.ClientResponse | NotModifiedResponse]:
+        """
+        Throttled GET, retried on transient failures, conditional when ``cache`` is set and ``url`` is cached.
+
+        With ``stream=True`` the body is left unread for the caller to consume
+        from ``response.content``.
+
+        A 5xx or 429 answer still failing after the last attempt is yielded like
+        any other, while connection errors and timeouts are raised. Both count
+        towards the host's circuit breaker. Errors raised by the caller while
+        handling the response are never retried.
+
+        Raises
+        ------
+            HostUnavailableError: The host of ``url`` failed too often earlier in the run.
+        """
+        http_cache = self.http_cache if cache else None
+        cached = await asyncio.to_thread(http_cache.get, url) if http_cache else None
+        if cached:
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), **cached.validator_headers()}
+        kwargs.setdefault("timeout", self.scheduler.retry_policy.timeout(stream))
+
+        async with AsyncExitStack() as stack:
+            response = await self._send(stack, url, stream, kwargs)
+            if cached and response.status == 304:
+                logger.debug(f"Not modified since {time.ctime(cached.fetched_at)}: {url}")
+                await asyncio.to_thread(http_cache.touch, url)
+                yield NotModifiedResponse(cached)
+                return
+
+            if http_cache and response.status == 200:
+                self._stage(url, response)
+            yield response
+
+    async def _send(
+        self, stack: AsyncExitStack, url: str, stream: bool, kwargs: dict[str, Any]
+    ) -> aiohttp.ClientResponse:
+        """Get a response for ``url`` within the retry policy, leaving it open on ``stack``."""
+        policy = self.scheduler.retry_policy
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(policy.attempts) | self._retry_after_too_long,
+            wait=self._wait,
+            retry=retry_if_exception_type(TRANSIENT_ERRORS)
+            | retry_if_result(lambda result: is_retryable_status(result[1].status)),
+            before_sleep=self._before_retry,
+            # Out of attempts on an error status: let the caller see the answer
+            retry_error_callback=lambda retry_state: retry_state.outcome.result(),
+            reraise=True,
+        )
+        try:
+            attempt, response = await retrying(self._attempt, url, stream, kwargs)
+        except HostUnavailableError:
+            self.metrics.add("skipped_requests")
+            raise
+        except TRANSIENT_ERRORS:
+            self.scheduler.record_failure(url)
+            raise
+
+        await stack.enter_async_context(attempt)
+        if is_retryable_status(response.status):
+            self.scheduler.record_failure(url)
+        else:
+            self.scheduler.record_success(url)
+        return response
+
+    async def _attempt(
+        self, url: str, stream: bool, kwargs: dict[str, Any]
+    ) -> tuple[AsyncExitStack, aiohttp.ClientResponse]:
+        """
+        Make one request, returning the response with the stack releasing it and its slot.
+
+        A non-streamed 200 body is read here, so failures while downloading it are retried too.
+        """
+        if not self.scheduler.is_available(url):
+            raise HostUnavailableError(f"{host_of(url)} is skipped for the rest of the run")
+
+        attempt = AsyncExitStack()
+        try:
+            queued = time.perf_counter()
+            await attempt.enter_async_context(self.scheduler.slot(url))
+            started = time.perf_counter()
+            self.metrics.observe("throttle", started - queued)
+            response = await attempt.enter_async_context(self.session.get(url, **kwargs))
+            # Run when the response is released, once the caller has read what it wanted
+            attempt.callback(lambda: self.metrics.record_response(response.status, response.content.total_bytes))
+
+            if response.status == 200 and not stream:
+                # Read here so the body download is timed with the request; aiohttp keeps it for the caller
+                await response.read()
+            # A streamed body is read by the caller, so only the time to its headers is recorded
+            self.metrics.observe("fetch", time.perf_counter() - started)
+        except BaseException:
+            await attempt.aclose()
+            raise
+        return attempt, response
+
+    def _wait(self, retry_state: RetryCallState) -> float:
+        """Seconds before the next attempt: what ``Retry-After`` asks for, else a jittered exponential backoff."""
+        policy = self.scheduler.retry_policy
+        retry_after = self._retry_after(retry_state)
+        if retry_after is not None:
+            return retry_after
+        return wait_random_exponential(multiplier=policy.backoff, max=policy.max_backoff)(retry_state)
+
+    def _retry_after_too_long(self, retry_state: RetryCallState) -> bool:
+        retry_after = self._retry_after(retry_state)
+        return retry_after is not None and retry_after > self.scheduler.retry_policy.max_backoff
+
+    @staticmethod
+    def _retry_after(retry_state: RetryCallState) -> float | None:
+        outcome = retry_state.outcome
+        if outcome is None or outcome.failed:
+            return None
+        _, response = outcome.result()
+        return parse_retry_after(response.headers.get("Retry-After"))
+
+    async def _before_retry(self, retry_state: RetryCallState) -> None:
+        url = retry_state.args[0]
+        outcome = retry_state.outcome
+        if outcome.failed:
+            error = outcome.exception()
+            reason = f"{type(error).__name__}: {error}"
+        else:
+            attempt, response = outcome.result()
+            reason = f"status {response.status}"
+            # Free the connection and the scheduler slot while waiting
+            await attempt.aclose()
+        self.metrics.add("retries")
+        logger.warning(
+            f"Retrying {url} in {retry_state.upcoming_sleep:.1f}s after {reason} "
+            f"(attempt {retry_state.attempt_number}/{self.scheduler.retry_policy.attempts})"
+        )
+
+    async def save_validators(self, urls: Iterable[str]) -> None:
+        """Store the staged validators of the answers for ``urls``."""
+        staged = [self.staged_validators.pop(url) for url in urls if url in self.staged_validators]
+        for cached in staged:
+            await asyncio.to_thread(self.http_cache.store, cached)
+
+    def _stage(self, url: str, response: aiohttp.ClientResponse) -> None:
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not (etag or last_modified):
+            return
+        # A 304 skips the extraction, so it must not be promised before the jobs of the answer are stored
+        self.staged_validators[url] = CachedResponse(
+            url=url, etag=etag, last_modified=last_modified, fetched_at=time.time()
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.session, name)
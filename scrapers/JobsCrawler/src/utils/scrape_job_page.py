@@ -3,65 +3,96 @@ Scrape individual 4dayweek.io job pages to extract additional metadata not avail
 """
 
 import aiohttp
-from bs4 import BeautifulSoup
+from src.db.detail_cache import fetch_detail
 from src.utils.logger_helper import get_custom_logger
+from src.utils.parsing import INLINE_PARSER, ParseExecutor, select_texts
 
 logger = get_custom_logger(__name__)
 
+RESTRICTION_PHRASE = "Only considering candidates eligible to work in"
 
-async def scrape_location_restriction(session: aiohttp.ClientSession, job_url: str) -> str | None:
+# Every selector starts at the main container, so only that subtree needs parsing
+APPLY_WARNING_SELECTOR = '.main-container-wrapper .hero-left p.apply-warning'
+METADATA_SELECTORS = (
+    APPLY_WARNING_SELECTOR,
+    APPLY_WARNING_SELECTOR + ' strong',
+    '.main-container-wrapper .job-posted',
+    '.main-container-wrapper .job-tags li.reduced-hours',
+)
+
+
+async def _fetch_job_metadata(
+    session: aiohttp.ClientSession, job_url: str, parser: ParseExecutor
+) -> tuple[int, dict | None]:
+    """Return the status of a job page and its metadata, using the session's detail cache if any."""
+    async def fetch() -> tuple[int, dict | None]:
+        async with session.get(job_url) as response:
+            if response.status != 200:
+                return response.status, None
+            html = await response.text()
+            return response.status, await parser.run(extract_job_metadata, html)
+
+    return await fetch_detail(session, job_url, "4dayweek:job_metadata", fetch)
+
+
+def extract_job_metadata(html: str) -> dict:
+    """
+    Extract the metadata of a 4dayweek.io job page from its HTML.
+
+    Returns
+    -------
+        Same dictionary as ``scrape_job_metadata``
+    """
+    warning_text, restriction, posted, pto_days = select_texts(html, METADATA_SELECTORS, strip=True)
+
+    return {
+        'location_restriction': restriction if warning_text and RESTRICTION_PHRASE in warning_text else None,
+        'posted_date': posted.replace('Posted ', '') if posted is not None else None,
+        'pto_days': pto_days,
+    }
+
+
+async def scrape_location_restriction(
+    session: aiohttp.ClientSession, job_url: str, parser: ParseExecutor = INLINE_PARSER
+) -> str | None:
     """
     Scrape a 4dayweek.io job page to extract location restriction warnings.
 
     Args:
         session: aiohttp client session
         job_url: Full URL to the job posting
+        parser: Executor the page is parsed with
 
     Returns:
         Location restriction text if found, None otherwise
         Example: "New York, USA" or "Newcastle, UK"
     """
     try:
-        async with session.get(job_url) as response:
-            if response.status != 200:
-                logger.warning(f"Failed to fetch {job_url}: HTTP {response.status}")
-                return None
-
-            html = await response.text()
-            soup = BeautifulSoup(html, 'lxml')
-
-            main_container = soup.select_one('.main-container-wrapper .hero-left')
-            if not main_container:
-                logger.debug(f"No main container found for {job_url}")
-                return None
-
-            apply_warning = main_container.select_one('p.apply-warning')
-            if not apply_warning:
-                return None
-
-            warning_text = apply_warning.get_text(strip=True)
-
-            if "Only considering candidates eligible to work in" in warning_text:
-                strong_tag = apply_warning.select_one('strong')
-                if strong_tag:
-                    location = strong_tag.get_text(strip=True)
-                    logger.info(f"Location restriction found for {job_url}: {location}")
-                    return location
-
+        status, metadata = await _fetch_job_metadata(session, job_url, parser)
+        if status != 200:
+            logger.warning(f"Failed to fetch {job_url}: HTTP {status}")
             return None
 
+        location = metadata['location_restriction']
+        if location:
+            logger.info(f"Location restriction found for {job_url}: {location}")
+        return location
+
     except Exception as e:
         logger.error(f"Error scraping {job_url}: {str(e)}")
         return None
 
 
-async def scrape_job_metadata(session: aiohttp.ClientSession, job_url: str) -> dict:
+async def scrape_job_metadata(
+    session: aiohttp.ClientSession, job_url: str, parser: ParseExecutor = INLINE_PARSER
+) -> dict:
     """
     Scrape a 4dayweek.io job page to extract all additional metadata.
 
     Args:
         session: aiohttp client session
         job_url: Full URL to the job posting
+        parser: Executor the page is parsed with
 
     Returns:
         Dictionary with extracted metadata:
@@ -78,35 +109,12 @@ async def scrape_job_metadata(session: aiohttp.ClientSession, job_url: str) -> d
     }
 
     try:
-        async with session.get(job_url) as response:
-            if response.status != 200:
-                logger.warning(f"Failed to fetch {job_url}: HTTP {response.status}")
-                return metadata
-
-            html = await response.text()
-            soup = BeautifulSoup(html, 'lxml')
-
-            main_container = soup.select_one('.main-container-wrapper')
-            if not main_container:
-                return metadata
+        status, scraped = await _fetch_job_metadata(session, job_url, parser)
+        if status != 200:
+            logger.warning(f"Failed to fetch {job_url}: HTTP {status}")
+            return metadata
 
-            apply_warning = main_container.select_one('.hero-left p.apply-warning')
-            if apply_warning:
-                warning_text = apply_warning.get_text(strip=True)
-                if "Only considering candidates eligible to work in" in warning_text:
-                    strong_tag = apply_warning.select_one('strong')
-                    if strong_tag:
-                        metadata['location_restriction'] = strong_tag.get_text(strip=True)
-
-            posted = main_container.select_one('.job-posted')
-            if posted:
-                metadata['posted_date'] = posted.get_text(strip=True).replace('Posted ', '')
-
-            pto_tag = main_container.select_one('.job-tags li.reduced-hours')
-            if pto_tag:
-                metadata['pto_days'] = pto_tag.get_text(strip=True)
-
-        return metadata
+        return scraped
 
     except Exception as e:
         logger.error(f"Error scraping metadata from {job_url}: {str(e)}")
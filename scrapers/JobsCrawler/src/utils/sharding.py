@@ -0,0 +1,40 @@
+"""
+Stable assignment of crawl configs to shards.
+
+Configs are assigned with rendezvous (highest random weight) hashing: a config
+is scored against every shard and goes to the shard with the highest score.
+The score only depends on the config and the shard index, so every node
+computes the same assignment without coordinating, and going from N to N + 1
+shards only moves the configs the new shard wins, about 1 / (N + 1) of them.
+
+Configs are keyed by the host of their ``url``, so all the configs of a host
+land on the same shard and one ``FetchScheduler`` throttles every request to it.
+"""
+import hashlib
+from typing import Any
+
+from src.utils.scheduler import host_of
+
+
+def config_key(config: dict[str, Any]) -> str:
+    """Identify the shard of a config entry by the host of its ``url``."""
+    return host_of(config["url"])
+
+
+def _score(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def shard_of(key: str, count: int, salt: str = "") -> int:
+    """
+    Return the shard, in ``range(count)``, that ``key`` is assigned to.
+
+    Args:
+        key: Identifier of the config, see ``config_key``
+        count: Number of shards
+        salt: Distinguishes independent levels of sharding, so the shards of
+            one level are not correlated with those of another
+    """
+    if count <= 1:
+        return 0
+    return max(range(count), key=lambda shard: _score(f"{salt}{shard}:{key}"))
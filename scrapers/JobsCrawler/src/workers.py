@@ -0,0 +1,152 @@
+"""
+Multi-process crawl mode.
+
+In the default mode the RSS, API and BS4 engines run as coroutines of one
+process, so parsing, cleaning and location tagging of every source share one
+core. Here the configs are split into shards by host, and every shard runs the
+three engines in a worker process of its own:
+
+- Workers fetch, parse, clean and tag, then send each batch to a single writer
+  process running ``serve_writes``, which owns the only write connection.
+- Every host is crawled by a single worker, so its throttling and circuit
+  breaker hold as in one process. The global concurrency cap is split between
+  the workers.
+- Workers read (link index, watermarks, counts) through their own read-only
+  connections, as SQLite in WAL mode allows readers alongside the writer.
+- Workers parse inline: each is already a process of its own, so a nested
+  parse pool would only add processes competing for the same cores.
+
+Processes are spawned, like the parse workers, so they inherit no event loop,
+socket or SQLite handle.
+"""
+import asyncio
+import multiprocessing
+from typing import Any
+
+from src.crawler import AsyncCrawlerEngine
+from src.db import JobsDatabase, RemoteJobsDatabase
+from src.db.async_db import serve_writes
+from src.models import ApiArgs, Bs4Args, RssArgs
+from src.utils.logger_helper import get_custom_logger
+from src.utils.parsing import INLINE_PARSER
+from src.utils.scheduler import DEFAULT_MAX_CONCURRENCY, FetchScheduler
+
+logger = get_custom_logger(__name__)
+
+STRATEGY_ARGS = {"rss": RssArgs, "api": ApiArgs, "bs4": Bs4Args}
+
+# As many workers as strategies, like a process per strategy
+DEFAULT_SHARDS = 3
+
+
+async def _run_engines(strategies: list[RssArgs | ApiArgs | Bs4Args], database: RemoteJobsDatabase) -> None:
+    try:
+        # A failing strategy doesn't stop the others, the worker still exits with its error
+        results = await asyncio.gather(
+            *(AsyncCrawlerEngine(args).run() for args in strategies), return_exceptions=True
+        )
+    finally:
+        await database.close()
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+
+def _crawl_in_worker(
+    shard: int,
+    shard_count: int,
+    test: bool,
+    db_path: str,
+    requests: Any,
+    replies: Any,
+    overrides: dict[str, dict[str, Any]],
+) -> None:
+    """Target of a worker process: crawl one shard of every strategy."""
+    shared = {
+        "shard": shard,
+        "shard_count": shard_count,
+        "scheduler": FetchScheduler(max_concurrency=DEFAULT_MAX_CONCURRENCY // shard_count),
+        "parse_executor": INLINE_PARSER,
+        "database": RemoteJobsDatabase(db_path, requests, replies, shard),
+    }
+    strategies = [
+        args_type(test=test, db_path=db_path, **shared, **overrides[strategy])
+        for strategy, args_type in STRATEGY_ARGS.items()
+    ]
+    asyncio.run(_run_engines(strategies, shared["database"]))
+
+
+async def run_crawlers_in_processes(
+    db_path: str,
+    is_test: bool = False,
+    shards: int = DEFAULT_SHARDS,
+    overrides: dict[str, dict[str, Any]] | None = None,
+    node_shard: int = 0,
+    node_count: int = 1,
+    spool_dir: str | None = None,
+    metrics_dir: str | None = None,
+    prometheus_dir: str | None = None,
+) -> int:
+    """
+    Crawl every strategy in worker processes that store through one writer process.
+
+    Args:
+        db_path: Path to the SQLite database file.
+        is_test: Crawl the test configs into the test table.
+        shards: Number of worker processes, each crawling the configs of a share of the hosts.
+        overrides: Extra ``*Args`` fields per strategy name, e.g. ``{"bs4": {"batch_size": 50}}``.
+        node_shard: Index of this machine when the configs are split between several.
+        node_count: Number of machines the configs are split between.
+        spool_dir: Also spool the stored jobs to this directory, see ``src/db/spool.py``.
+        metrics_dir: Directory of the run reports, one per worker.
+        prometheus_dir: Also write the run metrics of every worker as Prometheus textfiles there.
+
+    Returns
+    -------
+        Number of workers that failed.
+    """
+    common = {
+        "node_shard": node_shard,
+        "node_count": node_count,
+        "spool_dir": spool_dir,
+        "metrics_dir": metrics_dir,
+        "prometheus_dir": prometheus_dir,
+    }
+    overrides = {strategy: {**common, **(overrides or {}).get(strategy, {})} for strategy in STRATEGY_ARGS}
+    shards = max(1, shards)
+    ctx = multiprocessing.get_context("spawn")
+
+    # Workers open read-only connections, so the schema has to exist first
+    with JobsDatabase(db_path):
+        pass
+
+    requests = ctx.Queue()
+    replies = [ctx.Queue() for _ in range(shards)]
+
+    writer = ctx.Process(target=serve_writes, args=(db_path, requests, replies), name="jobs-db-writer")
+    writer.start()
+    workers = [
+        ctx.Process(
+            target=_crawl_in_worker,
+            args=(shard, shards, is_test, db_path, requests, replies[shard], overrides),
+            name=f"crawl-{shard}",
+        )
+        for shard in range(shards)
+    ]
+    logger.info(f"Starting {len(workers)} crawl workers and a writer process")
+
+    try:
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            await asyncio.to_thread(worker.join)
+    finally:
+        requests.put(None)
+        await asyncio.to_thread(writer.join)
+
+    failed = [worker.name for worker in workers if worker.exitcode != 0]
+    if failed:
+        logger.error(f"❌ {len(failed)} crawl workers failed: {', '.join(failed)}")
+    if writer.exitcode != 0:
+        logger.error(f"❌ The writer process exited with code {writer.exitcode}")
+    return len(failed)
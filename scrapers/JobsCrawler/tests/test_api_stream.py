@@ -0,0 +1,98 @@
+import asyncio
+import json
+
+from src.crawlers import async_api
+from src.db import LinkIndex
+from src.models import ApiConfig
+from src.pipeline import CrawlContext, IngestPipeline
+
+ELEMENTS_PATH = {
+    "dict_tag": "jobs",
+    "title_tag": "title",
+    "link_tag": "url",
+    "description_tag": "description",
+    "pubdate_tag": "date",
+    "location_tag": "location",
+    "location_default": "Remote",
+}
+
+
+def crawl(class_json="dict", jobs=3, head=()):
+    """Crawl a streamed payload of ``head`` then ``jobs`` jobs and return the context and the fetches made."""
+    config = ApiConfig(
+        enabled=True,
+        name="https://api.example",
+        url="https://api.example/jobs",
+        class_json=class_json,
+        follow_link="no",
+        inner_link_tag="",
+        elements_path=ELEMENTS_PATH,
+    )
+    payload = json.dumps({
+        "jobs": [
+            *head,
+            *(
+                {"id": i, "title": f"Job {i}", "url": f"https://api.example/job/{i}", "description": "x"}
+                for i in range(jobs)
+            ),
+        ]
+    }).encode()
+    fetches = []
+
+    async def fetch(session, stream=False):
+        fetches.append(stream)
+
+        async def chunks():
+            for start in range(0, len(payload), 16):
+                yield payload[start:start + 16]
+
+        return chunks()
+
+    async def run():
+        pipeline = IngestPipeline(len, flush_interval=0.01)
+        pipeline.start()
+        ctx = CrawlContext(link_index=LinkIndex(), pipeline=pipeline, test=True)
+        await async_api.async_api_requests(fetch, None, config, ctx)
+        await pipeline.close()
+        return ctx
+
+    return asyncio.run(run()), fetches
+
+
+def test_streamed_payload_is_marked_once_read():
+    ctx, fetches = crawl()
+
+    assert fetches == [True]
+    assert ctx.pipeline.rows_stored == 3
+    assert ctx.extracted == {"https://api.example/jobs": "https://api.example"}
+
+
+def test_unknown_class_json_is_rejected_before_the_request():
+    ctx, fetches = crawl(class_json="tuple")
+
+    assert fetches == []
+    assert ctx.extracted == {}
+
+
+def test_watermark_skips_jobs_without_a_link():
+    ctx, _ = crawl(head=[{"id": 99, "title": "Broken"}, {"title": "Broken", "url": "NaN"}])
+
+    assert ctx.state.pending["https://api.example/jobs"].link == "https://api.example/job/0"
+
+
+def test_followed_links_parse_the_whole_body_by_default():
+    def config(follow_link, **kwargs):
+        return ApiConfig(
+            enabled=True,
+            name="https://api.example",
+            url="https://api.example/jobs",
+            class_json="dict",
+            follow_link=follow_link,
+            inner_link_tag="",
+            elements_path=ELEMENTS_PATH,
+            **kwargs,
+        )
+
+    assert config("no").stream
+    assert not config("yes").stream
+    assert config("yes", stream=True).stream
@@ -0,0 +1,125 @@
+import asyncio
+import multiprocessing
+import queue
+import sqlite3
+import threading
+from functools import partial
+
+import pytest
+
+from src.db import AsyncJobsDatabase, JobsDatabase, LinkIndex, RemoteJobsDatabase, async_db
+from src.db.async_db import serve_writes
+
+
+def insert_job(cur, link, test=True):
+    cur.execute(f"INSERT INTO {'test' if test else 'main_jobs'} (title, link) VALUES ('Job', ?)", (link,))
+    cur.connection.commit()
+    return threading.current_thread().name
+
+
+def test_writes_run_on_one_thread_and_readers_see_them(tmp_path):
+    async def run():
+        async with AsyncJobsDatabase(str(tmp_path / "jobs.db"), readers=3) as db:
+            threads = await asyncio.gather(
+                *(db.write(partial(insert_job, link=f"https://a.io/{i}")) for i in range(20))
+            )
+            index = await db.read(partial(LinkIndex.from_cursor, test=True))
+            main_index = await db.read(LinkIndex.from_cursor)
+            return (
+                set(threads),
+                await db.count_jobs(test=True),
+                "https://a.io/7" in index,
+                "https://a.io/7" in main_index,
+            )
+
+    threads, count, in_test, in_main = asyncio.run(run())
+    assert len(threads) == 1 and threads.pop().startswith("jobs-db-writer")
+    assert count == 20
+    assert in_test and not in_main
+
+
+def test_readers_are_read_only(tmp_path):
+    async def run():
+        async with AsyncJobsDatabase(str(tmp_path / "jobs.db")) as db:
+            await db.read(partial(insert_job, link="https://a.io/1"))
+
+    with pytest.raises(sqlite3.OperationalError, match="readonly"):
+        asyncio.run(run())
+
+
+def test_event_loop_keeps_running_during_a_write(tmp_path):
+    ticks = []
+
+    def slow_write(cur):
+        insert_job(cur, "https://a.io/slow")
+        threading.Event().wait(0.2)
+        return len(ticks)
+
+    async def ticker():
+        while True:
+            ticks.append(None)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        async with AsyncJobsDatabase(str(tmp_path / "jobs.db")) as db:
+            task = asyncio.ensure_future(ticker())
+            before = len(ticks)
+            during = await db.write(slow_write)
+            task.cancel()
+            return during - before
+
+    assert asyncio.run(run()) >= 5
+
+
+def test_shared_database_connects_once(tmp_path):
+    async def run():
+        db = AsyncJobsDatabase(str(tmp_path / "jobs.db"))
+        await asyncio.gather(*(db.connect() for _ in range(3)))
+        count = await db.count_jobs()
+        await db.close()
+        return count
+
+    assert asyncio.run(run()) == 0
+
+
+def test_remote_writes_run_in_the_writer_process(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    with JobsDatabase(path):
+        pass
+
+    ctx = multiprocessing.get_context("spawn")
+    requests, replies = ctx.Queue(), [ctx.Queue(), ctx.Queue()]
+    writer = ctx.Process(target=serve_writes, args=(path, requests, replies))
+    writer.start()
+
+    async def run():
+        async with RemoteJobsDatabase(path, requests, replies[1], worker_id=1) as db:
+            thread = await db.write(partial(insert_job, link="https://a.io/1"))
+            with pytest.raises(sqlite3.IntegrityError):
+                await db.write(partial(insert_job, link="https://a.io/1"))
+            return thread, await db.count_jobs(test=True)
+
+    try:
+        thread, count = asyncio.run(run())
+    finally:
+        requests.put(None)
+        writer.join(30)
+
+    assert thread == "MainThread"
+    assert count == 1
+    assert writer.exitcode == 0
+
+
+def test_late_replies_do_not_answer_the_next_write(tmp_path, monkeypatch):
+    monkeypatch.setattr(async_db, "WRITE_TIMEOUT", 0.05)
+    requests, replies = queue.Queue(), queue.Queue()
+    db = RemoteJobsDatabase(str(tmp_path / "jobs.db"), requests, replies, worker_id=0)
+
+    with pytest.raises(TimeoutError):
+        db._write(len)
+    # The writer answers the timed out request after all, then the next one
+    replies.put((0, True, "late"))
+    replies.put((1, True, "on time"))
+
+    assert db._write(len) == "on time"
+    assert [requests.get_nowait()[:2] for _ in range(2)] == [(0, 0), (0, 1)]
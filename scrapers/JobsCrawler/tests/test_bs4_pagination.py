@@ -0,0 +1,72 @@
+import asyncio
+
+from src.crawlers import async_bs4
+from src.db import LinkIndex
+from src.models import Bs4Config
+from src.pipeline import CrawlContext, IngestPipeline
+
+ELEMENTS_PATH = {
+    "jobs_path": ".job",
+    "title_path": ".title",
+    "link_path": "a",
+    "description_path": ".description",
+    "location_path": ".location",
+}
+
+
+def listing(page, jobs=2):
+    return "".join(
+        f"<div class='job'><h2 class='title'>Job {page}-{i}</h2><a href='/job/{page}-{i}'>x</a>"
+        f"<span class='location'>Remote</span></div>"
+        for i in range(jobs)
+    )
+
+
+def crawl(pages, known=()):
+    """Crawl ``pages`` (page number to HTML, or None when unchanged) and return the links stored."""
+    config = Bs4Config(
+        enabled=True,
+        name="https://jobs.example",
+        url="https://jobs.example/?page=",
+        pages_to_crawl=len(pages),
+        start_point=1,
+        strategy="main",
+        follow_link="no",
+        inner_link_tag="",
+        elements_path=ELEMENTS_PATH,
+        page_concurrency=1,
+    )
+    requested = []
+
+    async def fetch(session, url):
+        page = int(url.rsplit("=", 1)[1])
+        requested.append(page)
+        return pages[page]
+
+    async def run():
+        stored = []
+        pipeline = IngestPipeline(lambda df: stored.extend(df["link"]) or len(df), flush_interval=0.01)
+        pipeline.start()
+        ctx = CrawlContext(link_index=LinkIndex(known), pipeline=pipeline, test=True)
+        await async_bs4.async_bs4_crawl(fetch, None, config, ctx)
+        await pipeline.close()
+        return stored
+
+    return asyncio.run(run()), requested
+
+
+def test_pagination_stops_at_a_page_without_new_links(monkeypatch):
+    monkeypatch.setattr(async_bs4, "SAVE_DEBUG_HTML", False)
+    known = [f"https://jobs.example/job/2-{i}" for i in range(2)]
+    stored, requested = crawl({1: listing(1), 2: listing(2), 3: listing(3)}, known)
+
+    assert requested == [1, 2]
+    assert stored == ["https://jobs.example/job/1-0", "https://jobs.example/job/1-1"]
+
+
+def test_unchanged_page_does_not_stop_pagination(monkeypatch):
+    monkeypatch.setattr(async_bs4, "SAVE_DEBUG_HTML", False)
+    stored, requested = crawl({1: None, 2: listing(2), 3: listing(3)})
+
+    assert requested == [1, 2, 3]
+    assert len(stored) == 4
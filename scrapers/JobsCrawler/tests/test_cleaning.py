@@ -0,0 +1,35 @@
+import pandas as pd
+
+from src.utils.cleaning import CLEANING_PROFILES, clean_jobs_df, clean_location, clean_text
+
+
+def test_clean_location():
+    assert clean_location("remote") == "Worldwide"
+    assert clean_location("Remote Job") == "Worldwide"
+    assert clean_location("<b>New York/London</b>") == "New York London"
+    assert clean_location("Remote Remote") == "Worldwide"
+    assert clean_location("RemoteEurope 2024-05-01") == "Remote Europe"
+    assert clean_location("UK USD100-150/yr") == "UK"
+
+
+def test_clean_text():
+    assert clean_text("<p>Hello, {world} ['x']</p>") == "Hello world x"
+
+
+def test_profiles():
+    df = pd.DataFrame(
+        {
+            "title": ["<b>Dev</b>", "<b>Dev</b>"],
+            "description": ["<p>a</p>", "<p>a</p>"],
+            "location": ["remote", "remote"],
+        }
+    )
+
+    bs4 = clean_jobs_df(df, CLEANING_PROFILES["bs4"])
+    assert bs4.to_dict("records") == [{"title": "Dev", "description": "a", "location": "Worldwide"}]
+
+    api = clean_jobs_df(df, CLEANING_PROFILES["api"])
+    assert len(api) == 2
+    assert api["title"].tolist() == ["<b>Dev</b>", "<b>Dev</b>"]
+    # The input frame is left untouched
+    assert df["location"].tolist() == ["remote", "remote"]
@@ -0,0 +1,46 @@
+from src.db import CrawlState, JobsDatabase, Watermark
+from src.db.crawl_state import cut_at_watermark, is_job_link
+
+
+def test_cut_at_watermark():
+    jobs = [("a", 3), ("b", 2), ("c", 1)]
+
+    def key(job):
+        return job[0], None
+
+    assert cut_at_watermark(jobs, None, key) == (jobs, False)
+    assert cut_at_watermark(jobs, Watermark("b"), key) == ([("a", 3)], True)
+    assert cut_at_watermark(jobs, Watermark("a"), key) == ([], True)
+    assert cut_at_watermark(jobs, Watermark("z"), key) == (jobs, False)
+
+
+def test_placeholders_are_not_job_links():
+    assert is_job_link("https://a.io/jobs/1")
+    assert not any(is_job_link(link) for link in ("NaN", "None", None, "", "/jobs/1", "mailto:jobs@a.io"))
+
+
+def test_watermark_prefers_id_over_link():
+    mark = Watermark("https://a.io/jobs/1", job_id="42")
+    assert mark.matches("https://a.io/jobs/1-renamed", 42)
+    assert not mark.matches("https://a.io/jobs/1", 43)
+    # Sources without ids fall back to the link
+    assert mark.matches("https://a.io/jobs/1")
+
+
+def test_save_and_reload(tmp_path):
+    db = JobsDatabase(str(tmp_path / "jobs.db"))
+    db.connect()
+    cur = db.get_cursor()
+
+    state = CrawlState.from_cursor(cur)
+    assert state.get("https://a.io") is None
+
+    state.record("https://a.io", Watermark("https://a.io/jobs/1", "2024-01-01"))
+    assert CrawlState.from_cursor(cur).get("https://a.io") is None
+    state.save(cur)
+    state.record("https://a.io", Watermark("https://a.io/jobs/2"))
+    state.save(cur)
+
+    assert CrawlState.from_cursor(cur).get("https://a.io") == Watermark("https://a.io/jobs/2")
+    assert CrawlState.from_cursor(cur, test=True).get("https://a.io") is None
+    db.close()
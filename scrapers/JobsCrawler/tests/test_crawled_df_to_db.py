@@ -0,0 +1,44 @@
+from datetime import date, datetime
+
+import pandas as pd
+
+from src.crawler import crawled_df_to_db
+from src.db import JobsDatabase
+
+
+def _jobs_df(links):
+    return pd.DataFrame(
+        {
+            "title": [f"Backend Engineer {i}" for i in range(len(links))],
+            "link": links,
+            "description": ["Python"] * len(links),
+            "pubdate": [date(2025, 1, 2)] * len(links),
+            "location": ["Worldwide"] * len(links),
+            "timestamp": [datetime(2025, 1, 2, 3, 4, 5)] * len(links),
+            "location_tags": [["ANYWHERE"]] * len(links),
+        }
+    )
+
+
+def test_bulk_insert_counts_only_new_rows(tmp_path):
+    db = JobsDatabase(str(tmp_path / "jobs.db"))
+    db.connect()
+    cur = db.get_cursor()
+
+    assert crawled_df_to_db(_jobs_df([f"https://a.io/{i}" for i in range(7)]), cur, test=True, chunk_size=3) == 7
+    assert crawled_df_to_db(_jobs_df([f"https://a.io/{i}" for i in range(5, 10)]), cur, test=True, chunk_size=3) == 3
+
+    cur.execute(
+        "SELECT COUNT(*), MIN(pubdate), MIN(timestamp), MIN(location_tags), MIN(source), MIN(crawled_at) FROM test"
+    )
+    assert cur.fetchone() == (
+        10, "2025-01-02", "2025-01-02 03:04:05", '["ANYWHERE"]', "a.io", int(datetime(2025, 1, 2, 3, 4, 5).timestamp())
+    )
+
+    # The tag rows written by the trigger are not counted as inserted jobs
+    cur.execute("SELECT COUNT(*) FROM test_location_tags WHERE tag = 'ANYWHERE'")
+    assert cur.fetchone() == (10,)
+
+    cur.execute("PRAGMA journal_mode")
+    assert cur.fetchone()[0] == "wal"
+    db.close()
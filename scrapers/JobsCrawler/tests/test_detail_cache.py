@@ -0,0 +1,106 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import aiohttp
+
+from src.db.detail_cache import DetailCache
+from src.utils.FollowLink import async_follow_link, async_follow_link_echojobs
+
+
+class FakeResponse:
+    def __init__(self, status, body):
+        self.status = status
+        self.body = body
+
+    async def text(self):
+        return self.body
+
+
+class FakeSession:
+    """Serves canned pages and counts requests; carries a detail cache like CrawlSession."""
+
+    def __init__(self, pages, detail_cache=None):
+        self.pages = pages
+        self.detail_cache = detail_cache
+        self.requests = []
+
+    @asynccontextmanager
+    async def get(self, url, **kwargs):
+        self.requests.append(url)
+        await asyncio.sleep(0.01)
+        status, body = self.pages.get(url, (404, ""))
+        if isinstance(status, Exception):
+            raise status
+        yield FakeResponse(status, body)
+
+
+def test_put_get_and_ttl(tmp_path):
+    cache = DetailCache(str(tmp_path / "detail_cache.db"), ttl=60)
+    cache.put("https://example.com/1", ".desc", 200, "Full description")
+    cache.put("https://example.com/2", ".desc", 404, None)
+    cache.put("https://example.com/3", ".desc", 503, None)
+
+    assert cache.get("https://example.com/1", ".desc") == (200, "Full description")
+    assert cache.get("https://example.com/1", ".other") is None
+    assert cache.get("https://example.com/2", ".desc") == (404, None)
+    # Transient failures are not remembered
+    assert cache.get("https://example.com/3", ".desc") is None
+
+    cache.ttl = 0
+    time.sleep(0.01)
+    assert cache.get("https://example.com/1", ".desc") is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = DetailCache(str(tmp_path / "detail_cache.db"), max_entries=2)
+    for i in range(3):
+        cache.put(f"https://example.com/{i}", ".desc", 200, str(i))
+        time.sleep(0.01)
+    cache.get("https://example.com/0", ".desc")
+
+    assert cache.evict() == 1
+    assert cache.get("https://example.com/1", ".desc") is None
+    assert cache.get("https://example.com/0", ".desc") == (200, "0")
+    assert cache.get("https://example.com/2", ".desc") == (200, "2")
+
+
+def test_follow_link_fetches_each_page_once(tmp_path):
+    pages = {"https://example.com/job": (200, "<div class='desc'>Full description</div>")}
+
+    async def run():
+        session = FakeSession(pages, DetailCache(str(tmp_path / "detail_cache.db")))
+        follows = [
+            async_follow_link(session, "https://example.com/job", "", ".desc", default="short")
+            for _ in range(3)
+        ]
+        concurrent = await asyncio.gather(*follows)
+        again = await async_follow_link(session, "https://example.com/job", "", ".desc", default="short")
+        missing = await async_follow_link(session, "https://example.com/gone", "", ".desc", default="short")
+        missing_again = await async_follow_link(session, "https://example.com/gone", "", ".desc", default="short")
+        return session, concurrent + [again, missing, missing_again]
+
+    session, results = asyncio.run(run())
+    assert results == ["Full description"] * 4 + ["short", "short"]
+    assert session.requests == ["https://example.com/job", "https://example.com/gone"]
+
+
+def test_hits_are_only_written_back_on_evict(tmp_path):
+    cache = DetailCache(str(tmp_path / "detail_cache.db"))
+    cache.put("https://example.com/1", ".desc", 200, "Full description")
+    cache.conn.execute("UPDATE detail_cache SET used_at = 0")
+    cache.get("https://example.com/1", ".desc")
+
+    assert cache.conn.execute("SELECT used_at FROM detail_cache").fetchone() == (0,)
+    cache.evict()
+    assert cache.conn.execute("SELECT used_at FROM detail_cache").fetchone()[0] > 0
+
+
+def test_echojobs_keeps_the_default_on_network_errors(tmp_path):
+    pages = {"https://example.com/job": (aiohttp.ClientConnectionError("reset"), "")}
+
+    async def run():
+        session = FakeSession(pages, DetailCache(str(tmp_path / "detail_cache.db")))
+        return await async_follow_link_echojobs(session, "https://example.com/job", ".desc", default="from the API")
+
+    assert asyncio.run(run()) == "from the API"
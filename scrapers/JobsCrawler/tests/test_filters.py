@@ -0,0 +1,52 @@
+import sqlite3
+
+from src.utils.filters import JobFilter, KeywordMatcher
+
+
+def test_keywords_match_at_word_start():
+    matcher = KeywordMatcher(["intern", "C++", "head of", "r&d", "manager", "  ", "Intern"])
+    assert matcher.keywords == ("intern", "c++", "head of", "r&d", "manager")
+    assert matcher.search("Summer INTERN 2025") == "intern"
+    assert matcher.search("Software Engineering Internship") == "intern"
+    assert matcher.search("Engineering Managers") == "manager"
+    assert matcher.search("Taskmanager Developer") is None
+    assert matcher.search("Senior C++ Developer") == "c++"
+    assert matcher.search("Head of Platform") == "head of"
+    assert matcher.search("R&D Engineer") == "r&d"
+    assert matcher.search(None) is None
+    assert not KeywordMatcher()
+
+
+def test_job_filter_from_config_filters():
+    job_filter = JobFilter.from_filters({"description_contains": "python", "exclude_title": ["php"]})
+
+    assert job_filter.accepts("Backend Engineer", "We use Python and Go")
+    assert job_filter.rejection("Engineering Manager", "Python") == "title contains excluded keyword 'manager'"
+    assert job_filter.rejection("PHP Developer", "Python") == "title contains excluded keyword 'php'"
+    assert job_filter.rejection("Backend Engineer", "Go only") == "description has none of the required keywords"
+    assert JobFilter.from_filters(None).accepts("Backend Engineer")
+
+
+def test_default_filter_skips_plurals_and_internships():
+    job_filter = JobFilter.from_filters(None)
+
+    for title in ("Software Engineering Internship", "Engineering Managers", "Data Scientists", "Senior Analysts"):
+        assert not job_filter.accepts(title), title
+
+
+def test_job_filter_as_sqlite_function():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE main_jobs (title TEXT, description TEXT)")
+    conn.executemany(
+        "INSERT INTO main_jobs VALUES (?, ?)",
+        [
+            ("Senior Backend Engineer", "Python, Postgres"),
+            ("Senior Engineering Manager", "Python"),
+            ("Senior Frontend Engineer", "TypeScript"),
+            ("Internal Tools Engineer", "python"),
+        ],
+    )
+    JobFilter(exclude_title=["manager"], include_title=["senior"], include_description=["python"]).register(conn)
+
+    rows = conn.execute("SELECT title FROM main_jobs WHERE job_filter_accepts(title, description)").fetchall()
+    assert rows == [("Senior Backend Engineer",)]
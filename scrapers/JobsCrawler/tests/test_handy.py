@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+from src.utils.handy import gather_bounded
+
+
+def test_gather_bounded_keeps_order_and_limit():
+    active = 0
+    peak = 0
+
+    async def job(i):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01 * (5 - i % 5))
+        active -= 1
+        return i
+
+    async def run():
+        return await gather_bounded((job(i) for i in range(20)), limit=4)
+
+    assert asyncio.run(run()) == list(range(20))
+    assert peak == 4
+
+
+def test_gather_bounded_propagates_errors():
+    async def ok():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def boom():
+        raise RuntimeError("boom")
+
+    async def run():
+        return await gather_bounded([ok(), boom(), ok()], limit=2)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run())
@@ -0,0 +1,181 @@
+import asyncio
+import sqlite3
+import time
+
+import aiohttp
+from aiohttp import web
+
+from src.db.http_cache import CachedResponse, HttpCache
+from src.utils.scheduler import CrawlSession, FetchScheduler, HostPolicy
+
+
+def make_cached(url="https://example.com/feed", fetched_at=None):
+    return CachedResponse(
+        url=url,
+        etag='"v1"',
+        last_modified="Wed, 01 Jan 2025 00:00:00 GMT",
+        fetched_at=fetched_at or time.time(),
+    )
+
+
+def test_store_and_get(tmp_path):
+    cache = HttpCache(str(tmp_path / "http_cache.db"))
+    cached = make_cached()
+    cache.store(cached)
+
+    assert cache.get(cached.url) == cached
+    assert cache.get("https://example.com/other") is None
+    assert cached.validator_headers() == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Wed, 01 Jan 2025 00:00:00 GMT",
+    }
+
+
+def test_caches_with_bodies_are_replaced(tmp_path):
+    path = str(tmp_path / "http_cache.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE http_cache (url TEXT PRIMARY KEY, body BLOB NOT NULL, fetched_at REAL, used_at REAL)")
+    conn.execute("INSERT INTO http_cache VALUES ('https://example.com/feed', x'00', 0, 0)")
+    conn.commit()
+    conn.close()
+
+    cache = HttpCache(path)
+    assert cache.get("https://example.com/feed") is None
+    cached = make_cached()
+    cache.store(cached)
+    assert cache.get(cached.url) == cached
+    cache.close()
+
+
+def test_unused_entries_are_pruned_on_open(tmp_path):
+    path = str(tmp_path / "http_cache.db")
+    cache = HttpCache(path)
+    cache.store(make_cached("https://example.com/old", fetched_at=time.time() - 100))
+    cache.store(make_cached("https://example.com/new"))
+    cache.close()
+
+    cache = HttpCache(path, max_age=50)
+    assert cache.get("https://example.com/old") is None
+    assert cache.get("https://example.com/new") is not None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = HttpCache(str(tmp_path / "http_cache.db"), max_entries=2)
+    for i in range(3):
+        cache.store(make_cached(f"https://example.com/{i}", fetched_at=time.time() - 10 + i))
+    cache.touch("https://example.com/0")
+
+    assert cache.evict() == 1
+    assert cache.get("https://example.com/1") is None
+    assert cache.get("https://example.com/0") is not None
+
+
+def test_conditional_requests(tmp_path):
+    seen_headers = []
+
+    async def feed(request):
+        seen_headers.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304)
+        return web.Response(text="<rss>jobs</rss>", content_type="application/rss+xml", headers={"ETag": '"v1"'})
+
+    async def no_validators(request):
+        return web.Response(text="fresh")
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/feed", feed)
+        app.router.add_get("/plain", no_validators)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        base = f"http://127.0.0.1:{runner.addresses[0][1]}"
+
+        cache = HttpCache(str(tmp_path / "http_cache.db"))
+        results = []
+        try:
+            async with aiohttp.ClientSession() as client:
+                session = CrawlSession(client, FetchScheduler(default_policy=HostPolicy(rate=0)), cache)
+                async with session.get(f"{base}/feed", cache=True) as response:
+                    results.append((response.status, await response.text()))
+                # Staged until the jobs of the feed are stored
+                assert cache.get(f"{base}/feed") is None
+                await session.save_validators([f"{base}/feed"])
+                async with session.get(f"{base}/feed", cache=True) as response:
+                    results.append((response.status, getattr(response, "not_modified", False)))
+                async with session.get(f"{base}/plain", cache=True) as response:
+                    await response.text()
+                await session.save_validators([f"{base}/plain"])
+            assert cache.get(f"{base}/plain") is None
+        finally:
+            cache.close()
+            await runner.cleanup()
+        return results
+
+    results = asyncio.run(run())
+    assert seen_headers == [None, '"v1"']
+    assert results == [(200, "<rss>jobs</rss>"), (304, True)]
+
+
+def test_streamed_responses_revalidate_like_any_other(tmp_path):
+    async def api(request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304)
+        return web.json_response([{"id": 1}], headers={"ETag": '"v1"'})
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/api", api)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        url = f"http://127.0.0.1:{runner.addresses[0][1]}/api"
+
+        cache = HttpCache(str(tmp_path / "http_cache.db"))
+        not_modified = []
+        try:
+            async with aiohttp.ClientSession() as client:
+                session = CrawlSession(client, FetchScheduler(default_policy=HostPolicy(rate=0)), cache)
+                async with session.get(url, stream=True, cache=True) as response:
+                    body = await response.content.read()
+                await session.save_validators([url])
+                for stream in (True, False):
+                    async with session.get(url, stream=stream, cache=True) as response:
+                        not_modified.append(getattr(response, "not_modified", False))
+        finally:
+            cache.close()
+            await runner.cleanup()
+        return body, not_modified
+
+    body, not_modified = asyncio.run(run())
+    assert body == b'[{"id": 1}]'
+    assert not_modified == [True, True]
+
+
+def test_requests_without_cache_flag_are_not_cached(tmp_path):
+    async def page(request):
+        return web.Response(text="detail", headers={"ETag": '"v1"'})
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/job/1", page)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        url = f"http://127.0.0.1:{runner.addresses[0][1]}/job/1"
+
+        cache = HttpCache(str(tmp_path / "http_cache.db"))
+        try:
+            async with aiohttp.ClientSession() as client:
+                session = CrawlSession(client, FetchScheduler(default_policy=HostPolicy(rate=0)), cache)
+                async with session.get(url) as response:
+                    await response.text()
+            return cache.get(url)
+        finally:
+            cache.close()
+            await runner.cleanup()
+
+    assert asyncio.run(run()) is None
@@ -0,0 +1,68 @@
+import asyncio
+import json
+
+import pytest
+
+from src.utils.json_stream import JsonArrayScanner, iter_json_items
+
+JOBS = [
+    {"id": i, "title": f'Job "{i}", [remote] {{senior}} \\ é', "tags": ["a", {"b": []}], "salary": None}
+    for i in range(20)
+]
+
+
+def scan(document, dict_tag, chunk_size):
+    scanner = JsonArrayScanner(dict_tag)
+    body = document.encode()
+    items = []
+    for start in range(0, len(body), chunk_size):
+        items += scanner.feed(body[start:start + chunk_size])
+    scanner.close()
+    return items
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64, 1 << 20])
+@pytest.mark.parametrize(
+    "document, dict_tag",
+    [
+        (json.dumps(JOBS), ""),
+        (json.dumps({"meta": {"jobs": [0]}, "note": "jobs", "jobs": JOBS, "after": [1]}), "jobs"),
+        (json.dumps({'say "jobs"': 1, "jobs": JOBS}, ensure_ascii=False), "jobs"),
+        (json.dumps({"jobs": []}), "jobs"),
+        (json.dumps([1, "a", None, 2.5]), ""),
+    ],
+)
+def test_scanner_matches_json_loads(document, dict_tag, chunk_size):
+    expected = json.loads(document)
+    assert scan(document, dict_tag, chunk_size) == (expected[dict_tag] if dict_tag else expected)
+
+
+@pytest.mark.parametrize(
+    "document, dict_tag",
+    [
+        ('{"jobs": [1]}', ""),
+        ("[1]", "jobs"),
+        ('{"other": [1]}', "jobs"),
+        ('{"jobs": {"nested": [1]}}', "jobs"),
+        ("[1, 2", ""),
+    ],
+)
+def test_scanner_rejects_unexpected_documents(document, dict_tag):
+    with pytest.raises(ValueError):
+        scan(document, dict_tag, 2)
+
+
+def test_iter_json_items_stops_reading_after_the_list():
+    body = json.dumps({"jobs": JOBS[:3], "trailer": "x" * 1000}).encode()
+    consumed = []
+
+    async def chunks():
+        for start in range(0, len(body), 16):
+            consumed.append(start)
+            yield body[start:start + 16]
+
+    async def run():
+        return [job["id"] async for job in iter_json_items(chunks(), "jobs")]
+
+    assert asyncio.run(run()) == [0, 1, 2]
+    assert len(consumed) < len(body) // 16
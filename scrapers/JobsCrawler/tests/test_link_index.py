@@ -0,0 +1,31 @@
+import sqlite3
+
+from src.db import LinkIndex
+
+
+def test_membership_and_updates():
+    index = LinkIndex(["https://a.io/1", "https://a.io/2"])
+    assert "https://a.io/1" in index
+    assert "https://a.io/3" not in index
+
+    index.add("https://a.io/3")
+    index.update(["https://a.io/4", "https://a.io/4"])
+    assert "https://a.io/3" in index
+    assert "https://a.io/4" in index
+    assert len(index) == 4
+
+
+def test_from_cursor_loads_requested_table():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE main_jobs (link TEXT)")
+    conn.execute("CREATE TABLE test (link TEXT)")
+    conn.executemany("INSERT INTO main_jobs VALUES (?)", [(f"https://main.io/{i}",) for i in range(25)])
+    conn.execute("INSERT INTO test VALUES ('https://test.io/1')")
+
+    main_index = LinkIndex.from_cursor(conn.cursor(), batch_size=10)
+    test_index = LinkIndex.from_cursor(conn.cursor(), test=True)
+
+    assert len(main_index) == 25
+    assert "https://main.io/24" in main_index
+    assert "https://test.io/1" not in main_index
+    assert "https://test.io/1" in test_index
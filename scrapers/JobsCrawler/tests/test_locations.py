@@ -0,0 +1,67 @@
+import json
+
+import pandas as pd
+
+from src.utils.locations import LocationIndex, tag_location, tag_locations
+
+WORLD = {
+    "Europe": {
+        "Zones": ["EUROPE", "EMEA"],
+        "Countries": [
+            {"UNITED KINGDOM": ["UK", "LONDON", "GREAT BRITAIN"]},
+            {"SPAIN": ["ES", "MADRID"]},
+        ],
+    },
+    "North America": {
+        "Zones": ["NORTH AMERICA", "EMEA"],
+        "Countries": [{"UNITED STATES": ["USA", "NEW YORK CITY"]}],
+    },
+}
+
+
+def test_tags_tokens_and_phrases():
+    index = LocationIndex.from_location_data(WORLD)
+    assert index.tag("europe") == "EUROPE"
+    assert index.tag("London") == "UNITED KINGDOM"
+    assert index.tag("great  britain") == "UNITED KINGDOM"
+    assert index.tag("North America") == "NORTH AMERICA"
+    assert index.tag("new york city") == "UNITED STATES"
+    assert index.tag("Atlantis") == ""
+    assert index.max_phrase_words == 3
+
+
+def test_first_match_in_file_order_wins():
+    index = LocationIndex.from_location_data(WORLD)
+    # EMEA is a zone of both continents; the first one listed is kept
+    assert index.tag("emea") == "EMEA"
+    assert index.lookup["EMEA"] == "EMEA"
+
+
+def test_disk_cache_is_invalidated_when_json_changes(tmp_path):
+    json_path = tmp_path / "World.json"
+    json_path.write_text(json.dumps(WORLD))
+
+    index = LocationIndex.load(str(json_path))
+    assert (tmp_path / "World.index.json").exists()
+    assert index.tag("madrid") == "SPAIN"
+
+    changed = json.loads(json.dumps(WORLD))
+    changed["Europe"]["Countries"][1]["SPAIN"].append("BARCELONA")
+    json_path.write_text(json.dumps(changed))
+
+    assert LocationIndex.load(str(json_path)).tag("barcelona") == "SPAIN"
+
+
+def test_tag_location_matches_longest_phrase_first():
+    index = LocationIndex.from_location_data(WORLD)
+    cleaned, tags = tag_location("Remote (New York City | London, UK)", index)
+    assert cleaned == "Remote New York City London UK"
+    assert tags == ["UNITED STATES", "UNITED KINGDOM"]
+    assert tag_location("Atlantis", index) == ("Atlantis", [])
+
+
+def test_tag_locations_returns_real_lists_aligned_with_rows():
+    index = LocationIndex.from_location_data(WORLD)
+    cleaned, tags = tag_locations(pd.Series(["Europe", "Madrid, Spain", "Europe", None]), index)
+    assert cleaned.tolist() == ["Europe", "Madrid Spain", "Europe", "None"]
+    assert tags.tolist() == [["EUROPE"], ["SPAIN"], ["EUROPE"], []]
@@ -0,0 +1,129 @@
+import asyncio
+import json
+
+import aiohttp
+from aiohttp import web
+
+from src.utils.metrics import ALL_SOURCES, Histogram, RunMetrics, source_scope
+from src.utils.scheduler import CrawlSession, FetchScheduler, HostPolicy
+
+
+def test_histogram_quantiles_interpolate_inside_buckets():
+    histogram = Histogram(buckets=(1.0, 2.0))
+    for value in (0.5, 1.5, 1.5, 1.5, 5.0):
+        histogram.observe(value)
+
+    assert histogram.counts == [1, 3, 1]
+    assert histogram.quantile(0.5) == 1.5
+    # The overflow bucket is bounded by the largest value seen
+    assert histogram.quantile(1.0) == 5.0
+    assert list(histogram.cumulative()) == [(1.0, 1), (2.0, 4), (float("inf"), 5)]
+    assert Histogram().quantile(0.99) == 0.0
+
+
+def test_source_scope_follows_tasks_started_in_it():
+    metrics = RunMetrics()
+
+    async def fetch():
+        metrics.observe("fetch", 0.1)
+
+    async def crawl(source):
+        with source_scope(source):
+            await asyncio.gather(fetch(), asyncio.ensure_future(fetch()))
+            metrics.add("rows_yielded", 3)
+
+    async def run():
+        await asyncio.gather(crawl("a"), crawl("b"))
+        metrics.observe("insert", 0.2)
+
+    asyncio.run(run())
+    assert {source: stages["fetch"].count for source, stages in metrics.stages.items() if "fetch" in stages} == {
+        "a": 2,
+        "b": 2,
+    }
+    assert metrics.stages[ALL_SOURCES]["insert"].count == 1
+    assert metrics.counters["a"]["rows_yielded"] == 3
+
+
+def test_report_splits_sources_from_ingest_and_sums_totals(tmp_path):
+    metrics = RunMetrics("bs4_test", {"strategy": "bs4", "table": "test"})
+    metrics.observe("fetch", 0.2, source="site-a")
+    metrics.observe("fetch", 0.4, source="site-b")
+    metrics.record_response(200, 1000, source="site-a")
+    metrics.record_response(404, source="site-b")
+    metrics.add("rows_yielded", 5, source="site-a")
+    with metrics.timer("insert", ALL_SOURCES):
+        pass
+    metrics.add("rows_inserted", 4, ALL_SOURCES)
+    metrics.finish()
+
+    path = tmp_path / "metrics" / "bs4_test.json"
+    metrics.write_json(str(path))
+    report = json.loads(path.read_text())
+
+    assert report["run"] == "bs4_test" and report["strategy"] == "bs4"
+    assert set(report["sources"]) == {"site-a", "site-b"}
+    assert report["sources"]["site-a"]["bytes_downloaded"] == 1000
+    assert report["sources"]["site-b"]["status_codes"] == {"404": 1}
+    assert report["ingest"]["rows_inserted"] == 4
+    assert report["totals"]["stages"]["fetch"]["count"] == 2
+    assert report["totals"]["status_codes"] == {"200": 1, "404": 1}
+    assert report["totals"]["rows_yielded"] == 5
+
+
+def test_prometheus_textfile(tmp_path):
+    metrics = RunMetrics("rss", {"strategy": "rss"})
+    metrics.observe("parse", 0.003, source='feed "x"')
+    metrics.record_response(200, 10, source='feed "x"')
+
+    path = tmp_path / "rss.prom"
+    metrics.write_prometheus(str(path))
+    text = path.read_text()
+
+    assert (
+        'jobscrawler_stage_duration_seconds_bucket{strategy="rss",source="feed \\"x\\"",stage="parse",le="0.005"} 1'
+        in text
+    )
+    assert 'jobscrawler_stage_duration_seconds_count{strategy="rss",source="feed \\"x\\"",stage="parse"} 1' in text
+    assert 'jobscrawler_http_responses_total{strategy="rss",source="feed \\"x\\"",code="200"} 1' in text
+    assert 'jobscrawler_bytes_downloaded_total{strategy="rss",source="feed \\"x\\""} 10' in text
+    assert not (tmp_path / "rss.prom.tmp").exists()
+
+
+def test_crawl_session_records_fetches():
+    async def page(request):
+        return web.Response(text="x" * 100)
+
+    async def missing(request):
+        return web.Response(status=404)
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/page", page)
+        app.router.add_get("/missing", missing)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        base = f"http://127.0.0.1:{runner.addresses[0][1]}"
+
+        metrics = RunMetrics()
+        try:
+            async with aiohttp.ClientSession() as client:
+                session = CrawlSession(client, FetchScheduler(default_policy=HostPolicy(rate=0)), metrics=metrics)
+                with source_scope("site"):
+                    async with session.get(f"{base}/page") as response:
+                        assert await response.text() == "x" * 100
+                    async with session.get(f"{base}/page", stream=True) as response:
+                        await response.content.read()
+                    async with session.get(f"{base}/missing"):
+                        pass
+        finally:
+            await runner.cleanup()
+        return metrics
+
+    metrics = asyncio.run(run())
+    assert metrics.stages["site"]["fetch"].count == 3
+    assert metrics.stages["site"]["throttle"].count == 3
+    assert dict(metrics.status_codes["site"]) == {200: 2, 404: 1}
+    assert metrics.counters["site"]["bytes_downloaded"] == 200
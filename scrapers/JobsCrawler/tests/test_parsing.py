@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+from src.utils.parsing import (
+    EXTRACTION_BACKENDS,
+    ParseExecutor,
+    extract_container_listing,
+    extract_feed_entries,
+    extract_main_listing,
+    extract_text,
+    select_texts,
+)
+from src.utils.scrape_job_page import extract_job_metadata
+
+ELEMENTS_PATH = {
+    "jobs_path": ".job",
+    "title_path": ".title",
+    "link_path": "a",
+    "location_path": ".location",
+    "description_path": ".summary",
+}
+
+LISTING = """
+<ul>
+  <li class="job">
+    <h2 class="title">Backend Engineer</h2><a href="/jobs/1">x</a><span class="location">Remote</span>
+  </li>
+  <li class="job"><h2 class="title">Python Developer</h2><a href="/jobs/2">x</a><p class="summary">APIs</p></li>
+</ul>
+"""
+
+CONTAINER = """
+<div class="job">
+  <span class="title"> Backend Engineer </span><span class="title">Python Developer</span>
+  <a href="/jobs/1">x</a><a>x</a>
+  <p class="summary">APIs</p><p class="summary"></p>
+  <span class="location">Remote</span><span class="location">UK</span>
+</div>
+"""
+
+FEED = """<?xml version="1.0"?>
+<rss version="2.0"><channel><title>jobs</title>
+<item><title>Backend Engineer</title><link>https://example.com/1</link><description>APIs</description><location>UK</location></item>
+<item><title>No location</title><link>https://example.com/2</link><description>x</description></item>
+</channel></rss>
+"""
+
+
+def test_extract_main_listing():
+    assert extract_main_listing(LISTING, ELEMENTS_PATH) == [
+        ("Backend Engineer", "/jobs/1", "NaN", "Remote"),
+        ("Python Developer", "/jobs/2", "APIs", "NaN"),
+    ]
+
+
+def test_extract_main_listing_without_jobs_raises():
+    with pytest.raises(ValueError, match="No jobs were found"):
+        extract_main_listing("<html></html>", ELEMENTS_PATH)
+
+
+def test_extract_container_listing():
+    assert extract_container_listing(CONTAINER, ELEMENTS_PATH) == [
+        ("Backend Engineer", "/jobs/1", "APIs", "Remote"),
+        ("Python Developer", "NaN", "NaN", "UK"),
+    ]
+
+
+def test_extract_feed_entries():
+    assert extract_feed_entries(FEED, "title", "link", "description", "location") == [
+        ("Backend Engineer", "https://example.com/1", "APIs", "UK"),
+        ("NaN", "NaN", "NaN", "NaN"),
+    ]
+
+
+def test_extract_text():
+    assert extract_text("<div class='desc'>Full text</div>", ".desc") == "Full text"
+    assert extract_text("<div></div>", ".desc") is None
+
+
+def test_large_documents_are_parsed_in_worker_processes():
+    async def run():
+        executor = ParseExecutor(max_workers=1, inline_threshold=len(LISTING))
+        try:
+            small = await executor.run(extract_text, "<p class='x'>inline</p>", ".x")
+            assert executor._pool is None
+            large = await executor.run(extract_main_listing, LISTING, ELEMENTS_PATH)
+            assert executor._pool is not None
+            return small, large
+        finally:
+            executor.shutdown()
+
+    small, large = asyncio.run(run())
+    assert small == "inline"
+    assert large == extract_main_listing(LISTING, ELEMENTS_PATH)
+
+
+DETAIL = """
+<html><body>
+  <div class="main-container-wrapper">
+    <div class="hero-left">
+      <p class="apply-warning">Only considering candidates eligible to work in <strong> Newcastle, UK </strong></p>
+      <div class="row job-description-text"><p>We build <b>APIs</b>.</p></div>
+    </div>
+    <span class="job-posted">Posted 3 days ago</span>
+  </div>
+  <div class="description">Other</div>
+</body></html>
+"""
+
+
+@pytest.mark.parametrize("backend", sorted(EXTRACTION_BACKENDS))
+def test_backends_agree_with_full_parse(backend):
+    selectors = (
+        ".main-container-wrapper .hero-left .job-description-text",
+        ".main-container-wrapper .job-posted",
+        ".main-container-wrapper .missing",
+    )
+    assert select_texts(DETAIL, selectors, strip=True, backend=backend) == [
+        "We buildAPIs.",
+        "Posted 3 days ago",
+        None,
+    ]
+    assert extract_text(DETAIL, "div.description", backend=backend) == "Other"
+
+
+def test_extract_job_metadata():
+    assert extract_job_metadata(DETAIL) == {
+        "location_restriction": "Newcastle, UK",
+        "posted_date": "3 days ago",
+        "pto_days": None,
+    }
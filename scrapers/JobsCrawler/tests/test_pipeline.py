@@ -0,0 +1,130 @@
+import asyncio
+
+from src.pipeline import IngestPipeline, empty_rows
+
+
+def make_rows(n, prefix="job"):
+    rows = empty_rows()
+    for i in range(n):
+        rows["title"].append(f"{prefix} {i}")
+        rows["link"].append(f"https://example.com/{prefix}/{i}")
+        rows["description"].append("")
+        rows["pubdate"].append(None)
+        rows["location"].append("Remote")
+        rows["timestamp"].append(None)
+    return rows
+
+
+def test_emitted_rows_are_flushed_in_batches():
+    batches = []
+
+    def process(df):
+        batches.append(list(df["link"]))
+        return len(df)
+
+    async def run():
+        pipeline = IngestPipeline(process, batch_size=4, flush_interval=10)
+        pipeline.start()
+        await pipeline.emit(make_rows(10), source="a")
+        await pipeline.close()
+        return pipeline
+
+    pipeline = asyncio.run(run())
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+    assert pipeline.records_emitted == pipeline.rows_stored == 10
+
+
+def test_partial_batch_is_flushed_after_interval():
+    async def run():
+        stored = []
+        pipeline = IngestPipeline(lambda df: stored.append(len(df)) or len(df), batch_size=100, flush_interval=0.05)
+        pipeline.start()
+        await pipeline.emit(make_rows(3), source="a")
+        await asyncio.sleep(0.2)
+        before_close = list(stored)
+        await pipeline.close()
+        return before_close
+
+    assert asyncio.run(run()) == [3]
+
+
+def test_uneven_rows_are_dropped():
+    async def run():
+        pipeline = IngestPipeline(lambda df: len(df))
+        pipeline.start()
+        rows = make_rows(3)
+        rows["location"].pop()
+        queued = await pipeline.emit(rows, source="broken")
+        await pipeline.emit(make_rows(2), source="ok")
+        await pipeline.close()
+        return queued, pipeline
+
+    queued, pipeline = asyncio.run(run())
+    assert queued == 0
+    assert pipeline.rows_stored == 2
+
+
+def test_failing_batch_does_not_stop_the_consumer():
+    calls = []
+
+    def process(df):
+        calls.append(len(df))
+        if len(calls) == 1:
+            raise RuntimeError("db is locked")
+        return len(df)
+
+    async def run():
+        pipeline = IngestPipeline(process, batch_size=2, flush_interval=10)
+        pipeline.start()
+        await pipeline.emit(make_rows(4), source="a")
+        await pipeline.close()
+        return pipeline
+
+    pipeline = asyncio.run(run())
+    assert pipeline.failed_batches == 1
+    assert pipeline.rows_stored == 2
+
+
+def test_async_process_batch_is_awaited():
+    stored = []
+
+    async def process(df):
+        await asyncio.sleep(0.01)
+        stored.append(len(df))
+        return len(df)
+
+    async def run():
+        pipeline = IngestPipeline(process, batch_size=3, flush_interval=10)
+        pipeline.start()
+        await pipeline.emit(make_rows(7), source="a")
+        await pipeline.close()
+        return pipeline
+
+    pipeline = asyncio.run(run())
+    assert stored == [3, 3, 1]
+    assert pipeline.rows_stored == 7
+
+
+def test_failing_source_only_loses_its_own_jobs():
+    stored = []
+
+    def process(df):
+        if df["link"].str.contains("/bad/").any():
+            raise ValueError("malformed row")
+        stored.extend(df["link"])
+        return len(df)
+
+    async def run():
+        pipeline = IngestPipeline(process, batch_size=6, flush_interval=10)
+        pipeline.start()
+        await pipeline.emit(make_rows(2, "good"), source="a")
+        await pipeline.emit(make_rows(2, "bad"), source="b")
+        await pipeline.emit(make_rows(2, "other"), source="c")
+        await pipeline.close()
+        return pipeline
+
+    pipeline = asyncio.run(run())
+    assert pipeline.rows_stored == 4
+    assert pipeline.failed_batches == 1
+    assert pipeline.failed_sources == {"b"}
+    assert not any("/bad/" in link for link in stored)
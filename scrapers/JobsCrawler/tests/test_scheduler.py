@@ -0,0 +1,215 @@
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from src.utils.FollowLink import async_follow_link
+from src.utils.scheduler import (
+    CrawlSession,
+    FetchScheduler,
+    HostPolicy,
+    HostUnavailableError,
+    RetryPolicy,
+    TokenBucket,
+    host_of,
+    parse_retry_after,
+)
+
+
+def test_host_of():
+    assert host_of("https://4dayweek.io/remote-jobs/?page=1") == "4dayweek.io"
+    assert host_of("API.Example.com") == "api.example.com"
+
+
+def test_token_bucket_spaces_requests_after_burst():
+    async def run():
+        bucket = TokenBucket(rate=20, burst=2)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for _ in range(4):
+            await bucket.acquire()
+        return loop.time() - start
+
+    # Two tokens are free, the next two cost 1/20s each.
+    assert asyncio.run(run()) >= 0.09
+
+
+def test_per_host_connection_limit():
+    async def run():
+        scheduler = FetchScheduler(max_concurrency=10, default_policy=HostPolicy(rate=0, max_connections=5))
+        scheduler.configure_host("https://slow.example", {"max_connections": 2})
+        in_flight = {"slow.example": 0, "fast.example": 0}
+        peak = {"slow.example": 0, "fast.example": 0}
+
+        async def request(url):
+            host = host_of(url)
+            async with scheduler.slot(url):
+                in_flight[host] += 1
+                peak[host] = max(peak[host], in_flight[host])
+                await asyncio.sleep(0.01)
+                in_flight[host] -= 1
+
+        urls = [f"https://slow.example/{i}" for i in range(6)] + [f"https://fast.example/{i}" for i in range(6)]
+        await asyncio.gather(*(request(url) for url in urls))
+        return peak
+
+    peak = asyncio.run(run())
+    assert peak["slow.example"] == 2
+    assert peak["fast.example"] == 5
+
+
+def test_global_concurrency_cap():
+    async def run():
+        scheduler = FetchScheduler(max_concurrency=3, default_policy=HostPolicy(rate=0, max_connections=10))
+        active = 0
+        peak = 0
+
+        async def request(url):
+            nonlocal active, peak
+            async with scheduler.slot(url):
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+
+        await asyncio.gather(*(request(f"https://host{i % 4}.example/") for i in range(12)))
+        return peak
+
+    assert asyncio.run(run()) == 3
+
+
+async def _serve(handler):
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    return runner, f"http://127.0.0.1:{runner.addresses[0][1]}"
+
+
+def _session(client, **retry):
+    retry_policy = RetryPolicy(**{"backoff": 0.01, **retry})
+    return CrawlSession(client, FetchScheduler(default_policy=HostPolicy(rate=0), retry_policy=retry_policy))
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_transient_errors_are_retried():
+    requests = []
+
+    async def flaky(request):
+        requests.append(request.path)
+        if len(requests) == 1:
+            return web.Response(status=503)
+        if len(requests) == 2:
+            return web.Response(status=429, headers={"Retry-After": "0"})
+        return web.Response(text="ok")
+
+    async def run():
+        runner, base = await _serve(flaky)
+        try:
+            async with aiohttp.ClientSession() as client:
+                session = _session(client)
+                async with session.get(f"{base}/jobs") as response:
+                    return response.status, await response.text(), session.metrics
+        finally:
+            await runner.cleanup()
+
+    status, text, metrics = asyncio.run(run())
+    assert (status, text) == (200, "ok")
+    assert len(requests) == 3
+    assert metrics.counters["*"]["retries"] == 2
+    assert dict(metrics.status_codes["*"]) == {503: 1, 429: 1, 200: 1}
+
+
+def test_long_retry_after_is_not_waited_for():
+    requests = []
+
+    async def busy(request):
+        requests.append(request.path)
+        return web.Response(status=429, headers={"Retry-After": "3600"})
+
+    async def run():
+        runner, base = await _serve(busy)
+        try:
+            async with (
+                aiohttp.ClientSession() as client,
+                _session(client, max_backoff=5).get(f"{base}/jobs") as response,
+            ):
+                return response.status
+        finally:
+            await runner.cleanup()
+
+    assert asyncio.run(run()) == 429
+    assert len(requests) == 1
+
+
+def test_timeouts_are_retried_then_raised():
+    requests = []
+
+    async def slow(request):
+        requests.append(request.path)
+        await asyncio.sleep(1)
+        return web.Response(text="late")
+
+    async def run():
+        runner, base = await _serve(slow)
+        try:
+            async with (
+                aiohttp.ClientSession() as client,
+                _session(client, attempts=2, total_timeout=0.1).get(f"{base}/jobs"),
+            ):
+                pass
+        finally:
+            await runner.cleanup()
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(run())
+    assert len(requests) == 2
+
+
+def test_circuit_breaker_skips_failing_host():
+    requests = []
+
+    async def down(request):
+        requests.append(request.path)
+        return web.Response(status=500)
+
+    async def run():
+        runner, base = await _serve(down)
+        try:
+            async with aiohttp.ClientSession() as client:
+                session = _session(client, attempts=2, failure_threshold=2)
+                for page in range(2):
+                    async with session.get(f"{base}/jobs/{page}") as response:
+                        assert response.status == 500
+                with pytest.raises(HostUnavailableError):
+                    async with session.get(f"{base}/jobs/2"):
+                        pass
+                # Detail pages of a skipped host fall back to the default description
+                description = await async_follow_link(session, f"{base}/job/1", "", "div.description", default="NaN")
+                return session, description
+        finally:
+            await runner.cleanup()
+
+    session, description = asyncio.run(run())
+    assert description == "NaN"
+    assert requests == ["/jobs/0", "/jobs/0", "/jobs/1", "/jobs/1"]
+    assert session.metrics.counters["*"]["skipped_requests"] == 2
+
+
+def test_success_resets_failure_count():
+    scheduler = FetchScheduler(retry_policy=RetryPolicy(failure_threshold=2))
+    scheduler.record_failure("https://a.example/1")
+    scheduler.record_success("https://a.example/2")
+    scheduler.record_failure("https://a.example/3")
+    assert scheduler.is_available("https://a.example/")
+    scheduler.record_failure("https://a.example/4")
+    assert not scheduler.is_available("https://a.example/")
+    assert scheduler.is_available("https://b.example/")
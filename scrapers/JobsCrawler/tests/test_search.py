@@ -0,0 +1,83 @@
+import sqlite3
+
+from src.db import JobsDatabase, job_source
+from src.db.search import has_search_index, keywords_expression, search_jobs
+
+JOBS = [
+    ("Senior Python Engineer", "https://a.io/1", "Django and Postgres", "Remote"),
+    ("Engineering Manager", "https://a.io/2", "Lead a Python team", "Berlin"),
+    ("C++ Developer", "https://b.io/3", "Low latency systems", "London"),
+]
+
+
+def insert_jobs(conn, jobs=JOBS):
+    conn.executemany("INSERT INTO main_jobs (title, link, description, location) VALUES (?, ?, ?, ?)", jobs)
+    conn.commit()
+
+
+def test_keywords_expression():
+    assert keywords_expression(None) is None
+    assert keywords_expression(["python", " "]) == '"python"*'
+    assert keywords_expression(["head of", 'say "hi"'], ["title"]) == '{title} : ("head of"* OR "say ""hi"""*)'
+
+
+def test_keywords_expression_matches_plurals(tmp_path):
+    with JobsDatabase(str(tmp_path / "jobs.db")) as db:
+        insert_jobs(db.conn, [*JOBS, ("Engineering Managers", "https://a.io/4", "", "")])
+        expression = keywords_expression(["manager", "c++"], ["title"])
+        rows = db.conn.execute(
+            "SELECT title FROM main_jobs_fts WHERE main_jobs_fts MATCH ? ORDER BY rowid", (expression,)
+        )
+
+        assert [title for title, in rows] == ["Engineering Manager", "C++ Developer", "Engineering Managers"]
+
+
+def test_index_follows_inserts_updates_and_deletes(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    with JobsDatabase(path) as db:
+        insert_jobs(db.conn)
+        # Set at ingest by the crawler
+        db.conn.executemany(
+            "UPDATE main_jobs SET source = ? WHERE link = ?", [(job_source(link), link) for _, link, *_ in JOBS]
+        )
+        db.conn.commit()
+
+    with JobsDatabase(path) as db:
+
+        assert [job["title"] for job in search_jobs(db.conn, "python")] == [
+            "Senior Python Engineer",
+            "Engineering Manager",
+        ]
+        assert [job["title"] for job in search_jobs(db.conn, '"c++"')] == ["C++ Developer"]
+        assert [job["title"] for job in search_jobs(db.conn, "python", source="a.io", limit=1)] == [
+            "Senior Python Engineer"
+        ]
+
+        db.conn.execute("UPDATE main_jobs SET status = 'reviewed' WHERE link = 'https://a.io/1'")
+        db.conn.execute("UPDATE main_jobs SET description = 'Rust only' WHERE link = 'https://a.io/2'")
+        db.conn.execute("DELETE FROM main_jobs WHERE link = 'https://b.io/3'")
+        db.conn.commit()
+
+        assert [job["title"] for job in search_jobs(db.conn, "python", statuses=["new"])] == []
+        assert [job["title"] for job in search_jobs(db.conn, "python")] == ["Senior Python Engineer"]
+        assert search_jobs(db.conn, "rust")[0]["snippet"] == "[Rust] only"
+        assert search_jobs(db.conn, "latency") == []
+
+
+def test_index_is_built_for_existing_jobs(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE main_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, link TEXT UNIQUE NOT NULL,
+            description TEXT, pubdate TEXT, location TEXT, timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            location_tags TEXT
+        )
+    """)
+    insert_jobs(conn)
+    assert not has_search_index(conn)
+    conn.close()
+
+    with JobsDatabase(path) as db:
+        assert has_search_index(db.conn)
+        assert [job["link"] for job in search_jobs(db.conn, "london")] == ["https://b.io/3"]
@@ -0,0 +1,40 @@
+import asyncio
+from collections import Counter
+
+import pytest
+
+from src.main import main
+from src.utils.sharding import config_key, shard_of
+
+
+def test_configs_of_a_host_share_a_key():
+    assert config_key({"name": "remotive", "url": "https://Remotive.com/api"}) == "remotive.com"
+    assert config_key({"url": "https://remotive.com/rss?page="}) == "remotive.com"
+
+
+def test_every_key_gets_one_shard_and_load_is_spread():
+    keys = [f"https://source{i}.io/jobs" for i in range(1000)]
+    counts = Counter(shard_of(key, 4) for key in keys)
+    assert set(counts) == {0, 1, 2, 3}
+    assert min(counts.values()) > 200
+    assert shard_of(keys[0], 1) == 0
+
+
+def test_adding_a_shard_only_moves_keys_to_it():
+    keys = [f"https://source{i}.io/jobs" for i in range(1000)]
+    before = {key: shard_of(key, 3) for key in keys}
+    after = {key: shard_of(key, 4) for key in keys}
+    moved = [key for key in keys if before[key] != after[key]]
+    assert all(after[key] == 3 for key in moved)
+    assert 150 < len(moved) < 350
+
+
+def test_salted_levels_are_independent():
+    keys = [f"https://source{i}.io/jobs" for i in range(1000)]
+    node_zero = [key for key in keys if shard_of(key, 2, salt="node") == 0]
+    assert len({shard_of(key, 2, salt="process") for key in node_zero}) == 2
+
+
+def test_shards_need_processes():
+    with pytest.raises(SystemExit):
+        asyncio.run(main(["--shards", "2"]))
@@ -0,0 +1,55 @@
+from datetime import date, datetime
+
+import pandas as pd
+
+from src.crawler import INSERT_COLUMNS, _df_to_insert_rows, insert_job_rows
+from src.db import JobsDatabase, JobSpool
+from src.db.spool import find_spools, read_spool, spool_table
+
+
+def _rows(links):
+    return _df_to_insert_rows(pd.DataFrame({
+        "title": ["Backend Engineer"] * len(links),
+        "link": links,
+        "description": ["Python"] * len(links),
+        "pubdate": [date(2025, 1, 2)] * len(links),
+        "location": ["Europe"] * len(links),
+        "timestamp": [datetime(2025, 1, 2, 3, 4, 5)] * len(links),
+        "location_tags": [["EUROPE"]] * len(links),
+    }))
+
+
+def test_every_batch_is_published_without_close(tmp_path):
+    spool = JobSpool(str(tmp_path), "test", INSERT_COLUMNS)
+    first = spool.write(_rows(["https://a.io/1", "https://a.io/2"]))
+    second = spool.write(_rows(["https://a.io/3"]))
+    assert spool.write([]) is None
+
+    # A run killed before close() has still published what it stored
+    assert find_spools([tmp_path]) == [first, second]
+    assert sorted(tmp_path.iterdir()) == [first, second]
+    assert spool_table(first) == "test"
+    assert list(read_spool(first, INSERT_COLUMNS)) == _rows(["https://a.io/1", "https://a.io/2"])
+    assert spool.rows_written == 3
+
+
+def test_merging_spools_is_idempotent(tmp_path):
+    spools = []
+    for links in (["https://a.io/1", "https://a.io/2"], ["https://a.io/2", "https://a.io/3"]):
+        spool = JobSpool(str(tmp_path / "spools"), "test", INSERT_COLUMNS)
+        spools.append(spool.write(_rows(links)))
+        spool.close()
+
+    with JobsDatabase(str(tmp_path / "jobs.db")) as db:
+        cur = db.get_cursor()
+        inserted = [insert_job_rows(list(read_spool(path, INSERT_COLUMNS)), cur, test=True) for path in spools]
+        again = insert_job_rows(list(read_spool(spools[0], INSERT_COLUMNS)), cur, test=True)
+        cur.execute("SELECT COUNT(*), MIN(source), MIN(location_tags) FROM test")
+        stored = cur.fetchone()
+        cur.execute("SELECT COUNT(*) FROM test_location_tags WHERE tag = 'EUROPE'")
+        tagged = cur.fetchone()[0]
+
+    assert inserted == [2, 1]
+    assert again == 0
+    assert stored == (3, "a.io", '["EUROPE"]')
+    assert tagged == 3
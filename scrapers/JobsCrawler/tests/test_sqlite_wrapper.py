@@ -0,0 +1,125 @@
+import sqlite3
+from datetime import date, datetime
+
+from src.db import JobsDatabase, job_source
+from src.db.sqlite_wrapper import SCHEMA_VERSION, epoch_seconds, iso_timestamp, location_tags_json
+
+
+def test_job_source():
+    assert job_source("https://www.4dayweek.io/remote-job/1") == "4dayweek.io"
+    assert job_source("http://127.0.0.1:8765/job/2") == "127.0.0.1"
+    assert job_source("WWW.Remotive.com") == "remotive.com"
+    assert job_source("NaN") == "nan"
+    assert job_source(None) is None
+
+
+def test_typed_value_helpers():
+    assert epoch_seconds("2025-01-02") == epoch_seconds(date(2025, 1, 2)) == int(datetime(2025, 1, 2).timestamp())
+    assert epoch_seconds("None") is None
+    assert iso_timestamp("2025-01-02 03:04:05.123456") == "2025-01-02 03:04:05"
+    assert location_tags_json("['EUROPE', 'GERMANY']") == location_tags_json(["EUROPE", "GERMANY"])
+    assert location_tags_json(["EUROPE", "GERMANY"]) == '["EUROPE", "GERMANY"]'
+    assert location_tags_json('["EUROPE"]') == '["EUROPE"]'
+    assert location_tags_json("nan") is None
+
+
+def test_source_migration_and_queue_index(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE main_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, link TEXT UNIQUE NOT NULL,
+            description TEXT, pubdate TEXT, location TEXT, timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            location_tags TEXT, status TEXT DEFAULT 'new', notes TEXT
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO main_jobs (title, link, status) VALUES (?, ?, ?)",
+        [("A", "https://4dayweek.io/1", None), ("B", "https://www.remotive.com/2", "reviewed")],
+    )
+    conn.commit()
+    conn.close()
+
+    with JobsDatabase(path) as db:
+        rows = db.conn.execute("SELECT link, source, status FROM main_jobs ORDER BY id").fetchall()
+        assert rows == [
+            ("https://4dayweek.io/1", "4dayweek.io", "new"),
+            ("https://www.remotive.com/2", "remotive.com", "reviewed"),
+        ]
+
+        plan = db.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM main_jobs "
+            "WHERE source = ? AND status = 'new' ORDER BY timestamp DESC LIMIT 1",
+            ("4dayweek.io",),
+        ).fetchall()
+        details = " ".join(row[-1] for row in plan)
+        assert "idx_main_jobs_source_status_timestamp (source=? AND status=?)" in details
+        assert "TEMP B-TREE" not in details
+
+
+def test_migrations_run_once(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    with JobsDatabase(path) as db:
+        assert db.conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        # Not backfilled again on the next connection, the migration already ran
+        db.conn.execute("INSERT INTO main_jobs (title, link) VALUES ('A', 'https://a.io/1')")
+        db.conn.commit()
+
+    with JobsDatabase(path) as db:
+        assert db.conn.execute("SELECT source FROM main_jobs").fetchone() == (None,)
+
+
+def test_typed_columns_migration_and_tag_index(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE main_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, link TEXT UNIQUE NOT NULL,
+            description TEXT, pubdate TEXT, location TEXT, timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            location_tags TEXT, status TEXT DEFAULT 'new', notes TEXT
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO main_jobs (title, link, pubdate, timestamp, location_tags) VALUES (?, ?, ?, ?, ?)",
+        [
+            ("Old", "https://a.io/1", "2024-12-01", "2024-12-01 10:00:00.500000", "['EUROPE', 'GERMANY']"),
+            ("New", "https://a.io/2", "2025-01-02", "2025-01-02 03:04:05.123456", "['EUROPE']"),
+            ("Other", "https://a.io/3", "2025-01-02", "2025-01-02 04:00:00", "['UNITED STATES']"),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+    with JobsDatabase(path) as db:
+        row = db.conn.execute(
+            "SELECT pubdate, timestamp, published_at, crawled_at, location_tags FROM main_jobs WHERE id = 2"
+        ).fetchone()
+        assert row == (
+            "2025-01-02",
+            "2025-01-02 03:04:05",
+            int(datetime(2025, 1, 2).timestamp()),
+            int(datetime(2025, 1, 2, 3, 4, 5).timestamp()),
+            '["EUROPE"]',
+        )
+
+        recent = db.get_jobs_by_location_tag("europe", since=datetime(2025, 1, 1))
+        assert [job["title"] for job in recent] == ["New"]
+        assert [job["title"] for job in db.get_jobs_by_location_tag("EUROPE")] == ["New", "Old"]
+
+        # The tag rows follow inserts, edits and deletes
+        db.conn.execute(
+            "INSERT INTO main_jobs (title, link, crawled_at, location_tags) VALUES ('Added', 'https://a.io/4', ?, ?)",
+            (int(datetime(2025, 1, 3).timestamp()), '["EUROPE"]'),
+        )
+        db.conn.execute("UPDATE main_jobs SET location_tags = '[\"EUROPE\"]' WHERE id = 3")
+        db.conn.execute("DELETE FROM main_jobs WHERE id = 1")
+        assert [job["title"] for job in db.get_jobs_by_location_tag("EUROPE")] == ["Added", "Other", "New"]
+
+        plan = db.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT job_id FROM main_jobs_location_tags "
+            "WHERE tag = ? AND crawled_at >= ? ORDER BY crawled_at DESC",
+            ("EUROPE", 0),
+        ).fetchall()
+        details = " ".join(row[-1] for row in plan)
+        assert "idx_main_jobs_location_tags_tag_crawled_at (tag=? AND crawled_at>?)" in details
+        assert "TEMP B-TREE" not in details